@@ -1,13 +1,11 @@
 from __future__ import annotations
 
 import re
-import shlex
-import subprocess
 import sys
 
 from simple_logger.logger import get_logger
 
-from apps.utils import get_util_config
+from apps.utils import GIT_RUNNER, get_util_config
 
 LOGGER = get_logger(name=__name__)
 AUTOMATED = "automated"
@@ -20,16 +18,12 @@ def git_diff(branch: str | None = None, current_commit: str | None = None, previ
         LOGGER.error("Branch and Previous or current commit are mutually exclusive command line options.")
         sys.exit(1)
 
-    # Sanitize inputs to prevent command injection
+    # Arguments are passed to git as a list, never through a shell
     if branch:
-        sanitized_branch = shlex.quote(branch)
-        diff_command = f"git diff {sanitized_branch} HEAD"
+        args = ["diff", branch, "HEAD"]
     else:
-        sanitized_previous = shlex.quote(previous_commit) if previous_commit else ""
-        sanitized_current = shlex.quote(current_commit) if current_commit else ""
-        diff_command = f"git diff {sanitized_previous} {sanitized_current}"
-    data = subprocess.check_output(shlex.split(diff_command))
-    return data.decode()
+        args = ["diff", *[commit for commit in (previous_commit, current_commit) if commit]]
+    return GIT_RUNNER.output(args=args)
 
 
 def git_diff_lines(
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import mmap
+import os
+import re
+
+from apps.unused_code.identifier_index import BINARY_PROBE_SIZE
+
+
+def compile_words_regex(words: list[str]) -> re.Pattern[bytes]:
+    """Compile a byte regex matching any of `words` as a whole word."""
+    return re.compile(rb"\b(?:" + b"|".join(re.escape(word.encode()) for word in words) + rb")\b")
+
+
+def search_file(root: str, relative_path: str, words: list[str], regex: re.Pattern[bytes]) -> list[str]:
+    """Return ``path:line:content`` entries for the lines of a file matching `regex`, like ``git grep -n``.
+
+    The file is memory-mapped and searched in place; files mentioning none of `words` are skipped with
+    plain substring searches before running the regex. Binary files are skipped as ``git grep -I`` does.
+
+    Args:
+        root: The directory `relative_path` is relative to.
+        relative_path: The file to search, reported as is in the entries.
+        words: The literal words `regex` is built from.
+        regex: The compiled regex, e.g. from `compile_words_regex`.
+    """
+    try:
+        with open(os.path.join(root, relative_path), "rb") as fd:
+            if os.fstat(fd.fileno()).st_size == 0:
+                return []
+
+            with mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                if buffer.find(b"\0", 0, BINARY_PROBE_SIZE) != -1:
+                    return []
+
+                if all(buffer.find(word.encode()) == -1 for word in words):
+                    return []
+
+                return _matching_lines(buffer=buffer, relative_path=relative_path, regex=regex)
+    except (OSError, ValueError):
+        # Deleted files, directories (submodules) and special files cannot be searched
+        return []
+
+
+def _matching_lines(buffer: mmap.mmap, relative_path: str, regex: re.Pattern[bytes]) -> list[str]:
+    entries: list[str] = []
+    line_number = 1
+    counted_until = 0
+    position = 0
+    while match := regex.search(buffer, position):
+        line_start = buffer.rfind(b"\n", 0, match.start()) + 1
+        line_end = buffer.find(b"\n", match.end())
+        if line_end == -1:
+            line_end = len(buffer)
+
+        line_number += buffer[counted_until:line_start].count(b"\n")
+        counted_until = line_start
+        content = buffer[line_start:line_end].decode("utf-8", errors="replace").rstrip("\r")
+        entries.append(f"{relative_path}:{line_number}:{content}")
+        # One entry per line, as git grep
+        position = line_end + 1
+    return entries
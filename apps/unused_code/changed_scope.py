@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import os
+import re
+
+from simple_logger.logger import get_logger
+
+from apps.unused_code.identifier_index import WORD_RE
+from apps.utils import GIT_RUNNER
+
+LOGGER = get_logger(name=__name__)
+
+TOP_LEVEL_DEF_RE = re.compile(r"^def\s+(\w+)")
+
+
+def merge_base(git_root: str, ref: str) -> str:
+    """Return the commit where the current branch forked from `ref`.
+
+    Commits that landed on `ref` after that point are not changes of the branch.
+    """
+    return GIT_RUNNER.output(args=["merge-base", ref, "HEAD"], cwd=git_root).strip()
+
+
+def changed_files(git_root: str, ref: str) -> list[str]:
+    """Return the paths, relative to `git_root`, of the files that differ between `ref` and the working tree.
+
+    Untracked (non-ignored) files are new files, so they are included, as they are in a full run.
+    """
+    diff_output = GIT_RUNNER.output(args=["diff", "--name-only", "-z", "--no-renames", ref, "--"], cwd=git_root)
+    # Relative to the repository root like the diff, whatever the working directory
+    untracked_output = GIT_RUNNER.output(
+        args=["ls-files", "-z", "--others", "--exclude-standard", "--full-name", "--", ":/"], cwd=git_root
+    )
+    return list(dict.fromkeys(path for path in (diff_output + "\0" + untracked_output).split("\0") if path))
+
+
+def removed_words(git_root: str, ref: str) -> set[str]:
+    """Return the identifiers found on lines that were removed or modified since `ref`."""
+    output = GIT_RUNNER.output(
+        args=["diff", "-U0", "--no-color", "--no-ext-diff", "--no-renames", ref, "--"], cwd=git_root
+    )
+    words: set[str] = set()
+    in_hunk = False
+    for line in output.splitlines():
+        if line.startswith("diff --git "):
+            in_hunk = False
+        elif line.startswith("@@"):
+            in_hunk = True
+        elif in_hunk and line.startswith("-"):
+            words.update(WORD_RE.findall(line[1:]))
+    return words
+
+
+def top_level_definitions(git_root: str) -> dict[str, set[str]]:
+    """Map every top-level function name to the Python files (relative to `git_root`) defining it."""
+    args = ["grep", "-n", "-I", "--untracked", f"--threads={GIT_RUNNER.grep_threads()}", "-E"]
+    # rc=1 means no matches
+    output = GIT_RUNNER.output(
+        args=[*args, "-e", r"^def[[:space:]]+[[:alnum:]_]+", "--", "*.py"], cwd=git_root, returncodes=(0, 1)
+    )
+
+    definitions: dict[str, set[str]] = {}
+    for entry in output.splitlines():
+        parts = entry.split(":", 2)
+        if len(parts) == 3 and (match := TOP_LEVEL_DEF_RE.match(parts[2])):
+            definitions.setdefault(match.group(1), set()).add(parts[0])
+    return definitions
+
+
+def changed_scope(git_root: str, ref: str) -> dict[str, set[str] | None]:
+    """Return the functions to analyze for a change since `ref`, keyed by absolute Python file path.
+
+    Changes are those since the merge base of `ref` and HEAD, like the changes of a pull request against
+    `ref`. A value of None means every function of the file: the file itself changed or is new. Otherwise
+    the value holds the functions, defined in an unchanged file, whose name appears on a line removed
+    since the merge base and that may therefore have lost their last reference.
+
+    Raises:
+        RuntimeError: If `ref` is unknown, or has no common history with HEAD.
+    """
+    base = merge_base(git_root=git_root, ref=ref)
+    scope: dict[str, set[str] | None] = {}
+    for path in changed_files(git_root=git_root, ref=base):
+        absolute_path = os.path.join(git_root, path)
+        if path.endswith(".py") and os.path.isfile(absolute_path):
+            scope[absolute_path] = None
+
+    words = removed_words(git_root=git_root, ref=base)
+    for name, paths in top_level_definitions(git_root=git_root).items():
+        if name not in words:
+            continue
+
+        for path in paths:
+            # Files that changed already have all of their functions in scope
+            if (names := scope.setdefault(os.path.join(git_root, path), set())) is not None:
+                names.add(name)
+
+    LOGGER.debug(f"Analyzing {len(scope)} files changed or affected since {ref}")
+    return scope
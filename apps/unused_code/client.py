@@ -0,0 +1,109 @@
+"""Thin `pyutils-unusedcode` entry point forwarding runs to a warm analysis server when one is running.
+
+Only the standard library is imported until the run falls back to in-process analysis, so forwarding a
+run does not pay for importing the analysis modules.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import socket
+import stat
+import sys
+import tempfile
+from typing import Any
+
+NO_SERVER_ENV = "PYUTILS_UNUSEDCODE_NO_SERVER"
+# Runs that cannot be answered with a single response
+IN_PROCESS_OPTIONS = ("--watch",)
+
+
+def runtime_dir() -> str:
+    """Return the per-user directory holding the server sockets and logs."""
+    return os.path.join(os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir(), f"pyutils-unusedcode-{os.getuid()}")
+
+
+def is_private(path: str) -> bool:
+    """Return whether `path` is owned by the current user, and not a symlink nor accessible to group or others.
+
+    The runtime directory may be under a shared temporary directory, where another user could create it
+    first and answer runs in our place.
+    """
+    try:
+        path_stat = os.lstat(path)
+    except OSError:
+        return False
+    return not stat.S_ISLNK(path_stat.st_mode) and path_stat.st_uid == os.getuid() and not path_stat.st_mode & 0o077
+
+
+def socket_path(root: str) -> str:
+    """Return the socket of the server of the repository at `root`.
+
+    Sockets live in a short runtime directory keyed by a hash of the root, as Unix socket paths are
+    limited to about a hundred bytes.
+    """
+    digest = hashlib.sha256(os.path.realpath(root).encode()).hexdigest()[:16]
+    return os.path.join(runtime_dir(), f"{digest}.sock")
+
+
+def find_git_root(path: str) -> str | None:
+    """Return the closest directory containing `.git`, starting from `path`, or None."""
+    path = os.path.realpath(path)
+    while True:
+        if os.path.exists(os.path.join(path, ".git")):
+            return path
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def send_request(root: str, request: dict[str, Any]) -> dict[str, Any] | None:
+    """Send `request` to the server of `root`; return its response, or None if no server of ours is running."""
+    path = socket_path(root=root)
+    if not (is_private(os.path.dirname(path)) and is_private(path)):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(path)
+            with sock.makefile("rwb") as stream:
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                response = stream.readline()
+    except OSError:
+        # No socket, a stale one, or a path too long for AF_UNIX
+        return None
+
+    return json.loads(response) if response else None
+
+
+def forward(argv: list[str], cwd: str) -> int | None:
+    """Run the analysis on the server of the repository of `cwd`; return its exit code, or None if not forwarded."""
+    if os.environ.get(NO_SERVER_ENV) or any(option in argv for option in IN_PROCESS_OPTIONS):
+        return None
+
+    if (root := find_git_root(path=cwd)) is None:
+        return None
+
+    if (response := send_request(root=root, request={"command": "run", "argv": argv, "cwd": cwd})) is None:
+        return None
+
+    sys.stderr.write(response["stderr"])
+    sys.stdout.write(response["stdout"])
+    return response["exit_code"]
+
+
+def main() -> None:
+    if (exit_code := forward(argv=sys.argv[1:], cwd=os.getcwd())) is not None:
+        sys.exit(exit_code)
+
+    from apps.unused_code.unused_code import get_unused_functions
+
+    get_unused_functions()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import os
+from collections.abc import Callable
+from functools import lru_cache
+from typing import Generic, TypeVar
+
+R = TypeVar("R")
+
+
+class FileCache(Generic[R]):
+    """Results of `compute` for files, computed once while a file is unchanged.
+
+    Results are kept in a bounded LRU cache keyed by (absolute path, mtime_ns, size): an edited file gets
+    a new key, so it is computed again.
+    """
+
+    def __init__(self, compute: Callable[[str], R], maxsize: int) -> None:
+        def compute_unchanged(file_path: str, mtime_ns: int, size: int) -> R:
+            # `mtime_ns` and `size` are only part of the cache key
+            return compute(file_path)
+
+        self._cached = lru_cache(maxsize=maxsize)(compute_unchanged)
+
+    def __call__(self, file_path: str) -> R:
+        """Return the result of `compute` for the absolute path of `file_path`.
+
+        Raises:
+            OSError: If the file cannot be stat'ed.
+        """
+        absolute_path = os.path.abspath(file_path)
+        stat = os.stat(absolute_path)
+        return self._cached(absolute_path, stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def hits(self) -> int:
+        return self._cached.cache_info().hits
+
+    @property
+    def misses(self) -> int:
+        return self._cached.cache_info().misses
+
+    def cache_clear(self) -> None:
+        self._cached.cache_clear()
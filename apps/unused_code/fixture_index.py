@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import ast
+import fnmatch
+import os
+from collections import defaultdict
+from collections.abc import Callable
+from typing import Any
+
+from simple_logger.logger import get_logger
+
+from apps.unused_code.search_scope import list_searchable_files
+
+LOGGER = get_logger(name=__name__)
+
+# pytest's default `python_files`, plus conftest.py
+FIXTURE_FILE_PATTERNS = ("test_*.py", "*_test.py", "conftest.py")
+
+
+def _is_pytest_mark_usefixtures_call(call_node: ast.Call) -> bool:
+    """Check if an AST Call node represents pytest.mark.usefixtures(...)."""
+    return (
+        isinstance(call_node.func, ast.Attribute)
+        and call_node.func.attr == "usefixtures"
+        and isinstance(call_node.func.value, ast.Attribute)
+        and call_node.func.value.attr == "mark"
+        and isinstance(call_node.func.value.value, ast.Name)
+        and call_node.func.value.value.id == "pytest"
+    )
+
+
+def is_pytest_fixture(func: ast.FunctionDef | ast.AsyncFunctionDef) -> bool:
+    """Return True if the function is decorated with @pytest.fixture.
+
+    Detects any pytest fixture regardless of parameters (scope, autouse, etc.).
+    """
+    decorators: list[Any] = func.decorator_list
+    for decorator in decorators or []:
+        # Case 1: @pytest.fixture(...)
+        if hasattr(decorator, "func"):
+            # e.g. @pytest.fixture(...)
+            if (
+                getattr(decorator.func, "attr", None)
+                and getattr(decorator.func, "value", None)
+                and decorator.func.attr == "fixture"
+                and getattr(decorator.func.value, "id", None) == "pytest"
+            ):
+                return True
+            # e.g. from pytest import fixture; @fixture(...)
+            if isinstance(decorator.func, ast.Name) and decorator.func.id == "fixture":
+                return True
+        # Case 2: @pytest.fixture (no parentheses)
+        else:
+            # e.g. @pytest.fixture
+            if (
+                getattr(decorator, "attr", None) == "fixture"
+                and getattr(decorator, "value", None)
+                and getattr(decorator.value, "id", None) == "pytest"
+            ):
+                return True
+            # e.g. from pytest import fixture; @fixture
+            if isinstance(decorator, ast.Name) and decorator.id == "fixture":
+                return True
+    return False
+
+
+def _is_fixture_file(relative_path: str) -> bool:
+    return any(fnmatch.fnmatch(os.path.basename(relative_path), pattern) for pattern in FIXTURE_FILE_PATTERNS)
+
+
+def _string_arguments(call_node: ast.Call, keyword_name: str | None = None) -> list[str]:
+    """Return the string constant positional arguments of a call, and the `keyword_name` one if given."""
+    values = [arg.value for arg in call_node.args if isinstance(arg, ast.Constant) and isinstance(arg.value, str)]
+    for keyword in call_node.keywords:
+        if (
+            keyword_name
+            and keyword.arg == keyword_name
+            and isinstance(keyword.value, ast.Constant)
+            and isinstance(keyword.value.value, str)
+        ):
+            values.append(keyword.value.value)
+    return values
+
+
+class FixtureUsageIndex:
+    """Every way a pytest fixture is requested in the Python files of a repository.
+
+    One AST pass over the files collects, per fixture name, the files where it is:
+
+    - a parameter of a function of a test or conftest file, or of a fixture defined anywhere (fixtures of
+      plugin modules loaded with ``pytest_plugins`` request other fixtures too)
+    - a string argument of ``pytest.mark.usefixtures(...)``, wherever the mark is created
+    - an argument of ``request.getfixturevalue(...)`` (positional or ``argname=``)
+    - an argument of ``item.fixturenames.insert(...)``
+
+    The last three forms are collected from every file, as marks and fixture lookups are also built in
+    helper modules. Checking whether a fixture is requested is then a set lookup.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = root
+        self.parameters: dict[str, set[str]] = defaultdict(set)
+        self.usefixtures: dict[str, set[str]] = defaultdict(set)
+        self.getfixturevalues: dict[str, set[str]] = defaultdict(set)
+        self.fixturenames_inserts: dict[str, set[str]] = defaultdict(set)
+
+    @classmethod
+    def build(cls, root: str, parse_file: Callable[[str], ast.AST]) -> FixtureUsageIndex:
+        index = cls(root=root)
+        for relative_path in list_searchable_files(root=root):
+            if relative_path.endswith(".py"):
+                index.update_file(relative_path=relative_path, parse_file=parse_file)
+
+        LOGGER.debug(f"Indexed fixture usages of {len(index.parameters)} parameter names under {root}")
+        return index
+
+    def update_file(self, relative_path: str, parse_file: Callable[[str], ast.AST]) -> None:
+        """Re-index the fixture usages of a modified, added or deleted file."""
+        for usages in (self.parameters, self.usefixtures, self.getfixturevalues, self.fixturenames_inserts):
+            for name in [name for name, paths in usages.items() if relative_path in paths]:
+                usages[name].discard(relative_path)
+                if not usages[name]:
+                    del usages[name]
+
+        fixture_file = _is_fixture_file(relative_path=relative_path)
+        path = os.path.join(self.root, relative_path)
+        try:
+            # Outside of test and conftest files, fixtures and every call form mention the word
+            if not fixture_file:
+                with open(path, "rb") as source:
+                    if b"fixture" not in source.read():
+                        return
+            tree = parse_file(path)
+        except (OSError, SyntaxError, ValueError):
+            # Deleted or unparsable files cannot request fixtures
+            return
+        self.add_tree(relative_path=relative_path, tree=tree, fixture_file=fixture_file)
+
+    def add_tree(self, relative_path: str, tree: ast.AST, fixture_file: bool = True) -> None:
+        """Index the fixture usages of the tree of a file; only the parameters of fixtures unless `fixture_file`."""
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                if fixture_file or is_pytest_fixture(func=node):
+                    for arg in (*node.args.posonlyargs, *node.args.args, *node.args.kwonlyargs):
+                        self.parameters[arg.arg].add(relative_path)
+
+            elif isinstance(node, ast.Call):
+                if _is_pytest_mark_usefixtures_call(call_node=node):
+                    names, target = _string_arguments(call_node=node), self.usefixtures
+                elif isinstance(node.func, ast.Attribute) and node.func.attr == "getfixturevalue":
+                    names, target = _string_arguments(call_node=node, keyword_name="argname"), self.getfixturevalues
+                elif (
+                    isinstance(node.func, ast.Attribute)
+                    and node.func.attr == "insert"
+                    and isinstance(node.func.value, ast.Attribute)
+                    and node.func.value.attr == "fixturenames"
+                ):
+                    names, target = _string_arguments(call_node=node), self.fixturenames_inserts
+                else:
+                    continue
+
+                for name in names:
+                    target[name].add(relative_path)
+
+    def find(self, fixture_name: str) -> str | None:
+        """Return the absolute path of a file requesting `fixture_name`, or None if none does."""
+        for usages in (self.parameters, self.usefixtures, self.getfixturevalues, self.fixturenames_inserts):
+            if paths := usages.get(fixture_name):
+                return os.path.join(self.root, min(paths))
+        return None
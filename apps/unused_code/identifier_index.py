@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import os
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+
+from simple_logger.logger import get_logger
+
+from apps.unused_code.search_scope import DEFAULT_SEARCH_SCOPE, SearchScope, list_searchable_files
+
+LOGGER = get_logger(name=__name__)
+
+# git grep treats a file as binary (and skips it with -I) when a NUL byte appears in the first 8000 bytes.
+BINARY_PROBE_SIZE = 8000
+WORD_RE = re.compile(r"\w+")
+
+
+def words_in_files(paths: Iterable[str]) -> set[str]:
+    """Return the words of the files at `paths`, the names whose usages a change of these files may add.
+
+    Unreadable files, typically deleted ones, are skipped: they can only remove usages, which callers
+    detect through the evidence files of each verdict.
+    """
+    words: set[str] = set()
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8", errors="replace") as fd:
+                words.update(WORD_RE.findall(fd.read()))
+        except OSError:
+            continue
+    return words
+
+
+class IdentifierIndex:
+    """In-memory index of identifier occurrences for every file git grep would search.
+
+    The index is built once by splitting each tracked and untracked (non-ignored) text file of a git
+    repository into words, and maps every identifier to the ``(file, line)`` pairs of the lines containing
+    it. Lookups return entries in the same ``path:line:content`` shape as ``git grep -n`` so callers can
+    apply the exact same filters regardless of the engine that produced them.
+    """
+
+    def __init__(self, root: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        self.root = root
+        self.search_scope = search_scope
+        self.files: list[str] = []
+        self.lines: list[list[str]] = []
+        self.occurrences: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self._file_indexes: dict[str, int] = {}
+
+    @classmethod
+    def build(cls, root: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> IdentifierIndex:
+        index = cls(root=root, search_scope=search_scope)
+        for relative_path in list_searchable_files(root=root, search_scope=search_scope):
+            index.add_file(relative_path=relative_path)
+
+        LOGGER.debug(f"Indexed {len(index.occurrences)} identifiers from {len(index.files)} files under {root}")
+        return index
+
+    def add_file(self, relative_path: str) -> None:
+        try:
+            with open(os.path.join(self.root, relative_path), "rb") as fd:
+                data = fd.read()
+        except OSError:
+            # Deleted tracked files and submodule directories are listed by git but cannot be searched
+            return
+
+        if b"\0" in data[:BINARY_PROBE_SIZE]:
+            return
+
+        lines = [line.rstrip("\r") for line in data.decode("utf-8", errors="replace").split("\n")]
+        file_index = len(self.files)
+        self.files.append(relative_path)
+        self.lines.append(lines)
+        self._file_indexes[relative_path] = file_index
+        for line_number, line in enumerate(lines, start=1):
+            for word in dict.fromkeys(WORD_RE.findall(line)):
+                self.occurrences[word].append((file_index, line_number))
+
+    def remove_file(self, relative_path: str) -> None:
+        """Drop the occurrences of a file; its slot is kept empty so other file indexes stay valid."""
+        if (file_index := self._file_indexes.pop(relative_path, None)) is None:
+            return
+
+        for word in {word for line in self.lines[file_index] for word in WORD_RE.findall(line)}:
+            if remaining := [occurrence for occurrence in self.occurrences[word] if occurrence[0] != file_index]:
+                self.occurrences[word] = remaining
+            else:
+                del self.occurrences[word]
+        self.lines[file_index] = []
+
+    def update_file(self, relative_path: str) -> None:
+        """Re-index a modified, added or deleted file; files out of the search scope are only removed."""
+        self.remove_file(relative_path=relative_path)
+        if self.search_scope.contains(root=self.root, relative_path=relative_path):
+            self.add_file(relative_path=relative_path)
+
+    def grep(self, name: str) -> list[str]:
+        """Return ``path:line:content`` entries for lines containing ``name`` as a whole word.
+
+        Args:
+            name: The identifier to look up.
+
+        Returns:
+            list[str]: One entry per matching line, in file and line order.
+        """
+        return [
+            f"{self.files[file_index]}:{line_number}:{self.lines[file_index][line_number - 1]}"
+            for file_index, line_number in self.occurrences.get(name, [])
+        ]
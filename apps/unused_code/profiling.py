@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import contextlib
+import functools
+import math
+import os
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable, Iterator
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+DISCOVERY_PHASE = "discovery"
+QUEUE_WAIT_PHASE = "queue wait"
+PARSE_PHASE = "parse"
+USAGE_SEARCH_PHASE = "usage search"
+GIT_GREP_PHASE = "git grep"
+DOCUMENTATION_FILTER_PHASE = "documentation filter"
+FIXTURE_CHECK_PHASE = "fixture check"
+PHASES = (
+    DISCOVERY_PHASE,
+    QUEUE_WAIT_PHASE,
+    PARSE_PHASE,
+    USAGE_SEARCH_PHASE,
+    GIT_GREP_PHASE,
+    DOCUMENTATION_FILTER_PHASE,
+    FIXTURE_CHECK_PHASE,
+)
+
+_NULL_CONTEXT = contextlib.nullcontext()
+
+
+def _percentile(sorted_samples: list[float], percent: float) -> float:
+    """Nearest-rank percentile of already sorted samples."""
+    return sorted_samples[max(0, math.ceil(percent / 100 * len(sorted_samples)) - 1)]
+
+
+def split_by_usage_lines(seconds: float, usage_lines: dict[str, int]) -> dict[str, float]:
+    """Split the `seconds` of a search for several names between them, in proportion to their usage lines.
+
+    Names are split evenly when none has a usage line.
+    """
+    total = sum(usage_lines.values())
+    if not total:
+        return {name: seconds / len(usage_lines) for name in usage_lines}
+    return {name: seconds * lines / total for name, lines in usage_lines.items()}
+
+
+class Profiler:
+    """Collect per-phase timings of a pyutils-unusedcode run.
+
+    All recording methods return immediately while the profiler is disabled, so the instrumentation
+    can stay in place at a negligible cost. Phases are timed from several threads at once, so their
+    totals are sums of wall times across threads and may exceed the wall time of the run.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._samples: dict[str, list[float]] = {}
+        self._files: dict[str, float] = {}
+        self._functions: list[tuple[float, str, str, int]] = []
+
+    def reset(self, enabled: bool) -> None:
+        with self._lock:
+            self.enabled = enabled
+            self._started = time.perf_counter()
+            self._samples = {}
+            self._files = {}
+            self._functions = []
+
+    def add_sample(self, phase: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._samples.setdefault(phase, []).append(seconds)
+
+    @contextlib.contextmanager
+    def _timer(self, phase: str) -> Generator[None, None, None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_sample(phase=phase, seconds=time.perf_counter() - started)
+
+    def phase(self, phase: str) -> contextlib.AbstractContextManager[None]:
+        """Time the enclosed block as one sample of `phase`."""
+        return self._timer(phase=phase) if self.enabled else _NULL_CONTEXT
+
+    def timed(self, phase: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+        """Decorate a function so that each of its calls is a sample of `phase`."""
+
+        def decorator(func: Callable[..., T]) -> Callable[..., T]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> T:
+                with self.phase(phase=phase):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def timed_iter(self, phase: str, iterable: Iterable[T]) -> Iterator[T]:
+        """Yield from `iterable`, timing each step as one sample of `phase`."""
+        iterator = iter(iterable)
+        while True:
+            with self.phase(phase=phase):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def task(self, func: Callable[..., T], label: str) -> Callable[..., T]:
+        """Wrap `func` before submitting it to an executor.
+
+        The time between the wrapping and the start of the call is a sample of the queue wait phase,
+        which grows when the workers are starved; the duration of the call is recorded under `label`.
+        """
+        if not self.enabled:
+            return func
+
+        submitted = time.perf_counter()
+
+        def run(*args: Any, **kwargs: Any) -> T:
+            started = time.perf_counter()
+            self.add_sample(phase=QUEUE_WAIT_PHASE, seconds=started - submitted)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self._lock:
+                    self._files[label] = elapsed
+
+        return run
+
+    def record_function(self, py_file: str, name: str, seconds: float, usage_lines: int) -> None:
+        """Record the time spent deciding whether `name` is used, given its number of usage lines.
+
+        `seconds` includes the share of `name` in the usage search of its file (see `split_by_usage_lines`).
+        """
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self._functions.append((seconds, py_file, name, usage_lines))
+
+    def report(self, top: int = 10) -> str:
+        """Return a human readable report of the phases, and of the `top` slowest files and functions."""
+        with self._lock:
+            wall_time = time.perf_counter() - self._started
+            samples = {phase: sorted(values) for phase, values in self._samples.items()}
+            files = sorted(self._files.items(), key=lambda item: item[1], reverse=True)[:top]
+            functions = sorted(self._functions, reverse=True)[:top]
+
+        lines = [
+            f"Profile (wall time {wall_time:.3f}s)",
+            f"{'phase':<22} {'count':>7} {'total (s)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}",
+        ]
+        for phase in [*PHASES, *sorted(samples.keys() - set(PHASES))]:
+            values = samples.get(phase, [])
+            if not values:
+                lines.append(f"{phase:<22} {0:>7} {0:>10.3f} {'-':>9} {'-':>9} {'-':>9}")
+                continue
+
+            lines.append(
+                f"{phase:<22} {len(values):>7} {sum(values):>10.3f} {_percentile(values, 50) * 1000:>9.1f} "
+                f"{_percentile(values, 95) * 1000:>9.1f} {values[-1] * 1000:>9.1f}"
+            )
+
+        lines.append(f"Slowest {len(files)} files:")
+        lines.extend(f"  {seconds:>8.3f}s  {os.path.relpath(py_file)}" for py_file, seconds in files)
+        lines.append(f"Slowest {len(functions)} functions:")
+        lines.extend(
+            f"  {seconds:>8.3f}s  {os.path.relpath(py_file)}:{name} ({usage_lines} usage lines)"
+            for seconds, py_file, name, usage_lines in functions
+        )
+        return "\n".join(lines)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class FunctionResult:
+    """Verdict for one top-level function of an analyzed file.
+
+    `evidence` holds the absolute paths of the files that decided the verdict: the file with the first
+    valid usage for a used function, or every file mentioning the name for an unused one.
+
+    `references` holds the (absolute path, line) of valid usages: only the first one, unless every
+    usage was collected for the reference graph. `unreachable` marks a function that has usages, but
+    only from functions that are unused themselves.
+    """
+
+    py_file: str
+    name: str
+    lineno: int
+    col_offset: int
+    used: bool
+    evidence: set[str] = field(default_factory=set)
+    end_lineno: int | None = None
+    references: list[tuple[str, int]] = field(default_factory=list)
+    unreachable: bool = False
+
+    @property
+    def description(self) -> str:
+        return "is only used by unused code." if self.unreachable else "is not used anywhere in the code."
+
+    @property
+    def message(self) -> str:
+        return (
+            f"{os.path.relpath(self.py_file)}:{self.name}:{self.lineno}:{self.col_offset} "
+            f"{self.description.capitalize()}"
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class FunctionRecord:
+    """Picklable summary of a top-level function, as needed to resolve its usages.
+
+    Records are extracted from the AST (possibly in a worker process) so that the usage resolution
+    stage never needs the tree itself. They are slotted and immutable, as they are shared through a
+    cache and outlive the tree.
+    """
+
+    name: str
+    lineno: int
+    end_lineno: int
+    col_offset: int
+    is_fixture: bool
+    is_autouse: bool
+    has_skip_marker: bool
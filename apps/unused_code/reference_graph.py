@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import bisect
+import os
+from collections import deque
+
+from apps.unused_code.records import FunctionResult
+
+
+class ReferenceGraph:
+    """Function-level reference graph of the analyzed top-level functions.
+
+    Every valid usage of a function is an edge from the analyzed function whose body contains the usage
+    line. Usages anywhere else (module level code, tests, classes, excluded functions or files, non-Python
+    files such as entry point declarations) cannot be dead code, so they make the function a root.
+    Functions used without any reference line (fixtures requested by tests) are roots as well.
+    """
+
+    def __init__(self, results: list[FunctionResult]) -> None:
+        self.results = results
+        self._spans: dict[str, tuple[list[int], list[FunctionResult]]] = {}
+        for result in sorted(results, key=lambda result: result.lineno):
+            starts, span_results = self._spans.setdefault(os.path.realpath(result.py_file), ([], []))
+            starts.append(result.lineno)
+            span_results.append(result)
+
+    def enclosing_function(self, path: str, line: int) -> FunctionResult | None:
+        """Return the analyzed top-level function whose definition contains `line` of `path`, if any."""
+        if (spans := self._spans.get(os.path.realpath(path))) is None:
+            return None
+
+        starts, span_results = spans
+        if (position := bisect.bisect_right(starts, line) - 1) < 0:
+            return None
+
+        result = span_results[position]
+        return result if line <= (result.end_lineno or result.lineno) else None
+
+    def mark_unreachable(self) -> list[FunctionResult]:
+        """Mark used functions that are not reachable from any root as unused, and return them.
+
+        Edges are walked once from the roots, so this is linear in the number of references.
+        """
+        callees: dict[int, list[FunctionResult]] = {}
+        reachable: set[int] = set()
+        roots: deque[FunctionResult] = deque()
+        for result in self.results:
+            if not result.used:
+                continue
+
+            if not result.references:
+                roots.append(result)
+                continue
+
+            for path, line in result.references:
+                if (caller := self.enclosing_function(path=path, line=line)) is None:
+                    roots.append(result)
+                    break
+                callees.setdefault(id(caller), []).append(result)
+
+        while roots:
+            result = roots.popleft()
+            if id(result) in reachable:
+                continue
+
+            reachable.add(id(result))
+            roots.extend(callees.get(id(result), []))
+
+        unreachable = [result for result in self.results if result.used and id(result) not in reachable]
+        for result in unreachable:
+            result.used = False
+            result.unreachable = True
+        return unreachable
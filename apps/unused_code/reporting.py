@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+import click
+
+from apps.unused_code.records import FunctionResult
+
+TEXT_FORMAT = "text"
+JSONL_FORMAT = "jsonl"
+SARIF_FORMAT = "sarif"
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_RULE_ID = "unused-function"
+
+
+def _sort_key(result: FunctionResult) -> tuple[str, int]:
+    return os.path.relpath(result.py_file), result.lineno
+
+
+def _finding(result: FunctionResult) -> dict[str, Any]:
+    return {
+        "path": os.path.relpath(result.py_file),
+        "function": result.name,
+        "line": result.lineno,
+        "column": result.col_offset,
+        "message": f"{result.name} {result.description}",
+    }
+
+
+def _sarif_result(result: FunctionResult) -> dict[str, Any]:
+    finding = _finding(result=result)
+    return {
+        "ruleId": SARIF_RULE_ID,
+        "level": "warning",
+        "message": {"text": finding["message"]},
+        "locations": [
+            {
+                "physicalLocation": {
+                    "artifactLocation": {"uri": finding["path"].replace(os.sep, "/")},
+                    # SARIF columns are 1-based
+                    "region": {"startLine": result.lineno, "startColumn": result.col_offset + 1},
+                }
+            }
+        ],
+    }
+
+
+def format_change(result: FunctionResult, added: bool, output_format: str = TEXT_FORMAT) -> str:
+    """Format a function that became unused (`added`) or is no longer unused, in watch mode."""
+    if output_format == JSONL_FORMAT:
+        return json.dumps({"change": "added" if added else "removed", **_finding(result=result)})
+    return f"{'+' if added else '-'} {result.message}"
+
+
+class FindingsReporter:
+    """Print the unused functions of a run in the requested format.
+
+    By default findings are printed sorted once the run is complete, so the output is deterministic.
+    With `stream`, text and JSON Lines findings are printed as soon as the results of each file are
+    added. SARIF is a single document, so it is always printed at the end.
+    """
+
+    def __init__(self, output_format: str = TEXT_FORMAT, stream: bool = False) -> None:
+        self.output_format = output_format
+        self.stream = stream and output_format != SARIF_FORMAT
+        self.found = False
+        self._unused: list[FunctionResult] = []
+
+    def add(self, results: list[FunctionResult]) -> None:
+        """Report the unused functions among the results of one file."""
+        unused = [result for result in results if not result.used]
+        if not unused:
+            return
+
+        self.found = True
+        if self.stream:
+            self._print(unused=unused)
+        else:
+            self._unused.extend(unused)
+
+    def finish(self) -> None:
+        """Print the findings held back until the end of the run."""
+        if self.output_format == SARIF_FORMAT:
+            click.echo(json.dumps(self._sarif(), indent=2))
+        elif self._unused:
+            self._print(unused=sorted(self._unused, key=_sort_key))
+
+    def _print(self, unused: list[FunctionResult]) -> None:
+        if self.output_format == JSONL_FORMAT:
+            click.echo("\n".join(json.dumps(_finding(result=result)) for result in unused))
+        else:
+            click.echo("\n".join(result.message for result in unused))
+
+    def _sarif(self) -> dict[str, Any]:
+        return {
+            "$schema": SARIF_SCHEMA,
+            "version": "2.1.0",
+            "runs": [
+                {
+                    "tool": {
+                        "driver": {
+                            "name": "pyutils-unusedcode",
+                            "informationUri": "https://github.com/RedHatQE/python-utility-scripts",
+                            "rules": [
+                                {
+                                    "id": SARIF_RULE_ID,
+                                    "shortDescription": {"text": "Function is not used anywhere in the code."},
+                                }
+                            ],
+                        }
+                    },
+                    "results": [_sarif_result(result=result) for result in sorted(self._unused, key=_sort_key)],
+                }
+            ],
+        }
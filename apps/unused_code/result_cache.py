@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any
+
+from simple_logger.logger import get_logger
+
+from apps.unused_code.identifier_index import words_in_files
+from apps.unused_code.records import FunctionResult
+from apps.utils import GIT_RUNNER
+
+LOGGER = get_logger(name=__name__)
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = "results.json"
+
+
+def default_cache_dir(git_root: str) -> str:
+    """Return ``<git dir>/pyutils-unusedcode``, resolved through git so worktrees are supported."""
+    return os.path.join(
+        git_root, GIT_RUNNER.output(args=["rev-parse", "--git-path", "pyutils-unusedcode"], cwd=git_root).strip()
+    )
+
+
+def blob_shas(git_root: str) -> dict[str, str]:
+    """Return the git blob SHA of every tracked and untracked (non-ignored) file, as in the working tree.
+
+    Tracked, unmodified files take their SHA from the index; modified and untracked files are hashed
+    with a single ``git hash-object`` call. Deleted files are omitted.
+    """
+    shas: dict[str, str] = {}
+    for entry in GIT_RUNNER.output(args=["ls-files", "-s", "-z"], cwd=git_root).split("\0"):
+        if entry:
+            meta, path = entry.split("\t", 1)
+            shas[path] = meta.split()[1]
+
+    modified = GIT_RUNNER.output(args=["ls-files", "-m", "-z"], cwd=git_root).split("\0")
+    untracked = GIT_RUNNER.output(args=["ls-files", "-o", "--exclude-standard", "-z"], cwd=git_root).split("\0")
+    to_hash: list[str] = []
+    for path in dict.fromkeys(modified + untracked):
+        if not path:
+            continue
+        if os.path.isfile(os.path.join(git_root, path)):
+            to_hash.append(path)
+        else:
+            shas.pop(path, None)
+
+    if to_hash:
+        hashed = GIT_RUNNER.output(
+            args=["hash-object", "--stdin-paths"], cwd=git_root, input_text="\n".join(to_hash) + "\n"
+        )
+        shas.update(zip(to_hash, hashed.split()))
+    return shas
+
+
+class ResultCache:
+    """Persistent per-function verdicts, invalidated with the blob SHAs of the files they depend on.
+
+    Every function verdict is stored with its evidence files (see `FunctionResult.evidence`), and the
+    cache stores the blob SHA of every searchable file as of the run that wrote it. When loaded, a
+    verdict is kept only if its defining file and evidence files are unchanged and its name does not
+    appear in any changed file; everything else has to be re-analyzed.
+    """
+
+    def __init__(self, git_root: str, cache_dir: str, settings: dict[str, Any]) -> None:
+        self.git_root = git_root
+        self.cache_path = os.path.join(cache_dir, CACHE_FILE_NAME)
+        self.settings = settings
+        self.shas: dict[str, str] = {}
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.stale_functions: dict[str, set[str]] = {}
+
+    @classmethod
+    def load(cls, git_root: str, cache_dir: str, settings: dict[str, Any]) -> ResultCache:
+        cache = cls(git_root=git_root, cache_dir=cache_dir, settings=settings)
+        cache.shas = blob_shas(git_root=git_root)
+
+        try:
+            with open(cache.cache_path) as fd:
+                data = json.load(fd)
+        except (OSError, ValueError):
+            LOGGER.debug(f"No usable result cache at {cache.cache_path}")
+            return cache
+
+        if data.get("version") != CACHE_VERSION or data.get("settings") != settings:
+            LOGGER.debug("Result cache was written with different settings, ignoring it")
+            return cache
+
+        previous_shas: dict[str, str] = data.get("shas", {})
+        changed = {
+            path for path in previous_shas.keys() | cache.shas.keys() if previous_shas.get(path) != cache.shas.get(path)
+        }
+        changed_words = words_in_files(paths=[os.path.join(git_root, path) for path in changed])
+
+        for path, entry in data.get("entries", {}).items():
+            if path in changed:
+                continue
+
+            valid = [
+                function
+                for function in entry["functions"]
+                if function["name"] not in changed_words and changed.isdisjoint(function["evidence"])
+            ]
+            cache.entries[path] = {"sha": entry["sha"], "functions": valid}
+            if stale := {function["name"] for function in entry["functions"]} - {
+                function["name"] for function in valid
+            }:
+                cache.stale_functions[path] = stale
+
+        LOGGER.debug(f"Result cache: {len(changed)} changed files, {len(cache.entries)} reusable file entries")
+        return cache
+
+    def relative_path(self, path: str) -> str | None:
+        """Return `path` relative to the git root if it is a file tracked by the cache, else None."""
+        relative = os.path.relpath(os.path.abspath(path), self.git_root)
+        return relative if relative in self.shas else None
+
+    def lookup(self, py_file: str) -> tuple[list[FunctionResult], set[str] | None]:
+        """Return the reusable results of `py_file`, and the functions that must be re-analyzed.
+
+        The second item is None when the whole file must be analyzed.
+        """
+        relative = self.relative_path(path=py_file)
+        if relative is None or (entry := self.entries.get(relative)) is None:
+            return [], None
+
+        results = [
+            FunctionResult(
+                py_file=py_file,
+                name=function["name"],
+                lineno=function["lineno"],
+                col_offset=function["col_offset"],
+                used=function["used"],
+                evidence={os.path.join(self.git_root, path) for path in function["evidence"]},
+            )
+            for function in entry["functions"]
+        ]
+        return results, self.stale_functions.get(relative, set())
+
+    def store(self, py_file: str, results: list[FunctionResult]) -> None:
+        """Record the complete results of `py_file` for the next run."""
+        if not (relative := self.relative_path(path=py_file)):
+            return
+
+        functions: list[dict[str, Any]] = []
+        for result in results:
+            evidence = [os.path.relpath(path, self.git_root) for path in result.evidence]
+            if any(path not in self.shas for path in evidence):
+                # Evidence outside the tracked tree cannot be invalidated, so the file is not cached
+                self.entries.pop(relative, None)
+                return
+
+            functions.append({
+                "name": result.name,
+                "lineno": result.lineno,
+                "col_offset": result.col_offset,
+                "used": result.used,
+                "evidence": sorted(evidence),
+            })
+
+        self.entries[relative] = {"sha": self.shas[relative], "functions": functions}
+        self.stale_functions.pop(relative, None)
+
+    def save(self) -> None:
+        # Entries with stale functions that were not re-analyzed in this run cannot be trusted later
+        entries = {path: entry for path, entry in self.entries.items() if path not in self.stale_functions}
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w") as fd:
+            json.dump({"version": CACHE_VERSION, "settings": self.settings, "shas": self.shas, "entries": entries}, fd)
+        os.replace(tmp_path, self.cache_path)
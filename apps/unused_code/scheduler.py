@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import os
+import threading
+from collections.abc import Callable, Generator, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, TypeVar
+
+from apps.utils import available_cpus
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class _Share:
+    """Items of a task offered to the idle workers, run by whichever thread claims them first."""
+
+    def __init__(self, items: list[Any]) -> None:
+        self.items = items
+        self.future: Future = Future()
+        self._claimed = False
+        self._lock = threading.Lock()
+
+    def claim(self) -> bool:
+        """Return True if the caller is the first to claim the share, and must run it."""
+        with self._lock:
+            claimed, self._claimed = self._claimed, True
+            return not claimed
+
+
+class TaskPool(ThreadPoolExecutor):
+    """Thread pool whose tasks share their work with the idle workers.
+
+    A task running in the pool splits its items with `share`: one share is offered to each idle worker,
+    and the shares that no worker has started once the task is done with its own items are run by the
+    task itself, in a single call. A busy pool thus runs each task in one piece, while the workers left
+    idle at the end of a run, or by a single task, help with the largest tasks. A task only waits for
+    shares already running in other workers, so sharing cannot deadlock the pool.
+
+    The pool counts as idle workers at most one per available CPU, as shares are meant for work running
+    outside of the GIL (git processes).
+    """
+
+    def __init__(self, max_workers: int | None = None) -> None:
+        super().__init__(max_workers=max_workers)
+        self._pending = 0
+        self._pending_lock = threading.Lock()
+
+    def submit(self, fn: Callable[..., T], /, *args: Any, **kwargs: Any) -> Future:
+        with self._pending_lock:
+            self._pending += 1
+
+        def run() -> T:
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._pending_lock:
+                    self._pending -= 1
+
+        try:
+            return super().submit(run)
+        except RuntimeError:
+            # Submitted after a shutdown
+            with self._pending_lock:
+                self._pending -= 1
+            raise
+
+    @property
+    def max_workers(self) -> int:
+        return self._max_workers
+
+    def idle_workers(self) -> int:
+        """Return the number of workers with nothing to run, within the available CPUs."""
+        with self._pending_lock:
+            return max(0, min(self._max_workers, available_cpus()) - self._pending)
+
+    def share(self, items: list[T], run: Callable[[list[T]], R]) -> list[R]:
+        """Return the results of `run` over `items` split between the calling task and the idle workers.
+
+        Each call of `run` gets a non-empty slice of `items`, in order; the results are not ordered.
+        """
+        shares = min(self.idle_workers(), len(items) - 1)
+        if shares <= 0:
+            return [run(items)]
+
+        size = math.ceil(len(items) / (shares + 1))
+        offered = [_Share(items=items[start : start + size]) for start in range(size, len(items), size)]
+        for offer in offered:
+            self.submit(self._run_share, offer, run)
+
+        try:
+            results = [run(items[:size])]
+        finally:
+            # Take back the shares no worker has started: run below, or dropped if the task failed
+            taken_back = [offer for offer in offered if offer.claim()]
+
+        if taken_back:
+            results.append(run([item for offer in taken_back for item in offer.items]))
+        results.extend(offer.future.result() for offer in offered if offer not in taken_back)
+        return results
+
+    @staticmethod
+    def _run_share(offer: _Share, run: Callable[[list[T]], R]) -> None:
+        if not offer.claim():
+            return
+
+        try:
+            offer.future.set_result(run(offer.items))
+        except Exception as exc:  # noqa: BLE001
+            offer.future.set_exception(exc)
+
+
+def bounded_as_completed(
+    items: Iterable[T], submit: Callable[[T], Future], window: int
+) -> Generator[tuple[T, Future], None, None]:
+    """Submit a future per item with `submit`, and yield each item with its future as they complete.
+
+    At most `window` futures are in flight: the next items are only pulled from `items` as futures
+    complete, so a lazy iterable is consumed at the pace of the workers, and the memory held does not
+    grow with the number of items.
+    """
+    iterator = iter(items)
+    pending: dict[Future, T] = {}
+    while True:
+        for item in itertools.islice(iterator, window - len(pending)):
+            pending[submit(item)] = item
+        if not pending:
+            return
+
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            yield pending.pop(future), future
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def largest_first(paths: Iterable[str], lookahead: int) -> Iterator[str]:
+    """Yield `paths` by decreasing file size, within a window of the next `lookahead` paths.
+
+    The size of a file is a proxy of its number of functions: the slowest files then start early instead
+    of extending the end of the run. Paths are pulled lazily, so the first ones are yielded once
+    `lookahead` paths are known rather than after all of them.
+    """
+    heap: list[tuple[int, int, str]] = []
+    for position, path in enumerate(paths):
+        entry = (-_size(path), position, path)
+        if len(heap) < lookahead:
+            heapq.heappush(heap, entry)
+        else:
+            yield heapq.heappushpop(heap, entry)[2]
+
+    while heap:
+        yield heapq.heappop(heap)[2]
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from apps.utils import GIT_RUNNER, PYTHON_FILES_EXCLUDE_DIRS
+
+SEARCH_SCOPE_CONFIG_KEY = "search_scope"
+
+
+@dataclass(frozen=True)
+class SearchScope:
+    """The files usage searches look into, set with the `search_scope` config key.
+
+    - `include`: pathspecs of the searched files; every file if empty.
+    - `exclude`: pathspecs of files never searched. The directories skipped by `all_python_files`
+      (``.tox``, ``venv``...) are always excluded, so that vendored code is not taken for usages.
+    - `max_file_size`: files larger than this many bytes are not searched; no limit if None.
+    - `untracked`: whether untracked (non-ignored) files are searched.
+
+    Pathspecs are relative to the repository root and matched like git pathspecs without magic: ``*``
+    also matches ``/``, and a directory matches every file under it.
+    """
+
+    include: tuple[str, ...] = ()
+    exclude: tuple[str, ...] = ()
+    max_file_size: int | None = None
+    untracked: bool = True
+
+    @classmethod
+    def from_config(cls, config: dict[str, Any]) -> SearchScope:
+        """Build the scope of the `search_scope` mapping of the `pyutils-unusedcode` config section.
+
+        Raises:
+            ValueError: If the mapping has unknown keys or invalid values.
+            TypeError: If `untracked` is not a boolean.
+        """
+        if unknown := set(config) - {"include", "exclude", "max_file_size", "untracked"}:
+            raise ValueError(f"Unknown {SEARCH_SCOPE_CONFIG_KEY} keys: {', '.join(sorted(unknown))}")
+
+        pathspecs: dict[str, tuple[str, ...]] = {}
+        for key in ("include", "exclude"):
+            value = config.get(key) or []
+            if not isinstance(value, list) or not all(isinstance(item, str) and item for item in value):
+                raise ValueError(f"{SEARCH_SCOPE_CONFIG_KEY}.{key} must be a list of pathspecs")
+            pathspecs[key] = tuple(value)
+
+        max_file_size = config.get("max_file_size")
+        if max_file_size is not None and (not isinstance(max_file_size, int) or max_file_size < 0):
+            raise ValueError(f"{SEARCH_SCOPE_CONFIG_KEY}.max_file_size must be a number of bytes")
+
+        untracked = config.get("untracked", True)
+        if not isinstance(untracked, bool):
+            raise TypeError(f"{SEARCH_SCOPE_CONFIG_KEY}.untracked must be a boolean")
+
+        return cls(
+            include=pathspecs["include"], exclude=pathspecs["exclude"], max_file_size=max_file_size, untracked=untracked
+        )
+
+    def pathspecs(self) -> list[str]:
+        """Return the git pathspecs selecting the files of the scope, sizes aside."""
+        excluded_dirs = [f":(exclude,glob)**/{dirname}/**" for dirname in PYTHON_FILES_EXCLUDE_DIRS]
+        return [*(self.include or ["."]), *excluded_dirs, *(f":(exclude){pathspec}" for pathspec in self.exclude)]
+
+    def matches(self, relative_path: str) -> bool:
+        """Return whether the path of a file, relative to the repository root, is in the scope (sizes aside)."""
+        if any(part in PYTHON_FILES_EXCLUDE_DIRS for part in relative_path.split("/")[:-1]):
+            return False
+
+        if self.include and not any(_matches_pathspec(relative_path, pathspec) for pathspec in self.include):
+            return False
+
+        return not any(_matches_pathspec(relative_path, pathspec) for pathspec in self.exclude)
+
+    def is_too_large(self, path: str) -> bool:
+        """Return whether the file at `path` is larger than `max_file_size`; missing files are not."""
+        if self.max_file_size is None:
+            return False
+
+        try:
+            return os.path.getsize(path) > self.max_file_size
+        except OSError:
+            return False
+
+    def contains(self, root: str, relative_path: str) -> bool:
+        """Return whether the file at `relative_path` under `root` is searched."""
+        return self.matches(relative_path) and not self.is_too_large(os.path.join(root, relative_path))
+
+    def settings(self) -> dict[str, Any]:
+        """Return the scope as JSON values, for the settings of the result cache."""
+        return {
+            "include": list(self.include),
+            "exclude": list(self.exclude),
+            "max_file_size": self.max_file_size,
+            "untracked": self.untracked,
+        }
+
+
+def _matches_pathspec(relative_path: str, pathspec: str) -> bool:
+    pathspec = pathspec.rstrip("/")
+    return (
+        pathspec in ("", ".")
+        or fnmatch.fnmatchcase(relative_path, pathspec)
+        or relative_path.startswith(f"{pathspec}/")
+    )
+
+
+DEFAULT_SEARCH_SCOPE = SearchScope()
+
+
+def list_searchable_files(root: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> list[str]:
+    """List the files ``git grep`` searches within `search_scope`: tracked plus untracked, non-ignored files.
+
+    Outside of a git work tree, every file under `root` within the scope is listed.
+    """
+    if not os.path.exists(os.path.join(root, ".git")):
+        files = [path for path in _walk_files(root=root) if search_scope.matches(relative_path=path)]
+    else:
+        args = ["ls-files", "-z", "--cached"]
+        if search_scope.untracked:
+            args.extend(["--others", "--exclude-standard"])
+        output = GIT_RUNNER.output(args=[*args, "--", *search_scope.pathspecs()], cwd=root)
+        # --cached and --others may both list a file in the middle of a merge; keep the first occurrence
+        files = list(dict.fromkeys(path for path in output.split("\0") if path))
+
+    if search_scope.max_file_size is None:
+        return files
+    return [path for path in files if not search_scope.is_too_large(path=os.path.join(root, path))]
+
+
+def _walk_files(root: str) -> list[str]:
+    files: list[str] = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(dirname for dirname in dirnames if dirname not in PYTHON_FILES_EXCLUDE_DIRS)
+        relative_dir = os.path.relpath(dirpath, root)
+        for filename in sorted(filenames):
+            files.append(filename if relative_dir == "." else os.path.join(relative_dir, filename))
+    return files
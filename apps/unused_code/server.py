@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from collections.abc import Generator
+from typing import Any
+
+import click
+from simple_logger.logger import LOGGERS, get_logger
+
+from apps.unused_code.client import find_git_root, is_private, runtime_dir, send_request, socket_path
+from apps.unused_code.unused_code import _WARM_STATE, get_unused_functions
+from apps.unused_code.watch import TreeWatcher
+
+LOGGER = get_logger(name=__name__)
+START_TIMEOUT = 30.0
+
+
+@contextlib.contextmanager
+def _capture_logs(stream: io.StringIO) -> Generator[None, None, None]:
+    """Send the console output of the `apps` loggers to `stream` for the duration of the block."""
+    handlers = [
+        handler
+        for name, logger in LOGGERS.items()
+        if name.startswith("apps.")
+        for handler in logger.handlers
+        if type(handler) is logging.StreamHandler
+    ]
+    previous = [handler.setStream(stream) for handler in handlers]
+    try:
+        yield
+    finally:
+        for handler, previous_stream in zip(handlers, previous):
+            handler.setStream(previous_stream)
+
+
+def _private_runtime_dir() -> str:
+    """Create the runtime directory if needed, and return it once it is private to the current user."""
+    directory = runtime_dir()
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if not is_private(directory):
+        raise click.ClickException(f"{directory} must be owned by the current user and not accessible to others")
+    return directory
+
+
+class AnalysisServer:
+    """Answer `pyutils-unusedcode` runs of one repository from a warm process.
+
+    The interpreter, the detected git grep flag, the usage search engines (identifier and fixture
+    indexes, memoized searches) and the function records of every file are kept across runs. Before
+    each run the searchable files are polled for changes, and only the state depending on changed
+    files is dropped. Runs are handled one at a time.
+    """
+
+    def __init__(self, root: str) -> None:
+        self.root = os.path.realpath(root)
+        self.socket_path = socket_path(root=self.root)
+        self.started = time.time()
+        self.runs = 0
+        self._stopped = False
+        self._watcher: TreeWatcher | None = None
+
+    def run(self, argv: list[str], cwd: str) -> dict[str, Any]:
+        if self._watcher is None:
+            self._watcher = TreeWatcher(root=self.root)
+        elif changed_files := self._watcher.poll():
+            LOGGER.debug(f"{len(changed_files)} files changed since the previous run")
+            _WARM_STATE.refresh(changed_files=changed_files)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), _capture_logs(stream=stderr):
+            try:
+                get_unused_functions.main(args=argv, prog_name="pyutils-unusedcode", standalone_mode=False)
+            except SystemExit as exc:
+                exit_code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+            except click.ClickException as exc:
+                exc.show()
+                exit_code = exc.exit_code
+            except click.Abort:
+                exit_code = 1
+            except Exception as exc:  # noqa: BLE001
+                # Report the failure to the client and keep serving
+                click.echo(f"pyutils-unusedcode server error: {exc!r}", err=True)
+                exit_code = 2
+
+        self.runs += 1
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "exit_code": exit_code}
+
+    def handle_request(self, request: dict[str, Any]) -> dict[str, Any]:
+        command = request.get("command")
+        if command == "run":
+            return self.run(argv=request["argv"], cwd=request["cwd"])
+        if command == "status":
+            return {"pid": os.getpid(), "root": self.root, "uptime": time.time() - self.started, "runs": self.runs}
+        if command == "stop":
+            self._stopped = True
+            return {"stopped": True}
+        return {"error": f"Unknown command {command!r}"}
+
+    def serve(self) -> None:
+        _private_runtime_dir()
+        if send_request(root=self.root, request={"command": "status"}) is not None:
+            raise click.ClickException(f"A server is already running for {self.root}")
+
+        with contextlib.suppress(FileNotFoundError):
+            # Left behind by a server that did not stop cleanly
+            os.unlink(self.socket_path)
+
+        _WARM_STATE.enabled = True
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(self.socket_path)
+            os.chmod(self.socket_path, 0o600)
+            sock.listen()
+            LOGGER.info(f"Serving {self.root} on {self.socket_path}")
+            try:
+                while not self._stopped:
+                    connection, _ = sock.accept()
+                    with connection, connection.makefile("rwb") as stream:
+                        if line := stream.readline():
+                            response = self.handle_request(request=json.loads(line))
+                            stream.write(json.dumps(response).encode() + b"\n")
+            finally:
+                os.unlink(self.socket_path)
+                LOGGER.info(f"Stopped serving {self.root}")
+
+
+def _repository_root() -> str:
+    if (root := find_git_root(path=os.getcwd())) is None:
+        raise click.ClickException("Must be run from a git repository")
+    return root
+
+
+@click.group()
+def main() -> None:
+    """Warm analysis server answering `pyutils-unusedcode` runs of the current git repository."""
+
+
+@main.command()
+def run() -> None:
+    """Run the server in the foreground."""
+    AnalysisServer(root=_repository_root()).serve()
+
+
+@main.command()
+def start() -> None:
+    """Start the server in the background."""
+    root = _repository_root()
+    if send_request(root=root, request={"command": "status"}) is not None:
+        click.echo(f"A server is already running for {root}")
+        return
+
+    _private_runtime_dir()
+    log_path = f"{os.path.splitext(socket_path(root=root))[0]}.log"
+    with open(log_path, "ab") as log:
+        subprocess.Popen(
+            [sys.executable, "-m", "apps.unused_code.server", "run"],
+            cwd=root,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + START_TIMEOUT
+    while (response := send_request(root=root, request={"command": "status"})) is None:
+        if time.monotonic() > deadline:
+            raise click.ClickException(f"The server did not start, see {log_path}")
+        time.sleep(0.1)
+    click.echo(f"Server started for {root} (pid {response['pid']})")
+
+
+@main.command()
+def stop() -> None:
+    """Stop the server."""
+    root = _repository_root()
+    if send_request(root=root, request={"command": "stop"}) is None:
+        click.echo(f"No server is running for {root}")
+        return
+    click.echo(f"Server stopped for {root}")
+
+
+@main.command()
+def status() -> None:
+    """Show whether a server is running."""
+    root = _repository_root()
+    if (response := send_request(root=root, request={"command": "status"})) is None:
+        click.echo(f"No server is running for {root}")
+        sys.exit(1)
+    click.echo(
+        f"Server running for {root}: pid {response['pid']}, up {response['uptime']:.0f}s, {response['runs']} runs"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,73 @@
 from __future__ import annotations
 
 import ast
+import dataclasses
 import logging
+import multiprocessing
 import os
 import re
-import subprocess
 import sys
-from collections.abc import Callable, Iterable
-from concurrent.futures import Future, ThreadPoolExecutor, as_completed
-from functools import lru_cache
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Collection, Hashable, Iterable
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any
+from typing import Any, Generic, TypeVar
 
 import click
 from ast_comments import parse
 from simple_logger.logger import get_logger
 
-from apps.utils import ListParamType, all_python_files, get_util_config
+from apps.unused_code.byte_search import compile_words_regex, search_file
+from apps.unused_code.changed_scope import changed_scope
+from apps.unused_code.file_cache import FileCache
+from apps.unused_code.fixture_index import FixtureUsageIndex, is_pytest_fixture
+from apps.unused_code.identifier_index import WORD_RE, IdentifierIndex
+from apps.unused_code.profiling import (
+    DISCOVERY_PHASE,
+    DOCUMENTATION_FILTER_PHASE,
+    FIXTURE_CHECK_PHASE,
+    GIT_GREP_PHASE,
+    PARSE_PHASE,
+    PROFILER,
+    USAGE_SEARCH_PHASE,
+    split_by_usage_lines,
+)
+from apps.unused_code.records import FunctionRecord, FunctionResult
+from apps.unused_code.reference_graph import ReferenceGraph
+from apps.unused_code.reporting import JSONL_FORMAT, SARIF_FORMAT, TEXT_FORMAT, FindingsReporter
+from apps.unused_code.result_cache import ResultCache, default_cache_dir
+from apps.unused_code.scheduler import TaskPool, bounded_as_completed, largest_first
+from apps.unused_code.search_scope import (
+    DEFAULT_SEARCH_SCOPE,
+    SEARCH_SCOPE_CONFIG_KEY,
+    SearchScope,
+    list_searchable_files,
+)
+from apps.unused_code.usage_classifier import CLASSIFICATION_CACHE, USAGE_KINDS, Classification, classify_file
+from apps.unused_code.watch import TreeWatcher, WatchSession, watch_changes
+from apps.utils import GIT_RUNNER, ListParamType, all_python_files, available_cpus, get_util_config
 
 LOGGER = get_logger(name=__name__)
+T = TypeVar("T")
+GREP_ENGINE = "grep"
+INDEX_ENGINE = "index"
+PYTHON_ENGINE = "python"
+RECORDS_CACHE_SIZE = 4096
+SKIP_UNUSED_CODE_MARKER = "# skip-unused-code"
+# Files submitted to the usage-resolving threads ahead of their completion, per thread; the largest of as
+# many discovered files is analyzed first
+IN_FLIGHT_FILES_PER_WORKER = 4
+# Whole-word patterns of ASCII identifiers, as built by `_build_usage_pattern` and `_build_batch_usage_pattern`
+_PCRE_WORDS_RE = re.compile(r"\\b(?:([A-Za-z0-9_]+)|\(\?:([A-Za-z0-9_]+(?:\|[A-Za-z0-9_]+)+)\))\\b")
+_BASIC_WORD_RE = re.compile(r"\\<([A-Za-z0-9_]+)\\>")
+# Whether a ``path:line:content`` entry (second argument) is a valid usage of a function name (first argument)
+UsagePredicate = Callable[[str, str], bool]
+# Parsing holds the GIL, so threads gain nothing from parsing concurrently; serializing it also avoids
+# "AST constructor recursion depth mismatch" errors some CPython 3.11 releases raise for concurrent parses.
+_PARSE_LOCK = threading.Lock()
 
 
 @lru_cache(maxsize=1)
@@ -32,22 +81,19 @@ def _detect_supported_grep_flag() -> str:
     candidate_flags = ["-P", "-G"]
     for flag in candidate_flags:
         try:
-            # Use a trivial pattern to minimize output. We only care that the flag is accepted.
-            # Discard stdout/stderr to prevent capturing large data in big repositories.
-            probe_cmd = [
-                "git",
+            # Use a trivial pattern; -q stops at the first match and prints nothing, even in big repositories.
+            probe_args = [
                 "grep",
-                "-n",
+                "-q",
                 "--no-color",
                 "--untracked",
                 "-I",
                 flag,
                 "^$",  # match empty lines; success (rc=0) or no matches (rc=1) are both fine
             ]
-            result = subprocess.run(probe_cmd, check=False, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            if result.returncode in (0, 1):
+            if GIT_RUNNER.run(args=probe_args).returncode in (0, 1):
                 return flag
-        except (OSError, subprocess.SubprocessError):
+        except (OSError, RuntimeError):
             # Try next candidate
             LOGGER.debug(f"git grep flag {flag!r} probe failed, trying next candidate")
 
@@ -57,6 +103,30 @@ def _detect_supported_grep_flag() -> str:
     )
 
 
+def _parse_file(file_path: str) -> ast.Module:
+    """Parse `file_path`; the tree holds ast_comments comment nodes when the file contains a skip marker.
+
+    Comment nodes are only needed to find skip markers, so ast_comments (several times slower than the
+    stdlib parser) is only used for the files containing one.
+    """
+    with open(file_path) as fd:
+        source = fd.read()
+
+    with _PARSE_LOCK:
+        if SKIP_UNUSED_CODE_MARKER in source:
+            return parse(source=source)
+        return ast.parse(source)
+
+
+def _parse_without_comments(file_path: str) -> ast.Module:
+    """Parse `file_path` with the much faster stdlib parser, for callers that do not need comment nodes."""
+    with open(file_path) as fd:
+        source = fd.read()
+
+    with _PARSE_LOCK:
+        return ast.parse(source)
+
+
 def is_fixture_autouse(func: ast.FunctionDef) -> bool:
     deco_list: list[Any] = func.decorator_list
     for deco in deco_list or []:
@@ -75,75 +145,23 @@ def is_fixture_autouse(func: ast.FunctionDef) -> bool:
     return False
 
 
-def is_pytest_fixture(func: ast.FunctionDef) -> bool:
-    """Return True if the function is decorated with @pytest.fixture.
-
-    Detects any pytest fixture regardless of parameters (scope, autouse, etc.).
-    """
-    decorators: list[Any] = func.decorator_list
-    for decorator in decorators or []:
-        # Case 1: @pytest.fixture(...)
-        if hasattr(decorator, "func"):
-            # e.g. @pytest.fixture(...)
-            if (
-                getattr(decorator.func, "attr", None)
-                and getattr(decorator.func, "value", None)
-                and decorator.func.attr == "fixture"
-                and getattr(decorator.func.value, "id", None) == "pytest"
-            ):
-                return True
-            # e.g. from pytest import fixture; @fixture(...)
-            if isinstance(decorator.func, ast.Name) and decorator.func.id == "fixture":
-                return True
-        # Case 2: @pytest.fixture (no parentheses)
-        else:
-            # e.g. @pytest.fixture
-            if (
-                getattr(decorator, "attr", None) == "fixture"
-                and getattr(decorator, "value", None)
-                and getattr(decorator.value, "id", None) == "pytest"
-            ):
-                return True
-            # e.g. from pytest import fixture; @fixture
-            if isinstance(decorator, ast.Name) and decorator.id == "fixture":
-                return True
-    return False
-
-
-def _build_usage_pattern(function_name: str) -> str:
+def _build_usage_pattern(function_name: str, flag: str | None = None) -> str:
     r"""Build a portable regex to match function usages.
 
-    Uses word boundary semantics based on the detected grep engine.
+    Uses word boundary semantics based on the detected grep engine, unless `flag` is given.
     The pattern is designed to match function calls as well as references
     (e.g., when passed as an argument).
     - PCRE (-P):    \bname\b
     - Basic (-G):   \<name\>
     """
-    flag = _detect_supported_grep_flag()
+    flag = flag or _detect_supported_grep_flag()
     if flag == "-P":
         return rf"\b{function_name}\b"
     # -G basic regex: use word-start and word-end tokens
     return rf"\<{function_name}\>"
 
 
-def _build_fixture_param_pattern(function_name: str) -> str:
-    r"""Build a portable regex to find a parameter named `function_name` in a function signature.
-
-    This pattern is designed to match parameter names in function signatures, including
-    multiline function definitions where parameters may be on different lines from the 'def'.
-    It looks for the parameter name followed by typical parameter syntax (colon, comma, or closing paren).
-    """
-    flag = _detect_supported_grep_flag()
-    if flag == "-P":
-        # Match parameter name followed by type annotation (:), comma, or closing paren
-        # This handles both single-line and multiline function definitions
-        return rf"\b{function_name}\b\s*[,:]"
-    # For -G (basic regex), use POSIX classes
-    # Match word boundary + name + optional spaces + (colon or comma or closing paren)
-    return rf"\<{function_name}\>[[:space:]]*[,:]"
-
-
-def _build_keyword_unpacking_pattern(function_name: str) -> str:
+def _build_keyword_unpacking_pattern(function_name: str, flag: str | None = None) -> str:
     r"""Build a portable regex to find keyword unpacking usage (**function_name()).
 
     This pattern is designed to match patterns like **func_name() in function calls or dictionaries.
@@ -151,7 +169,7 @@ def _build_keyword_unpacking_pattern(function_name: str) -> str:
     - PCRE (-P):    \*\*function_name\s*\(
     - Basic (-G):   \*\*function_name[[:space:]]*\(
     """
-    flag = _detect_supported_grep_flag()
+    flag = flag or _detect_supported_grep_flag()
     if flag == "-P":
         # Match ** followed by function name followed by optional whitespace and opening parenthesis
         return rf"\*\*{function_name}\s*\("
@@ -159,157 +177,25 @@ def _build_keyword_unpacking_pattern(function_name: str) -> str:
     return rf"\*\*{function_name}[[:space:]]*\("
 
 
-def _is_pytest_mark_usefixtures_call(call_node: ast.Call) -> bool:
-    """Check if an AST Call node represents pytest.mark.usefixtures(...)."""
-    return (
-        isinstance(call_node.func, ast.Attribute)
-        and call_node.func.attr == "usefixtures"
-        and isinstance(call_node.func.value, ast.Attribute)
-        and call_node.func.value.attr == "mark"
-        and isinstance(call_node.func.value.value, ast.Name)
-        and call_node.func.value.value.id == "pytest"
-    )
+def _build_batch_usage_pattern(function_names: list[str], flag: str | None = None) -> str | list[str]:
+    r"""Build a git grep pattern matching a usage of any of `function_names` in a single run.
 
+    - PCRE (-P):    one alternation, \b(?:name1|name2)\b
+    - Basic (-G):   one \<name\> pattern per name; git grep ORs multiple ``-e`` patterns, which avoids
+                    relying on the non-portable ``\|`` basic regex extension.
 
-def _check_fixturenames_insert_pattern(fixture_name: str, file_path: str) -> bool:
-    """Check if a fixture is used in item.fixturenames.insert() pattern.
-
-    This catches dynamic fixture injection patterns like:
-    item.fixturenames.insert(0, "fixture_name")
+    A single name produces the same pattern as `_build_usage_pattern`.
     """
-    try:
-        with open(file_path) as f:
-            content = f.read()
+    flag = flag or _detect_supported_grep_flag()
+    if len(function_names) == 1:
+        return _build_usage_pattern(function_name=function_names[0], flag=flag)
 
-        tree = parse(source=content)
-    except (FileNotFoundError, SyntaxError, ValueError):
-        return False
-
-    # Look for method calls like item.fixturenames.insert(...)
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.Call):
-            continue
-        # Check for attribute calls like item.fixturenames.insert
-        if (
-            isinstance(node.func, ast.Attribute)
-            and node.func.attr == "insert"
-            and isinstance(node.func.value, ast.Attribute)
-            and node.func.value.attr == "fixturenames"
-        ):
-            # Check the arguments for our fixture name
-            for arg in node.args:
-                if isinstance(arg, ast.Constant) and isinstance(arg.value, str) and arg.value == fixture_name:
-                    return True
-
-    return False
-
-
-def _check_getfixturevalue_pattern(fixture_name: str, file_path: str) -> bool:
-    """Check if a fixture is used in request.getfixturevalue() pattern.
-
-    This catches dynamic fixture access patterns like:
-    - request.getfixturevalue(argname="fixture_name")
-    - request.getfixturevalue("fixture_name")
-    """
-    try:
-        with open(file_path) as f:
-            content = f.read()
-
-        tree = parse(source=content)
-    except (FileNotFoundError, SyntaxError, ValueError):
-        return False
-
-    # Look for method calls like request.getfixturevalue(...)
-    for node in ast.walk(tree):
-        if not isinstance(node, ast.Call):
-            continue
-        # Check for attribute calls like request.getfixturevalue
-        if isinstance(node.func, ast.Attribute) and node.func.attr == "getfixturevalue":
-            # Check positional arguments
-            for arg in node.args:
-                if isinstance(arg, ast.Constant) and isinstance(arg.value, str) and arg.value == fixture_name:
-                    return True
-
-            # Check keyword arguments (argname="fixture_name")
-            for keyword in node.keywords:
-                if (
-                    keyword.arg == "argname"
-                    and isinstance(keyword.value, ast.Constant)
-                    and isinstance(keyword.value.value, str)
-                    and keyword.value.value == fixture_name
-                ):
-                    return True
-
-    return False
-
-
-def _is_usefixtures_context(file_path: str, line_number: str, fixture_name: str) -> bool:
-    """Check if a fixture usage is within a pytest.mark.usefixtures context.
-
-    Uses AST parsing to efficiently check the context instead of reading lines.
-    """
-    try:
-        with open(file_path) as f:
-            content = f.read()
-
-        # Parse the AST of the file
-        tree = parse(source=content)
-        target_line = int(line_number)
-    except (FileNotFoundError, SyntaxError, ValueError):
-        return False
-
-    # Look for pytest.mark.usefixtures calls that span the target line
-    for node in ast.walk(tree):
-        if isinstance(node, ast.Assign):
-            # Check if the value is a call to pytest.mark.usefixtures
-            if isinstance(node.value, ast.Call) and _is_pytest_mark_usefixtures_call(node.value):
-                # Check if the target line is within this call's range
-                call_start = node.value.lineno
-                call_end = node.value.end_lineno or call_start
-
-                if call_start <= target_line <= call_end:
-                    # Check if any of the arguments contain our fixture name
-                    for arg in node.value.args:
-                        if isinstance(arg, ast.Constant) and isinstance(arg.value, str) and arg.value == fixture_name:
-                            return True
-
-            # Also check if the value is a list containing pytest.mark.usefixtures calls
-            elif isinstance(node.value, ast.List):
-                for element in node.value.elts:
-                    if isinstance(element, ast.Call) and _is_pytest_mark_usefixtures_call(element):
-                        # Check if the target line is within this call's range
-                        call_start = element.lineno
-                        call_end = element.end_lineno or call_start
-
-                        if call_start <= target_line <= call_end:
-                            # Check if any of the arguments contain our fixture name
-                            for arg in element.args:
-                                if (
-                                    isinstance(arg, ast.Constant)
-                                    and isinstance(arg.value, str)
-                                    and arg.value == fixture_name
-                                ):
-                                    return True
-
-        # Also check decorators
-        elif isinstance(node, (ast.FunctionDef, ast.ClassDef)):
-            for decorator in node.decorator_list:
-                if isinstance(decorator, ast.Call) and _is_pytest_mark_usefixtures_call(decorator):
-                    call_start = decorator.lineno
-                    call_end = decorator.end_lineno or call_start
-
-                    if call_start <= target_line <= call_end:
-                        for arg in decorator.args:
-                            if (
-                                isinstance(arg, ast.Constant)
-                                and isinstance(arg.value, str)
-                                and arg.value == fixture_name
-                            ):
-                                return True
-
-    return False
+    if flag == "-P":
+        return rf"\b(?:{'|'.join(function_names)})\b"
+    return [_build_usage_pattern(function_name=function_name, flag=flag) for function_name in function_names]
 
 
+@PROFILER.timed(phase=DOCUMENTATION_FILTER_PHASE)
 def _is_documentation_pattern(line: str, function_name: str) -> bool:
     """Check if a line contains a documentation pattern rather than a function call.
 
@@ -367,6 +253,45 @@ def _is_documentation_pattern(line: str, function_name: str) -> bool:
     return any(stripped_line.startswith(starter) for starter in doc_starters) and f"{function_name}(" in stripped_line
 
 
+@PROFILER.timed(phase=DOCUMENTATION_FILTER_PHASE)
+def _classified_usage(
+    path: str,
+    lineno: str,
+    line: str,
+    function_name: str,
+    py_file: str,
+    classifications: dict[str, Classification | None],
+) -> bool | None:
+    """Tell from the tokens of the referencing file whether a usage entry is a real usage of `function_name`.
+
+    Occurrences in code or in string literals are usages; occurrences in docstrings, comments, imports
+    and in the function's own definition are not.
+
+    Args:
+        path: The path of the usage entry, as reported by the usage search.
+        lineno: The line number of the usage entry.
+        line: The content of the line.
+        function_name: The function name we're searching for.
+        py_file: The analyzed file, to resolve `path` against its git root.
+        classifications: Classifications already looked up by the caller, by usage entry path; filled in
+            by this call.
+
+    Returns:
+        None when the referencing file cannot be classified, or `line` is not its current content, for the
+        caller to fall back to line heuristics.
+    """
+    if path not in classifications:
+        classifications[path] = classify_file(file_path=_resolve_absolute_path(path, py_file))
+
+    if (classification := classifications[path]) is None or not lineno.isdigit():
+        return None
+
+    if not (kinds := classification.occurrence_kinds(line_number=int(lineno), line=line, name=function_name)):
+        return None
+
+    return any(kind in USAGE_KINDS for kind in kinds)
+
+
 def _find_git_root(file_path: str) -> str:
     """Find the git repository root for a given file path.
 
@@ -387,18 +312,55 @@ def _find_git_root(file_path: str) -> str:
     return os.getcwd()
 
 
-def _git_grep(pattern: str, file_path: str | None = None) -> list[str]:
+def _fixed_words(pattern: str | list[str], flag: str) -> list[str] | None:
+    r"""Return the identifiers of a pattern only matching them as whole words, if ``git grep -w -F`` is faster.
+
+    ``-w -F`` selects the same lines as ``\bname\b`` for ASCII identifiers: git grep and PCRE (without UTF
+    mode, as patterns are ASCII) both consider ASCII letters, digits and ``_`` as word characters only. Basic
+    regex word characters follow the locale, so `_git_grep` checks the lines holding non-ASCII characters
+    again for ``\<name\>``. ``-w -F`` is faster than either regex engine for a single name, and faster than
+    several basic regexes, but slower than a single PCRE alternation of several names.
+
+    Returns None for any other pattern, which is searched with the regex engine.
+    """
+    words: list[str] = []
+    for _pattern in [pattern] if isinstance(pattern, str) else pattern:
+        if not (match := _PCRE_WORDS_RE.fullmatch(_pattern) or _BASIC_WORD_RE.fullmatch(_pattern)):
+            return None
+        words.extend((match.group(1) or match.group(2)).split("|"))
+
+    if len(words) > 1 and flag == "-P":
+        return None
+    return words
+
+
+@PROFILER.timed(phase=GIT_GREP_PHASE)
+def _git_grep(
+    pattern: str | list[str],
+    file_path: str | None = None,
+    stop_when: Callable[[str], bool] | None = None,
+    pathspecs: list[str] | None = None,
+    skipped_paths: Collection[str] = (),
+    untracked: bool = True,
+) -> list[str]:
     """Run git grep with a pattern and return matching lines.
 
     - Uses dynamically detected regex engine (prefers PCRE ``-P``, falls back to basic ``-G``).
-    - Includes untracked files so local changes are considered.
+    - Searches whole-word patterns of identifiers as fixed strings (see `_fixed_words`).
+    - Includes untracked files so local changes are considered, unless untracked is False.
     - Return an empty list when no matches are found (rc=1).
     - Raise on other non-zero exit codes.
     - If file_path is provided, runs git grep from the repository root of that file.
+    - If stop_when is provided, the output is read as it comes and git grep is killed at the first line
+      for which it returns True, which is the last returned line.
 
     Args:
-        pattern: The regex pattern to search for
+        pattern: The regex pattern to search for, or a list of patterns matched as alternatives
         file_path: Optional file path to determine the git repository root
+        stop_when: Optional predicate called with each matching line
+        pathspecs: Optional git pathspecs of the searched files, relative to the repository root
+        skipped_paths: Paths, relative to the repository root, of files whose matching lines are dropped
+        untracked: Whether untracked (non-ignored) files are searched
     """
     # Determine the working directory for git grep
     if file_path:
@@ -407,20 +369,46 @@ def _git_grep(pattern: str, file_path: str | None = None) -> list[str]:
         # Fall back to current directory (already verified as git repo)
         cwd = os.getcwd()
 
-    cmd = [
-        "git",
+    args = [
         "grep",
         "-n",  # include line numbers
         "--no-color",
-        "--untracked",
+        *(["--untracked"] if untracked else []),
         "-I",  # ignore binary files
-        _detect_supported_grep_flag(),
-        "-e",  # safely handle patterns starting with dash
-        pattern,
+        f"--threads={GIT_RUNNER.grep_threads()}",
     ]
-    result = subprocess.run(cmd, check=False, capture_output=True, text=True, cwd=cwd)
+    flag = _detect_supported_grep_flag()
+    recheck: re.Pattern[str] | None = None
+    if words := _fixed_words(pattern=pattern, flag=flag):
+        args.extend(["-w", "-F"])
+        patterns = words
+        if flag != "-P":
+            recheck = re.compile(rf"\b(?:{'|'.join(words)})\b")
+    else:
+        args.append(flag)
+        patterns = [pattern] if isinstance(pattern, str) else pattern
+    for _pattern in patterns:
+        args.extend(["-e", _pattern])  # -e safely handles patterns starting with dash
+    if pathspecs:
+        args.extend(["--", *pathspecs])
+
+    def selected(line: str) -> bool:
+        if skipped_paths and line.split(":", 1)[0] in skipped_paths:
+            return False
+
+        # Basic regex word characters follow the locale: drop the lines only -w matches, e.g. `éname`
+        return (
+            recheck is None
+            or line.isascii()
+            or (len(parts := line.split(":", 2)) == 3 and recheck.search(parts[2]) is not None)
+        )
+
+    if stop_when is None:
+        result = GIT_RUNNER.run(args=args, cwd=cwd)
+    else:
+        result = GIT_RUNNER.run_until(args=args, cwd=cwd, stop_when=lambda line: selected(line) and stop_when(line))
     if result.returncode == 0:
-        return [line for line in result.stdout.splitlines() if line]
+        return [line for line in result.stdout.splitlines() if line and selected(line)]
     # rc=1 means no matches were found
     if result.returncode == 1:
         return []
@@ -429,6 +417,385 @@ def _git_grep(pattern: str, file_path: str | None = None) -> list[str]:
     raise RuntimeError(f"git grep failed (rc={result.returncode}) for pattern {pattern!r}: {error_message}")
 
 
+def _group_entries_by_name(entries: list[str], function_names: list[str]) -> dict[str, list[str]]:
+    """Demultiplex ``path:line:content`` entries to the function names found as whole words in each line."""
+    grouped: dict[str, list[str]] = {function_name: [] for function_name in function_names}
+    for entry in entries:
+        parts = entry.split(":", 2)
+        if len(parts) != 3:
+            continue
+
+        for word in dict.fromkeys(WORD_RE.findall(parts[2])):
+            if word in grouped:
+                grouped[word].append(entry)
+    return grouped
+
+
+def _filter_entries(entries: list[str], pattern: str) -> list[str]:
+    """Return the entries whose line content matches the Python regex `pattern`."""
+    regex = re.compile(pattern)
+    return [entry for entry in entries if len(parts := entry.split(":", 2)) == 3 and regex.search(parts[2])]
+
+
+class _PerRootCache(Generic[T]):
+    """Values built on first use for each git repository root, shared by the workers of a run.
+
+    The lock is held while building, so concurrent workers wait for a single build per root.
+    """
+
+    def __init__(self, build: Callable[[str], T]) -> None:
+        self._build = build
+        self._values: dict[str, T] = {}
+        self._lock = threading.Lock()
+
+    def get(self, root: str) -> T:
+        with self._lock:
+            if root not in self._values:
+                self._values[root] = self._build(root)
+            return self._values[root]
+
+    def built(self, root: str) -> T | None:
+        """Return the value of `root` if it was built, without building it."""
+        with self._lock:
+            return self._values.get(root)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values = {}
+
+
+class UsageSearch(ABC):
+    """Base class for the engines finding usages of the functions defined in a file.
+
+    An instance is shared by all workers of a single run, so engines may keep run-scoped state. Engines
+    only search the files of `search_scope`.
+    """
+
+    # Whether the names of a file are searched faster split between idle workers, which only pays off
+    # for searches running outside of the GIL
+    shares_batches = False
+
+    def __init__(self, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        self.search_scope = search_scope
+        self._fixture_indexes: _PerRootCache[FixtureUsageIndex] = _PerRootCache(
+            build=lambda root: FixtureUsageIndex.build(root=root, parse_file=_parse_without_comments)
+        )
+
+    @abstractmethod
+    def find_usages(
+        self, function_names: list[str], py_file: str, is_usage: UsagePredicate | None = None
+    ) -> dict[str, list[str]]:
+        """Return the ``path:line:content`` entries containing each function name as a whole word.
+
+        Keyword unpacking queries of `process_file` match a subset of these lines, so they are
+        answered by filtering them in Python.
+
+        Args:
+            function_names: The candidate function names defined in `py_file`.
+            py_file: The file defining the functions, used to locate the git repository root.
+            is_usage: Whether an entry is a valid usage of a function name. If given, engines may stop
+                searching once every name has a valid usage: the entries of a name then end with its
+                first valid usage, instead of listing all of its occurrences.
+        """
+
+    @PROFILER.timed(phase=FIXTURE_CHECK_PHASE)
+    def find_fixture_usage(self, fixture_name: str, py_file: str) -> str | None:
+        """Return the absolute path of a test or conftest file requesting `fixture_name`, or None.
+
+        The fixture usages of a git repository are indexed on the first query, in a single AST pass.
+        """
+        index = self._fixture_indexes.get(root=_find_git_root(py_file))
+        return index.find(fixture_name=fixture_name)
+
+    def refresh(self, changed_files: set[str]) -> None:
+        """Update the run-scoped state after `changed_files` (absolute paths) were modified, added or deleted.
+
+        Used by watch mode, so that only the affected functions need to be searched again. Must not be
+        called while a search is running.
+        """
+        for changed_file in changed_files:
+            git_root = _find_git_root(changed_file)
+            if (index := self._fixture_indexes.built(root=git_root)) is not None:
+                index.update_file(
+                    relative_path=os.path.relpath(changed_file, git_root), parse_file=_parse_without_comments
+                )
+
+
+class _SingleFlightCache:
+    """Thread-safe result cache where each distinct key is computed only once.
+
+    The first caller claiming a key owns its computation; concurrent callers get the same
+    in-flight Future and wait on it instead of running an identical query.
+    """
+
+    def __init__(self) -> None:
+        self._futures: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, keys: Iterable[Hashable]) -> tuple[dict[Hashable, Future], set[Hashable]]:
+        """Return a Future for every key, and the keys the caller must compute and resolve."""
+        futures: dict[Hashable, Future] = {}
+        owned: set[Hashable] = set()
+        with self._lock:
+            for key in keys:
+                if key not in self._futures:
+                    self._futures[key] = Future()
+                    owned.add(key)
+                futures[key] = self._futures[key]
+        return futures, owned
+
+
+class _UsageTracker:
+    """Follow the entries of a search for several names, until each name has a valid usage."""
+
+    def __init__(self, function_names: list[str], is_usage: UsagePredicate) -> None:
+        self.unresolved = set(function_names)
+        self.is_usage = is_usage
+
+    def add(self, entry: str) -> bool:
+        """Return True once every name has a valid usage, `entry` included."""
+        if len(parts := entry.split(":", 2)) == 3:
+            for word in self.unresolved.intersection(WORD_RE.findall(parts[2])):
+                if self.is_usage(word, entry):
+                    self.unresolved.discard(word)
+        return not self.unresolved
+
+
+class _MemoizedSearch(UsageSearch):
+    """Base class for engines running one batched search per file for all of its function names.
+
+    Results are memoized per (root, function name, search variant) for the lifetime of the instance, so a
+    name defined in many files (``setup``, ``client``...) is searched once per run, and workers needing a
+    name that another worker is currently searching wait for that result. Searches stopped at the first
+    valid usages are memoized apart from complete ones.
+    """
+
+    def __init__(self, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        super().__init__(search_scope=search_scope)
+        self._cache = _SingleFlightCache()
+
+    @abstractmethod
+    def _variant(self) -> str:
+        """Return what, besides the root and the name, changes the result of a search."""
+
+    @abstractmethod
+    def _search(
+        self, function_names: list[str], py_file: str, variant: str, tracker: _UsageTracker | None
+    ) -> list[str]:
+        """Return the ``path:line:content`` entries containing any of `function_names` as a whole word.
+
+        If `tracker` is given, entries are added to it as they are found, and the search stops once it
+        reports that every name has a valid usage.
+        """
+
+    def find_usages(
+        self, function_names: list[str], py_file: str, is_usage: UsagePredicate | None = None
+    ) -> dict[str, list[str]]:
+        git_root = _find_git_root(py_file)
+        variant = self._variant()
+        stops_early = is_usage is not None
+        keys = {function_name: (git_root, function_name, variant, stops_early) for function_name in function_names}
+        futures, owned = self._cache.claim(keys=keys.values())
+
+        if owned_names := [function_name for function_name in function_names if keys[function_name] in owned]:
+            tracker = _UsageTracker(function_names=owned_names, is_usage=is_usage) if is_usage is not None else None
+            try:
+                entries = self._search(function_names=owned_names, py_file=py_file, variant=variant, tracker=tracker)
+                grouped = _group_entries_by_name(entries=entries, function_names=owned_names)
+            except BaseException as exc:
+                # Propagate the failure to the workers waiting on these names as well, even on an interrupt
+                # or a cancelled run: unresolved futures would block them forever
+                for function_name in owned_names:
+                    futures[keys[function_name]].set_exception(exc)
+                raise
+
+            for function_name in owned_names:
+                futures[keys[function_name]].set_result(grouped[function_name])
+
+        return {function_name: futures[keys[function_name]].result() for function_name in function_names}
+
+    def refresh(self, changed_files: set[str]) -> None:
+        super().refresh(changed_files=changed_files)
+        # Any memoized name may appear in the changed files; the caller only searches the affected ones again
+        self._cache = _SingleFlightCache()
+
+
+class GitGrepSearch(_MemoizedSearch):
+    """Find usages with a single ``git grep`` per file matching an alternation of all its function names.
+
+    The search scope is passed to git grep as pathspecs. git grep has no file size limit, so files larger
+    than the maximum size of the scope are listed once per root, and their matching lines are dropped
+    from the output: excluding them by name could exceed the maximum command line length.
+    """
+
+    shares_batches = True
+
+    def __init__(self, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        super().__init__(search_scope=search_scope)
+        self._too_large_files: _PerRootCache[frozenset[str]] = _PerRootCache(build=self._list_too_large_files)
+
+    def too_large_files(self, root: str) -> frozenset[str]:
+        """Return the paths, relative to `root`, of the files git grep searches beyond the maximum size."""
+        return self._too_large_files.get(root=root)
+
+    def _list_too_large_files(self, root: str) -> frozenset[str]:
+        if self.search_scope.max_file_size is None:
+            return frozenset()
+
+        unlimited_scope = dataclasses.replace(self.search_scope, max_file_size=None)
+        return frozenset(
+            relative_path
+            for relative_path in list_searchable_files(root=root, search_scope=unlimited_scope)
+            if self.search_scope.is_too_large(path=os.path.join(root, relative_path))
+        )
+
+    def _variant(self) -> str:
+        return _detect_supported_grep_flag()
+
+    def refresh(self, changed_files: set[str]) -> None:
+        super().refresh(changed_files=changed_files)
+        # Changed files may have crossed the maximum file size
+        self._too_large_files.clear()
+
+    def _search(
+        self, function_names: list[str], py_file: str, variant: str, tracker: _UsageTracker | None
+    ) -> list[str]:
+        return _git_grep(
+            pattern=_build_batch_usage_pattern(function_names=function_names, flag=variant),
+            file_path=py_file,
+            stop_when=tracker.add if tracker is not None else None,
+            pathspecs=self.search_scope.pathspecs(),
+            skipped_paths=self.too_large_files(root=_find_git_root(py_file)),
+            untracked=self.search_scope.untracked,
+        )
+
+
+class PythonSearch(_MemoizedSearch):
+    """Find usages by scanning memory-mapped files with a precompiled byte regex, without spawning git grep.
+
+    The files git grep would search are listed once per root; outside of a git work tree every file
+    under the root is searched.
+    """
+
+    def __init__(self, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        super().__init__(search_scope=search_scope)
+        self._files: _PerRootCache[list[str]] = _PerRootCache(
+            build=lambda root: list_searchable_files(root=root, search_scope=self.search_scope)
+        )
+
+    def files_for(self, root: str) -> list[str]:
+        return self._files.get(root=root)
+
+    def _variant(self) -> str:
+        return PYTHON_ENGINE
+
+    def refresh(self, changed_files: set[str]) -> None:
+        super().refresh(changed_files=changed_files)
+        # Added and deleted files change the listing
+        self._files.clear()
+
+    def _search(
+        self, function_names: list[str], py_file: str, variant: str, tracker: _UsageTracker | None
+    ) -> list[str]:
+        root = _find_git_root(py_file)
+        regex = compile_words_regex(words=function_names)
+        entries: list[str] = []
+        for relative_path in self.files_for(root=root):
+            for entry in search_file(root=root, relative_path=relative_path, words=function_names, regex=regex):
+                entries.append(entry)
+                if tracker is not None and tracker.add(entry=entry):
+                    return entries
+        return entries
+
+
+class IndexSearch(UsageSearch):
+    """Find usages from an IdentifierIndex built once per git repository root."""
+
+    def __init__(self, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        super().__init__(search_scope=search_scope)
+        self._indexes: _PerRootCache[IdentifierIndex] = _PerRootCache(
+            build=lambda root: IdentifierIndex.build(root=root, search_scope=self.search_scope)
+        )
+
+    def index_for(self, py_file: str) -> IdentifierIndex:
+        return self._indexes.get(root=_find_git_root(py_file))
+
+    def refresh(self, changed_files: set[str]) -> None:
+        super().refresh(changed_files=changed_files)
+        for changed_file in changed_files:
+            git_root = _find_git_root(changed_file)
+            if (index := self._indexes.built(root=git_root)) is not None:
+                index.update_file(relative_path=os.path.relpath(changed_file, git_root))
+
+    def find_usages(
+        self, function_names: list[str], py_file: str, is_usage: UsagePredicate | None = None
+    ) -> dict[str, list[str]]:
+        # Index lookups are cheap enough to always return every occurrence
+        index = self.index_for(py_file=py_file)
+        return {function_name: index.grep(name=function_name) for function_name in function_names}
+
+
+def _get_usage_search(engine: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> UsageSearch:
+    if engine == INDEX_ENGINE:
+        return IndexSearch(search_scope=search_scope)
+    if engine == PYTHON_ENGINE:
+        return PythonSearch(search_scope=search_scope)
+    return GitGrepSearch(search_scope=search_scope)
+
+
+class _WarmState:
+    """State kept across runs by a long-lived process, the analysis server (see `apps.unused_code.server`).
+
+    While disabled, the default, every run starts from new usage search engines and parses every file.
+    Once enabled, engines are reused across runs and function records are kept per file until the file
+    changes; `refresh` must be called with the files changed since the previous run.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._searches: dict[tuple[str, SearchScope], UsageSearch] = {}
+        self._records: dict[str, tuple[int, int, list[FunctionRecord]]] = {}
+        self._lock = threading.Lock()
+
+    def usage_search(self, engine: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> UsageSearch:
+        if not self.enabled:
+            return _get_usage_search(engine=engine, search_scope=search_scope)
+
+        with self._lock:
+            if (engine, search_scope) not in self._searches:
+                self._searches[engine, search_scope] = _get_usage_search(engine=engine, search_scope=search_scope)
+            return self._searches[engine, search_scope]
+
+    def records(self, py_file: str, extract: Callable[[], list[FunctionRecord]]) -> list[FunctionRecord]:
+        """Return the function records of `py_file`, calling `extract` unless the file is unchanged."""
+        if not self.enabled:
+            return extract()
+
+        absolute_path = os.path.abspath(py_file)
+        stat = os.stat(absolute_path)
+        with self._lock:
+            cached = self._records.get(absolute_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
+        records = extract()
+        with self._lock:
+            self._records[absolute_path] = (stat.st_mtime_ns, stat.st_size, records)
+        return records
+
+    def refresh(self, changed_files: set[str]) -> None:
+        with self._lock:
+            for changed_file in changed_files:
+                self._records.pop(os.path.abspath(changed_file), None)
+            searches = list(self._searches.values())
+
+        for usage_search in searches:
+            usage_search.refresh(changed_files=changed_files)
+
+
+_WARM_STATE = _WarmState()
+
+
 def _iter_functions(tree: ast.Module) -> Iterable[ast.FunctionDef]:
     """
     Get all function from python file
@@ -441,7 +808,7 @@ def _iter_functions(tree: ast.Module) -> Iterable[ast.FunctionDef]:
             yield elm
 
 
-def is_ignore_function_list(ignore_prefix_list: list[str], function: ast.FunctionDef) -> bool:
+def is_ignore_function_list(ignore_prefix_list: list[str], function: ast.FunctionDef | FunctionRecord) -> bool:
     ignore_function_lists = [
         function.name for ignore_prefix in ignore_prefix_list if function.name.startswith(ignore_prefix)
     ]
@@ -456,69 +823,210 @@ def _resolve_absolute_path(git_grep_path: str, reference_file: str) -> str:
     return git_grep_path
 
 
-def process_file(py_file: str, func_ignore_prefix: list[str], file_ignore_list: list[str]) -> str:
+def _reference(path: str, lineno: str, reference_file: str) -> tuple[str, int]:
+    """Return the (absolute path, line) of a usage entry; unparsable lines count as module level (line 0)."""
+    return _resolve_absolute_path(path, reference_file), int(lineno) if lineno.isdigit() else 0
+
+
+def _function_records(file_path: str) -> tuple[FunctionRecord, ...]:
+    """Summarize a file; the tree is dropped as soon as the records are built, only the records are cached."""
+    return tuple(
+        FunctionRecord(
+            name=func.name,
+            lineno=func.lineno,
+            end_lineno=func.end_lineno or func.lineno,
+            col_offset=func.col_offset,
+            is_fixture=is_pytest_fixture(func=func),
+            is_autouse=is_fixture_autouse(func=func),
+            has_skip_marker=any(getattr(item, "value", None) == SKIP_UNUSED_CODE_MARKER for item in func.body),
+        )
+        for func in _iter_functions(tree=_parse_file(file_path=file_path))
+    )
+
+
+_FUNCTION_RECORDS_CACHE: FileCache[tuple[FunctionRecord, ...]] = FileCache(
+    compute=_function_records, maxsize=RECORDS_CACHE_SIZE
+)
+
+
+def extract_function_records(py_file: str) -> list[FunctionRecord]:
+    """Parse `py_file` and summarize its top-level functions.
+
+    This is the CPU-bound stage of the analysis; it only returns picklable records so it can run in a
+    worker process. Records are cached while the file is unchanged, and no tree outlives this call.
+    """
+    return list(_FUNCTION_RECORDS_CACHE(file_path=py_file))
+
+
+def _is_usage_entry(
+    function_name: str, entry: str, py_file: str, classifications: dict[str, Classification | None]
+) -> bool:
+    """Return whether a ``path:line:content`` usage entry is a valid usage of `function_name`.
+
+    Args:
+        function_name: The function name, found as a whole word in the entry.
+        entry: The usage entry.
+        py_file: The file defining the function, used to resolve the entry path.
+        classifications: Token classifications of the referencing files, filled as entries are checked.
+    """
+    # git grep -n output format: path:line-number:line-content
+    parts = entry.split(":", 2)
+    if len(parts) != 3:
+        return False
+    _path, _lineno, _line = parts
+
+    # ignore its own definition, also when quoted (e.g. in test sources)
+    if f"def {function_name}" in _line:
+        return False
+
+    classified_usage = _classified_usage(
+        path=_path,
+        lineno=_lineno,
+        line=_line,
+        function_name=function_name,
+        py_file=py_file,
+        classifications=classifications,
+    )
+    # Files that cannot be tokenized (not Python, syntax errors) fall back to line heuristics
+    if classified_usage is not None:
+        return classified_usage
+
+    # Filter out documentation patterns that aren't actual function calls
+    if _is_documentation_pattern(_line, function_name):
+        return False
+
+    # Ignore commented lines (full line or inline)
+    code_part = _line.split("#", 1)[0]
+    if code_part.startswith(("import", "from")):
+        return False
+
+    return function_name in code_part
+
+
+def analyze_file(
+    py_file: str,
+    func_ignore_prefix: list[str],
+    file_ignore_list: list[str],
+    usage_search: UsageSearch | None = None,
+    function_names: set[str] | None = None,
+    records: list[FunctionRecord] | None = None,
+    collect_references: bool = False,
+    pool: TaskPool | None = None,
+) -> list[FunctionResult]:
+    """Decide whether each candidate top-level function of `py_file` is used.
+
+    Args:
+        py_file: The Python file to analyze.
+        func_ignore_prefix: Function name prefixes to skip.
+        file_ignore_list: File base names to skip.
+        usage_search: The run-scoped usage search engine; a git grep engine is used if not given.
+        function_names: Only analyze these functions, if given.
+        records: The function records of `py_file`, if already extracted; the file is parsed otherwise.
+        collect_references: Record every valid usage in `FunctionResult.references` instead of stopping at
+            the first one, to build a reference graph.
+        pool: The pool running this call, if any: the search of the candidate names is then split between
+            its idle workers, when the engine gains from it.
+
+    Returns:
+        list[FunctionResult]: One result per analyzed function, in definition order.
+    """
     if os.path.basename(py_file) in file_ignore_list:
         LOGGER.debug(f"Skipping file: {py_file}")
-        return ""
+        return []
 
-    with open(py_file) as fd:
-        tree = parse(source=fd.read())
+    if records is None:
+        with PROFILER.phase(phase=PARSE_PHASE):
+            records = extract_function_records(py_file=py_file)
 
-    unused_messages: list[str] = []
+    candidates: list[FunctionRecord] = []
+    for func in records:
+        if function_names is not None and func.name not in function_names:
+            continue
 
-    for func in _iter_functions(tree=tree):
         if func_ignore_prefix and is_ignore_function_list(ignore_prefix_list=func_ignore_prefix, function=func):
             LOGGER.debug(f"Skipping function: {func.name}")
             continue
 
-        if is_fixture_autouse(func=func):
+        if func.is_autouse:
             LOGGER.debug(f"Skipping `autouse` fixture function: {func.name}")
             continue
 
-        if any(getattr(item, "value", None) == "# skip-unused-code" for item in func.body):
-            LOGGER.debug(f"Skipping function {func.name}: found `# skip-unused-code`")
+        if func.has_skip_marker:
+            LOGGER.debug(f"Skipping function {func.name}: found `{SKIP_UNUSED_CODE_MARKER}`")
             continue
 
-        used = False
-
-        # Search for any occurrence of the function name as a whole word.
-        for entry in _git_grep(pattern=_build_usage_pattern(function_name=func.name), file_path=py_file):
-            # git grep -n output format: path:line-number:line-content
-            parts = entry.split(":", 2)
-            if len(parts) != 3:
-                continue
-            _, _, _line = parts
+        candidates.append(func)
 
-            # ignore its own definition
-            if f"def {func.name}" in _line:
-                continue
+    if not candidates:
+        return []
 
-            # Filter out documentation patterns that aren't actual function calls
-            if _is_documentation_pattern(_line, func.name):
-                continue
+    usage_search = usage_search or GitGrepSearch()
+    # Token classifications of the files referencing the candidates, by usage entry path
+    classifications: dict[str, Classification | None] = {}
+    is_usage = partial(_is_usage_entry, py_file=py_file, classifications=classifications)
+    search = partial(
+        usage_search.find_usages,
+        py_file=py_file,
+        # Every usage is needed to build the reference graph
+        is_usage=None if collect_references else is_usage,
+    )
+    candidate_names = list(dict.fromkeys(func.name for func in candidates))
+    search_started = time.perf_counter()
+    with PROFILER.phase(phase=USAGE_SEARCH_PHASE):
+        if pool is not None and usage_search.shares_batches:
+            usages = {}
+            for shared_usages in pool.share(items=candidate_names, run=lambda names: search(function_names=names)):
+                usages.update(shared_usages)
+        else:
+            usages = search(function_names=candidate_names)
+    # The file is searched once for all of its names: each function is charged in proportion to its usage lines
+    search_seconds = split_by_usage_lines(
+        seconds=time.perf_counter() - search_started,
+        usage_lines={name: len(usages.get(name, [])) for name in candidate_names},
+    )
+    results: list[FunctionResult] = []
 
-            # Ignore commented lines (full line or inline)
-            code_part = _line.split("#", 1)[0]
-            if code_part.startswith(("import", "from")):
-                continue
+    for func in candidates:
+        started = time.perf_counter()
+        usage_entries = usages.get(func.name, [])
+        used = False
+        used_path = ""
+        references: list[tuple[str, int]] = []
 
-            if func.name not in code_part:
+        # Search for any occurrence of the function name as a whole word.
+        for entry in usage_entries:
+            if not is_usage(func.name, entry):
                 continue
 
-            # If we are here, it's a valid usage.
+            # git grep -n output format: path:line-number:line-content
+            _path, _lineno, _ = entry.split(":", 2)
             used = True
-            break
+            used_path = _path
+            references.append(_reference(path=_path, lineno=_lineno, reference_file=py_file))
+            if not collect_references:
+                break
 
         # If not found with general pattern, check for keyword unpacking usage (**func_name())
         if not used:
-            for entry in _git_grep(
-                pattern=_build_keyword_unpacking_pattern(function_name=func.name), file_path=py_file
+            for entry in _filter_entries(
+                entries=usage_entries, pattern=_build_keyword_unpacking_pattern(function_name=func.name, flag="-P")
             ):
                 LOGGER.debug(f"Checking {entry} function: {func.name}")
-                parts = entry.split(":", 2)
-                if len(parts) != 3:
+                _path, _lineno, _line = entry.split(":", 2)
+
+                # Entries of classified files were already decided above
+                if (
+                    _classified_usage(
+                        path=_path,
+                        lineno=_lineno,
+                        line=_line,
+                        function_name=func.name,
+                        py_file=py_file,
+                        classifications=classifications,
+                    )
+                    is not None
+                ):
                     continue
-                _, _, _line = parts
 
                 # Filter out documentation patterns that aren't actual function calls
                 if _is_documentation_pattern(line=_line, function_name=func.name):
@@ -531,52 +1039,151 @@ def process_file(py_file: str, func_ignore_prefix: list[str], file_ignore_list:
 
                 # If we find keyword unpacking usage, mark as used
                 used = True
-                break
-
-        # If not found and it's a pytest fixture, check all fixture usage patterns
-        if not used and is_pytest_fixture(func=func):
-            patterns: list[tuple[str, Callable[..., bool] | None]] = [
-                (_build_fixture_param_pattern(function_name=func.name), None),  # Parameter usage
-                (rf'"{func.name}"', _is_usefixtures_context),  # usefixtures usage
-                (rf'fixturenames\.insert.*"{func.name}"', _check_fixturenames_insert_pattern),  # fixturenames.insert
-                (rf'getfixturevalue.*"{func.name}"', _check_getfixturevalue_pattern),  # getfixturevalue
-            ]
-
-            for pattern, validator_func in patterns:
-                for entry in _git_grep(pattern=pattern, file_path=py_file):
-                    parts = entry.split(":", 2)
-                    if len(parts) != 3:
-                        continue
-                    _path, _lineno, _line = parts
-
-                    # ignore commented lines
-                    if _line.strip().startswith("#"):
-                        continue
-
-                    absolute_path = _resolve_absolute_path(_path, py_file)
-
-                    # Apply validator function if provided, otherwise it's a match
-                    if validator_func is None:
-                        used = True
-                        break
-                    elif validator_func == _is_usefixtures_context:
-                        if validator_func(absolute_path, _lineno, func.name):
-                            used = True
-                            break
-                    else:  # _check_fixturenames_insert_pattern or _check_getfixturevalue_pattern
-                        if validator_func(func.name, absolute_path):
-                            used = True
-                            break
-
-                if used:
+                used_path = _path
+                references.append(_reference(path=_path, lineno=_lineno, reference_file=py_file))
+                if not collect_references:
                     break
 
-        if not used:
-            unused_messages.append(
-                f"{os.path.relpath(py_file)}:{func.name}:{func.lineno}:{func.col_offset} Is not used anywhere in the code."
+        # If not found and it's a pytest fixture, check whether any test or conftest file requests it
+        if (
+            not used
+            and func.is_fixture
+            and (fixture_usage_path := usage_search.find_fixture_usage(fixture_name=func.name, py_file=py_file))
+        ):
+            used = True
+            used_path = fixture_usage_path
+
+        if used:
+            evidence = {_resolve_absolute_path(used_path, py_file)}
+        else:
+            evidence = {_resolve_absolute_path(entry.split(":", 1)[0], py_file) for entry in usage_entries}
+
+        results.append(
+            FunctionResult(
+                py_file=py_file,
+                name=func.name,
+                lineno=func.lineno,
+                col_offset=func.col_offset,
+                used=used,
+                evidence=evidence,
+                end_lineno=func.end_lineno,
+                references=references,
             )
+        )
+        PROFILER.record_function(
+            py_file=py_file,
+            name=func.name,
+            seconds=search_seconds[func.name] + time.perf_counter() - started,
+            usage_lines=len(usage_entries),
+        )
+
+    return results
+
+
+def process_file(
+    py_file: str,
+    func_ignore_prefix: list[str],
+    file_ignore_list: list[str],
+    usage_search: UsageSearch | None = None,
+) -> str:
+    """Return the newline-separated "is not used" messages for the functions of `py_file`."""
+    return "\n".join(
+        result.message
+        for result in analyze_file(
+            py_file=py_file,
+            func_ignore_prefix=func_ignore_prefix,
+            file_ignore_list=file_ignore_list,
+            usage_search=usage_search,
+        )
+        if not result.used
+    )
+
+
+class _CacheCounters:
+    """Hits and misses of the function records caches of the parse worker processes."""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def add(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def reset(self) -> None:
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+_PARSE_WORKERS_RECORDS_CACHE = _CacheCounters()
+
 
-    return "\n".join(unused_messages)
+def _extract_records_in_worker(py_file: str) -> tuple[list[FunctionRecord], bool]:
+    """Extract the records of `py_file` in a parse worker, and tell whether its records cache was hit."""
+    hits = _FUNCTION_RECORDS_CACHE.hits
+    records = extract_function_records(py_file=py_file)
+    return records, _FUNCTION_RECORDS_CACHE.hits > hits
+
+
+def _extract_records(py_file: str, parse_executor: Executor | None) -> list[FunctionRecord]:
+    if parse_executor:
+        records, hit = parse_executor.submit(_extract_records_in_worker, py_file=py_file).result()
+        _PARSE_WORKERS_RECORDS_CACHE.add(hit=hit)
+        return records
+    return extract_function_records(py_file=py_file)
+
+
+def _analyze_file_with_cache(
+    py_file: str,
+    func_ignore_prefix: list[str],
+    file_ignore_list: list[str],
+    usage_search: UsageSearch,
+    result_cache: ResultCache | None,
+    function_names: set[str] | None = None,
+    parse_executor: Executor | None = None,
+    collect_references: bool = False,
+    pool: TaskPool | None = None,
+) -> list[FunctionResult]:
+    """Analyze `py_file`, reusing the verdicts of the result cache that are still valid.
+
+    When `function_names` is given only those functions are reported, and the partial results are not
+    stored in the cache. When `parse_executor` is given the file is parsed there, so that parsing of
+    several files is not serialized by the GIL. When `pool` is given, the call runs in it and may share
+    its usage search with the idle workers.
+    """
+    cached_results, stale_names = result_cache.lookup(py_file=py_file) if result_cache else ([], None)
+    if function_names is not None:
+        cached_results = [result for result in cached_results if result.name in function_names]
+        stale_names = function_names if stale_names is None else stale_names & function_names
+
+    if stale_names is not None and not stale_names:
+        LOGGER.debug(f"Reusing cached results for {py_file}")
+        return cached_results
+
+    records: list[FunctionRecord] | None = None
+    if (parse_executor or _WARM_STATE.enabled) and os.path.basename(py_file) not in file_ignore_list:
+        with PROFILER.phase(phase=PARSE_PHASE):
+            records = _WARM_STATE.records(py_file=py_file, extract=partial(_extract_records, py_file, parse_executor))
+
+    results = analyze_file(
+        py_file=py_file,
+        func_ignore_prefix=func_ignore_prefix,
+        file_ignore_list=file_ignore_list,
+        usage_search=usage_search,
+        function_names=stale_names,
+        records=records,
+        collect_references=collect_references,
+        pool=pool,
+    )
+    results = sorted(cached_results + results, key=lambda result: result.lineno)
+    if result_cache and function_names is None:
+        result_cache.store(py_file=py_file, results=results)
+    return results
 
 
 @click.command()
@@ -609,6 +1216,97 @@ def process_file(py_file: str, func_ignore_prefix: list[str], file_ignore_list:
     help="Analyze all Python files in a directory recursively for unused functions. Must be an existing directory.",
     type=click.Path(exists=True, dir_okay=True),
 )
+@click.option(
+    "--engine",
+    help="Usage search engine: `grep` runs git grep per query, `index` tokenizes the repository once and "
+    "answers every query from memory, `python` searches memory-mapped files in process and also works "
+    "outside of a git repository.",
+    type=click.Choice([GREP_ENGINE, INDEX_ENGINE, PYTHON_ENGINE]),
+)
+@click.option(
+    "--cache",
+    help="Reuse the results of previous runs for functions whose files and evidence are unchanged.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--cache-dir",
+    help="Directory of the result cache (implies --cache). Defaults to `.git/pyutils-unusedcode`.",
+    type=click.Path(file_okay=False),
+)
+@click.option(
+    "--since",
+    help="Only analyze functions defined in Python files changed since this git ref, and functions "
+    "whose references were removed since it (e.g. `origin/main` for a pull request).",
+)
+@click.option(
+    "--jobs",
+    "-j",
+    help="Number of worker processes parsing files and of threads resolving usages. "
+    "Defaults to the number of CPUs for parsing, and to the thread pool default for usages; "
+    "at most one git command per CPU runs at once.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--git-timeout",
+    help="Seconds after which a git command is killed, failing the analysis of its file. No limit by default.",
+    type=click.FloatRange(min=0, min_open=True),
+)
+@click.option(
+    "--format",
+    "output_format",
+    help="Output format of the unused functions.",
+    type=click.Choice([TEXT_FORMAT, JSONL_FORMAT, SARIF_FORMAT]),
+    default=TEXT_FORMAT,
+    show_default=True,
+)
+@click.option(
+    "--stream",
+    help="Print unused functions as soon as each file is analyzed, instead of sorted at the end "
+    "(text and jsonl formats).",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--fail-fast",
+    help="Stop at the first unused function: cancel pending files and kill running git processes.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--transitive",
+    help="Also report functions only used by unused functions, over a reference graph of the whole "
+    "repository. Cannot be combined with --file-path, --since or --fail-fast, and disables the result cache.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--watch",
+    help="After the analysis, keep polling the repository and print the functions that become unused (+) or "
+    "are no longer unused (-) as files change, re-analyzing only the affected functions.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--watch-interval",
+    help="Seconds between two polls of the repository in --watch mode.",
+    type=click.FloatRange(min=0, min_open=True),
+    default=1.0,
+    show_default=True,
+)
+@click.option(
+    "--profile",
+    help="Print a breakdown of the time spent in each phase, and the slowest files and functions, to stderr.",
+    is_flag=True,
+    default=False,
+)
+@click.option(
+    "--profile-top",
+    help="Number of slowest files and functions listed by --profile.",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+)
 def get_unused_functions(
     config_file_path: str,
     exclude_files: list[str],
@@ -616,6 +1314,20 @@ def get_unused_functions(
     verbose: bool,
     file_path: click.Path,
     directory: click.Path,
+    engine: str | None,
+    cache: bool,
+    cache_dir: str | None,
+    since: str | None,
+    jobs: int | None,
+    git_timeout: float | None,
+    output_format: str,
+    stream: bool,
+    fail_fast: bool,
+    transitive: bool,
+    watch: bool,
+    watch_interval: float,
+    profile: bool,
+    profile_top: int,
 ) -> None:
     LOGGER.setLevel(logging.DEBUG if verbose else logging.INFO)
 
@@ -627,60 +1339,220 @@ def get_unused_functions(
         LOGGER.error("Directory must be a directory, not a file.")
         sys.exit(1)
 
-    unused_functions: list[str] = []
+    reporter = FindingsReporter(output_format=output_format, stream=stream)
     unused_code_config = get_util_config(util_name="pyutils-unusedcode", config_file_path=config_file_path)
     func_ignore_prefix = exclude_function_prefixes or unused_code_config.get("exclude_function_prefix", [])
     file_ignore_list = exclude_files or unused_code_config.get("exclude_files", [])
-
-    jobs: dict[Future, str] = {}
-    if not os.path.exists(".git"):
+    engine = engine or unused_code_config.get("engine", GREP_ENGINE)
+    try:
+        search_scope = SearchScope.from_config(config=unused_code_config.get(SEARCH_SCOPE_CONFIG_KEY) or {})
+    except (TypeError, ValueError) as exc:
+        LOGGER.error(f"Invalid config: {exc}")
+        sys.exit(1)
+    usage_search = _WARM_STATE.usage_search(engine=engine, search_scope=search_scope)
+    if not _WARM_STATE.enabled:
+        _FUNCTION_RECORDS_CACHE.cache_clear()
+        _PARSE_WORKERS_RECORDS_CACHE.reset()
+        CLASSIFICATION_CACHE.cache_clear()
+    GIT_RUNNER.reset()
+    GIT_RUNNER.timeout = git_timeout or unused_code_config.get("git_timeout")
+    PROFILER.reset(enabled=profile)
+
+    cache_dir = cache_dir or unused_code_config.get("cache_dir")
+    use_cache = bool(cache or cache_dir or unused_code_config.get("cache"))
+    if transitive:
+        if file_path or since or fail_fast:
+            LOGGER.error(
+                "--transitive analyzes the whole repository, it cannot be combined with --file-path, --since or --fail-fast"
+            )
+            sys.exit(1)
+
+        if use_cache:
+            # Cached verdicts do not hold the references the graph needs
+            LOGGER.warning("The result cache is not used with --transitive")
+            use_cache = False
+
+    if watch:
+        if since or transitive or fail_fast or output_format == SARIF_FORMAT:
+            LOGGER.error("--watch cannot be combined with --since, --transitive, --fail-fast or --format sarif")
+            sys.exit(1)
+
+        if use_cache:
+            # Watch mode keeps its results in memory
+            LOGGER.warning("The result cache is not used with --watch")
+            use_cache = False
+    # Only the python engine can search a directory that is not a git repository
+    if (engine != PYTHON_ENGINE or use_cache or since) and not os.path.exists(".git"):
         LOGGER.error("Must be run from a git repository")
         sys.exit(1)
 
-    # Pre-flight grep flag detection to fail fast with clear error if unsupported
-    try:
-        detected_flag = _detect_supported_grep_flag()
-        LOGGER.debug(f"Using git grep flag: {detected_flag}")
-    except RuntimeError as e:
-        LOGGER.error(str(e))
-        sys.exit(1)
+    detected_flag: str | None = None
+    if engine == GREP_ENGINE:
+        # Pre-flight grep flag detection to fail fast with clear error if unsupported
+        try:
+            detected_flag = _detect_supported_grep_flag()
+            LOGGER.debug(f"Using git grep flag: {detected_flag}")
+        except RuntimeError as e:
+            LOGGER.error(str(e))
+            sys.exit(1)
+
+    result_cache: ResultCache | None = None
+    if use_cache:
+        git_root = os.getcwd()
+        result_cache = ResultCache.load(
+            git_root=git_root,
+            cache_dir=cache_dir or default_cache_dir(git_root=git_root),
+            settings={
+                "engine": engine,
+                "grep_flag": detected_flag,
+                "exclude_function_prefix": func_ignore_prefix,
+                "exclude_files": file_ignore_list,
+                SEARCH_SCOPE_CONFIG_KEY: search_scope.settings(),
+            },
+        )
 
-    if file_path:
-        _unused_functions = process_file(
-            py_file=str(file_path),
-            func_ignore_prefix=func_ignore_prefix,
-            file_ignore_list=file_ignore_list,
+    scope: dict[str, set[str] | None] | None = None
+    if since:
+        try:
+            scope = changed_scope(git_root=os.getcwd(), ref=since)
+        except RuntimeError as e:
+            LOGGER.error(str(e))
+            sys.exit(1)
+
+    if watch:
+        session = WatchSession(
+            python_files=lambda: [str(file_path)] if file_path else all_python_files(directory=directory),
+            analyze=lambda py_file, function_names: analyze_file(
+                py_file=py_file,
+                func_ignore_prefix=func_ignore_prefix,
+                file_ignore_list=file_ignore_list,
+                usage_search=usage_search,
+                function_names=function_names,
+            ),
+            refresh=usage_search.refresh,
+            jobs=jobs or unused_code_config.get("jobs"),
         )
-        if _unused_functions:
-            unused_functions.append(_unused_functions)
+        session.start()
+        reporter.add(results=session.unused())
+        reporter.finish()
+        watch_changes(
+            session=session,
+            watcher=TreeWatcher(root=os.getcwd(), search_scope=search_scope),
+            interval=watch_interval,
+            output_format=output_format,
+        )
+        sys.exit(1 if session.unused() else 0)
+
+    analyze_kwargs: dict[str, Any] = {
+        "func_ignore_prefix": func_ignore_prefix,
+        "file_ignore_list": file_ignore_list,
+        "usage_search": usage_search,
+        "result_cache": result_cache,
+        "collect_references": transitive,
+    }
+    jobs = jobs or unused_code_config.get("jobs")
+    if file_path:
+        if scope is None or (absolute_file_path := os.path.abspath(str(file_path))) in scope:
+            # The single file shares its usage search with the otherwise idle workers
+            with TaskPool(max_workers=jobs) as pool:
+                results = pool.submit(
+                    PROFILER.task(func=_analyze_file_with_cache, label=str(file_path)),
+                    py_file=str(file_path),
+                    function_names=scope[absolute_file_path] if scope is not None else None,
+                    pool=pool,
+                    **analyze_kwargs,
+                ).result()
+            reporter.add(results=results)
     else:
-        with ThreadPoolExecutor() as executor:
-            for py_file in all_python_files(directory=directory):
-                future = executor.submit(
-                    process_file,
+        parse_jobs = jobs or available_cpus()
+        # Spawned (not forked) workers, as the parent process is multi-threaded by then
+        parse_executor = (
+            ProcessPoolExecutor(max_workers=parse_jobs, mp_context=multiprocessing.get_context("spawn"))
+            if parse_jobs > 1
+            else None
+        )
+        analyze_kwargs["parse_executor"] = parse_executor
+        with TaskPool(max_workers=jobs) as pool:
+            # Files flow from discovery to the workers through a bounded window, so that the memory held
+            # does not grow with the size of the repository and results come as soon as files are analyzed
+            py_files: Iterable[str] = PROFILER.timed_iter(
+                phase=DISCOVERY_PHASE, iterable=all_python_files(directory=directory)
+            )
+            if scope is not None:
+                py_files = (py_file for py_file in py_files if os.path.abspath(py_file) in scope)
+
+            def submit(py_file: str) -> Future:
+                return pool.submit(
+                    PROFILER.task(func=_analyze_file_with_cache, label=py_file),
                     py_file=py_file,
-                    func_ignore_prefix=func_ignore_prefix,
-                    file_ignore_list=file_ignore_list,
+                    function_names=scope[os.path.abspath(py_file)] if scope is not None else None,
+                    pool=pool,
+                    **analyze_kwargs,
                 )
-                jobs[future] = py_file
 
+            # Looking further ahead than the window would delay the first results until more files are discovered
+            window = IN_FLIGHT_FILES_PER_WORKER * pool.max_workers
+            completed = bounded_as_completed(
+                items=largest_first(paths=py_files, lookahead=window), submit=submit, window=window
+            )
             processing_errors: list[str] = []
-            for future in as_completed(jobs):
+            analyzed: list[FunctionResult] = []
+            for py_file, future in completed:
                 try:
-                    if unused_func := future.result():
-                        unused_functions.append(unused_func)
+                    results = future.result()
                 except Exception as exc:  # noqa: BLE001
-                    processing_errors.append(f"{jobs[future]}: {exc}")
+                    processing_errors.append(f"{py_file}: {exc}")
+                    continue
+
+                if transitive:
+                    # Reported once the reference graph of all the files is complete
+                    analyzed.extend(results)
+                    continue
+
+                reporter.add(results=results)
+                if fail_fast and reporter.found:
+                    LOGGER.debug("Found an unused function, cancelling the remaining files")
+                    GIT_RUNNER.kill_all()
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    if parse_executor:
+                        parse_executor.shutdown(wait=False, cancel_futures=True)
+                    # Failures of the cancelled files are expected
+                    processing_errors = []
+                    # Stop the discovery of the files not submitted yet
+                    completed.close()
+                    break
+
+            if parse_executor:
+                parse_executor.shutdown()
 
             if processing_errors:
                 joined = "\n".join(processing_errors)
                 LOGGER.error(f"One or more files failed to process:\n{joined}")
                 sys.exit(2)
 
-    if unused_functions:
-        # Sort output for deterministic CI logs
-        sorted_output = sorted(unused_functions)
-        click.echo("\n".join(sorted_output))
+            if transitive:
+                unreachable = ReferenceGraph(results=analyzed).mark_unreachable()
+                LOGGER.debug(f"Reference graph: {len(unreachable)} functions only used by unused functions")
+                reporter.add(results=analyzed)
+
+        # The cancelled threads are done by now, other callers of the runner may start commands again
+        GIT_RUNNER.resume()
+
+    if result_cache:
+        result_cache.save()
+
+    # Records are extracted in the parse worker processes, or in this one
+    LOGGER.debug(
+        f"Function records cache: {_FUNCTION_RECORDS_CACHE.hits + _PARSE_WORKERS_RECORDS_CACHE.hits} hits, "
+        f"{_FUNCTION_RECORDS_CACHE.misses + _PARSE_WORKERS_RECORDS_CACHE.misses} misses"
+    )
+    LOGGER.debug(f"git: {GIT_RUNNER.spawned} processes, {GIT_RUNNER.seconds:.2f}s")
+
+    reporter.finish()
+    if profile:
+        click.echo(PROFILER.report(top=profile_top), err=True)
+
+    if reporter.found:
         sys.exit(1)
 
 
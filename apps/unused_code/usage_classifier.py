@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import bisect
+import re
+from array import array
+from collections import defaultdict
+from dataclasses import dataclass
+from itertools import accumulate
+
+from apps.unused_code.file_cache import FileCache
+from apps.unused_code.identifier_index import BINARY_PROBE_SIZE, WORD_RE
+
+CODE = "code"
+STRING = "string"
+COMMENT = "comment"
+DOCSTRING = "docstring"
+IMPORT = "import"
+# Occurrences that make a function used; names in string literals are kept as usages (`__all__`,
+# `mocker.patch("module.name")`, string dispatch tables...)
+USAGE_KINDS = frozenset({CODE, STRING})
+CLASSIFICATION_CACHE_SIZE = 512
+
+# Only strings and comments are matched; the code between them is only scanned for brackets and newlines
+# with str methods. The stdlib tokenize module is pure Python before 3.12, and tokenizing every
+# referencing file with it doubled run times.
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<comment>\#[^\n]*)
+    | (?P<string>
+        '''[^'\\]*(?:(?:\\.|'(?!''))[^'\\]*)*'''
+        | \"\"\"[^"\\]*(?:(?:\\.|"(?!""))[^"\\]*)*\"\"\"
+        | '[^'\\\n]*(?:\\.[^'\\\n]*)*'
+        | "[^"\\\n]*(?:\\.[^"\\\n]*)*"
+    )
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+_STRING_PREFIX_CHARACTERS = "rRbBuUfF"
+# Import statements start a line, or follow a `;` or the `:` of a one-line compound statement
+_IMPORT_RE = re.compile(
+    r"(?:^|[:;])[ \t]*(?P<statement>from[ \t]+[\w.]+[ \t]+import\b|import[ \t]+[\w.])", re.MULTILINE
+)
+_IMPORT_END_RE = re.compile(r"[()#;\n]")
+
+Spans = dict[int, list[tuple[int, int, str]]]
+
+
+@dataclass(frozen=True, slots=True)
+class Classification:
+    """Token kinds of a Python source, looked up by line and column.
+
+    `spans` maps line numbers to the ``(start column, end column, kind)`` spans of the parts of the
+    source that are not code; anything outside of a span is ``code``. An end column of -1 spans to the
+    end of the line.
+    """
+
+    spans: Spans
+    text: str
+    line_starts: array
+
+    def line(self, line_number: int) -> str | None:
+        if not 0 < line_number <= len(self.line_starts):
+            return None
+
+        start = self.line_starts[line_number - 1]
+        end = self.line_starts[line_number] - 1 if line_number < len(self.line_starts) else len(self.text)
+        return self.text[start:end].rstrip("\r")
+
+    def occurrence_kinds(self, line_number: int, line: str, name: str) -> list[str] | None:
+        """Return the kind of each whole-word occurrence of `name` in `line`, the content of line `line_number`.
+
+        Returns None when `line` is not the content of that line, e.g. when the file changed since it was
+        searched.
+        """
+        if self.line(line_number=line_number) != line.rstrip("\r"):
+            return None
+
+        line_spans = self.spans.get(line_number, [])
+        return [
+            _kind_at(spans=line_spans, column=match.start())
+            for match in WORD_RE.finditer(line)
+            if match.group() == name
+        ]
+
+
+def _kind_at(spans: list[tuple[int, int, str]], column: int) -> str:
+    for start_col, end_col, kind in spans:
+        if start_col <= column and (end_col == -1 or column < end_col):
+            return kind
+    return CODE
+
+
+def _import_end(text: str, position: int) -> int:
+    """Return the end of the import statement going on at `position` of `text`.
+
+    The statement ends at the first `;`, comment or newline outside of parentheses, escaped newlines aside.
+    """
+    depth = 0
+    while (match := _IMPORT_END_RE.search(text, position)) is not None:
+        char, position = match.group(), match.end()
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0 and (char in ";#" or not text.endswith("\\", 0, match.start())):
+            return match.start()
+        elif char == "#" and (position := text.find("\n", position)) == -1:
+            # A comment in the parentheses of the last line
+            break
+    return len(text)
+
+
+def _bracket_depth_change(code: str) -> int:
+    return code.count("(") + code.count("[") + code.count("{") - code.count(")") - code.count("]") - code.count("}")
+
+
+class _Lexer:
+    """Single pass over the strings and comments of a source, following logical lines in between."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.spans: Spans = defaultdict(list)
+        self.line_starts = array("L", [0])
+        for line_start in accumulate(len(line) + 1 for line in text.split("\n")[:-1]):
+            self.line_starts.append(line_start)
+        # Logical lines only end on newlines outside of brackets
+        self.depth = 0
+        # Whether the current logical line only holds string literals so far, and their offsets
+        self.only_strings = True
+        self.pending_strings: list[tuple[int, int]] = []
+
+    def add_span(self, start: int, end: int, kind: str) -> None:
+        start_row = bisect.bisect_right(self.line_starts, start)
+        end_row = bisect.bisect_right(self.line_starts, end, lo=start_row - 1)
+        start_col, end_col = start - self.line_starts[start_row - 1], end - self.line_starts[end_row - 1]
+        for row in range(start_row, end_row + 1):
+            self.spans[row].append((start_col if row == start_row else 0, end_col if row == end_row else -1, kind))
+
+    def kind_at(self, offset: int) -> str:
+        row = bisect.bisect_right(self.line_starts, offset)
+        return _kind_at(spans=self.spans.get(row, []), column=offset - self.line_starts[row - 1])
+
+    def flush_strings(self, kind: str) -> None:
+        for start, end in self.pending_strings:
+            self.add_span(start=start, end=end, kind=kind)
+        self.pending_strings = []
+
+    def code(self, start: int, end: int) -> None:
+        """Follow the logical lines through the code between two tokens."""
+        gap = self.text[start:end]
+        first_newline = gap.find("\n")
+        if (head := (gap if first_newline == -1 else gap[:first_newline]).strip()) and head != "\\":
+            self.only_strings = False
+            self.flush_strings(kind=STRING)
+        elif first_newline != -1 and head != "\\":
+            # A logical line made of string literals only is a docstring, or a string used as a comment
+            self.flush_strings(kind=DOCSTRING)
+
+        self.depth = max(self.depth + _bracket_depth_change(code=gap), 0)
+        if first_newline != -1:
+            last_newline = gap.rfind("\n")
+            self.only_strings = (
+                self.depth == 0 and not gap[last_newline + 1 :].strip() and not gap.endswith("\\", 0, last_newline)
+            )
+
+    def string_start(self, quote: int, previous_end: int) -> int:
+        """Return the offset of the prefix (``r``, ``f``, ``rb``...) of the string starting with a quote at `quote`."""
+        start = quote
+        while start > max(previous_end, quote - 2) and self.text[start - 1] in _STRING_PREFIX_CHARACTERS:
+            start -= 1
+        if start != quote and start > previous_end and (self.text[start - 1].isalnum() or self.text[start - 1] == "_"):
+            # The end of an identifier
+            return quote
+        return start
+
+    def run(self) -> Classification:
+        previous_end = 0
+        for match in _TOKEN_RE.finditer(self.text):
+            start, end = match.span()
+            if match.lastgroup == "string":
+                start = self.string_start(quote=start, previous_end=previous_end)
+            self.code(start=previous_end, end=start)
+            previous_end = end
+            if match.lastgroup == "comment":
+                self.add_span(start=start, end=end, kind=COMMENT)
+            elif self.only_strings:
+                self.pending_strings.append((start, end))
+            else:
+                self.add_span(start=start, end=end, kind=STRING)
+
+        self.code(start=previous_end, end=len(self.text))
+        self.flush_strings(kind=DOCSTRING)
+        # Added last, so that the spans of strings (e.g. examples in docstrings) take precedence
+        for match in _IMPORT_RE.finditer(self.text):
+            start = match.start("statement")
+            if self.kind_at(offset=start) == CODE:
+                self.add_span(start=start, end=_import_end(text=self.text, position=match.end()), kind=IMPORT)
+        return Classification(spans=dict(self.spans), text=self.text, line_starts=self.line_starts)
+
+
+def classify_source(text: str) -> Classification:
+    """Classify the tokens of a Python source.
+
+    Kinds are ``docstring`` (statements made of string literals only), ``string``, ``comment`` and
+    ``import`` (whole import statements). Sources with syntax errors are classified as far as possible.
+    """
+    return _Lexer(text=text).run()
+
+
+def _classify(file_path: str) -> Classification | None:
+    try:
+        with open(file_path, "rb") as fd:
+            data = fd.read()
+    except OSError:
+        return None
+
+    if b"\0" in data[:BINARY_PROBE_SIZE]:
+        return None
+
+    return classify_source(text=data.decode("utf-8", errors="replace"))
+
+
+CLASSIFICATION_CACHE: FileCache[Classification | None] = FileCache(compute=_classify, maxsize=CLASSIFICATION_CACHE_SIZE)
+
+
+def classify_file(file_path: str) -> Classification | None:
+    """Classify the tokens of a Python file, once while it is unchanged.
+
+    Returns None for files that are not Python files, or that cannot be read.
+    """
+    if not file_path.endswith(".py"):
+        return None
+
+    try:
+        return CLASSIFICATION_CACHE(file_path=file_path)
+    except OSError:
+        return None
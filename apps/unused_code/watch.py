@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from simple_logger.logger import get_logger
+
+from apps.unused_code.identifier_index import words_in_files
+from apps.unused_code.records import FunctionResult
+from apps.unused_code.reporting import TEXT_FORMAT, format_change
+from apps.unused_code.search_scope import DEFAULT_SEARCH_SCOPE, SearchScope, list_searchable_files
+
+LOGGER = get_logger(name=__name__)
+
+
+def _result_key(result: FunctionResult) -> tuple[str, str, int]:
+    return os.path.realpath(result.py_file), result.name, result.lineno
+
+
+class TreeWatcher:
+    """Detect modified, added and deleted files by polling the searchable files of a tree.
+
+    The files are listed like the usage search engines list them (tracked and untracked, non-ignored
+    files in a git work tree, within `search_scope`), and compared by modification time and size.
+    """
+
+    def __init__(self, root: str, search_scope: SearchScope = DEFAULT_SEARCH_SCOPE) -> None:
+        # Resolved like the git root of the usage search engines, so that paths compare equal to evidence paths
+        self.root = os.path.realpath(root)
+        self.search_scope = search_scope
+        self._stats = self._snapshot()
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        stats: dict[str, tuple[int, int]] = {}
+        for relative_path in list_searchable_files(root=self.root, search_scope=self.search_scope):
+            path = os.path.join(self.root, relative_path)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (stat.st_mtime_ns, stat.st_size)
+        return stats
+
+    def poll(self) -> set[str]:
+        """Return the absolute paths of the files changed since the previous poll."""
+        stats = self._snapshot()
+        changed = {path for path in stats.keys() | self._stats.keys() if stats.get(path) != self._stats.get(path)}
+        self._stats = stats
+        return changed
+
+
+class WatchSession:
+    """The unused functions of a tree, kept up to date incrementally.
+
+    After the initial analysis only the affected functions are analyzed again on each change, as with the
+    result cache: every function of a changed Python file, functions whose name appears in a changed file
+    (they may have gained a usage), and functions whose verdict was decided by a changed file (they may
+    have lost it).
+
+    Args:
+        python_files: Return the Python files to analyze.
+        analyze: Analyze a Python file, restricted to the given function names if not None.
+        refresh: Update the usage search state after the given absolute paths changed.
+        jobs: Number of threads of the initial analysis.
+    """
+
+    def __init__(
+        self,
+        python_files: Callable[[], Iterable[str]],
+        analyze: Callable[[str, set[str] | None], list[FunctionResult]],
+        refresh: Callable[[set[str]], None],
+        jobs: int | None = None,
+    ) -> None:
+        self.python_files = python_files
+        self.analyze = analyze
+        self.refresh = refresh
+        self.jobs = jobs
+        self.results: dict[str, list[FunctionResult]] = {}
+
+    def _analyze(self, py_file: str, function_names: set[str] | None) -> list[FunctionResult] | None:
+        try:
+            return self.analyze(py_file, function_names)
+        except Exception as exc:  # noqa: BLE001
+            # Typically a file saved in the middle of an edit; it is analyzed again on its next change
+            LOGGER.error(f"{py_file}: {exc}")
+            return None
+
+    def unused(self) -> list[FunctionResult]:
+        return [result for results in self.results.values() for result in results if not result.used]
+
+    def start(self) -> None:
+        py_files = list(self.python_files())
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            for py_file, results in zip(py_files, executor.map(lambda py_file: self._analyze(py_file, None), py_files)):
+                self.results[os.path.realpath(py_file)] = results or []
+
+    def update(self, changed_files: set[str]) -> tuple[list[FunctionResult], list[FunctionResult]]:
+        """Analyze again what `changed_files` may affect; return the newly unused and no longer unused functions."""
+        before = {_result_key(result=result): result for result in self.unused()}
+        self.refresh(changed_files)
+        changed_words = words_in_files(paths=changed_files)
+
+        py_files = {os.path.realpath(py_file): py_file for py_file in self.python_files()}
+        for deleted in self.results.keys() - py_files.keys():
+            del self.results[deleted]
+
+        for absolute_path, py_file in py_files.items():
+            if absolute_path in changed_files or absolute_path not in self.results:
+                if (results := self._analyze(py_file, None)) is not None:
+                    self.results[absolute_path] = results
+                else:
+                    self.results.setdefault(absolute_path, [])
+                continue
+
+            previous = self.results[absolute_path]
+            stale = {
+                result.name
+                for result in previous
+                if result.name in changed_words or not result.evidence.isdisjoint(changed_files)
+            }
+            if stale and (stale_results := self._analyze(py_file, stale)) is not None:
+                results = [result for result in previous if result.name not in stale] + stale_results
+                self.results[absolute_path] = sorted(results, key=lambda result: result.lineno)
+
+        after = {_result_key(result=result): result for result in self.unused()}
+        added = [result for key, result in after.items() if key not in before]
+        removed = [result for key, result in before.items() if key not in after]
+        return added, removed
+
+
+def watch_changes(
+    session: WatchSession, watcher: TreeWatcher, interval: float, output_format: str = TEXT_FORMAT
+) -> None:
+    """Poll `watcher` every `interval` seconds and print the changes of the unused functions, until interrupted."""
+    LOGGER.info(f"Watching {watcher.root} for changes, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(interval)
+            if not (changed_files := watcher.poll()):
+                continue
+
+            started = time.perf_counter()
+            added, removed = session.update(changed_files=changed_files)
+            for result in removed:
+                click.echo(format_change(result=result, added=False, output_format=output_format))
+            for result in added:
+                click.echo(format_change(result=result, added=True, output_format=output_format))
+            LOGGER.info(
+                f"{len(changed_files)} changed files analyzed in {(time.perf_counter() - started) * 1000:.0f}ms: "
+                f"{len(added)} newly unused, {len(removed)} no longer unused functions"
+            )
+    except KeyboardInterrupt:
+        LOGGER.info("Stopped watching")
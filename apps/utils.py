@@ -1,9 +1,14 @@
 from __future__ import annotations
 
+import contextlib
 import json
 import os
-from collections.abc import Iterable
-from typing import Any
+import subprocess
+import threading
+import time
+from collections.abc import Callable, Generator, Iterable
+from functools import partial
+from typing import IO, Any
 
 import click
 import yaml
@@ -74,16 +79,267 @@ class ListParamType(click.ParamType):
                 )
 
 
-def all_python_files(directory: click.Path | None = None) -> Iterable[str]:
+def available_cpus() -> int:
+    """Return the number of CPUs this process may run on, which can be less than the machine's in containers."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+class GitRunner:
+    """Run git commands for every tool, with a bounded number of processes in flight.
+
+    - At most `max_processes` commands run at once, one per available CPU by default; callers block until
+      a slot is free, so that thread pools do not oversubscribe the CPUs with git processes.
+    - Each command is killed after the timeout given for the call, or `timeout` seconds; no limit if neither.
+    - `grep_threads` splits the CPUs between the ``git grep`` processes in flight, for ``--threads``.
+    - `spawned` and `seconds` count the processes started and the time they ran, since the last `reset`.
+    - After `kill_all`, starting a new command raises RuntimeError until the runner is resumed or `reset`.
     """
-    Get all python files from current directory and subdirectories
+
+    def __init__(self, max_processes: int | None = None, timeout: float | None = None) -> None:
+        self.max_processes = max_processes or available_cpus()
+        self.timeout = timeout
+        self.spawned = 0
+        self.seconds = 0.0
+        self._slots = threading.BoundedSemaphore(self.max_processes)
+        self._processes: set[subprocess.Popen] = set()
+        self._killed = False
+        self._lock = threading.Lock()
+
+    def grep_threads(self) -> int:
+        """Return the ``git grep --threads`` value sharing the CPUs with the other commands in flight."""
+        with self._lock:
+            in_flight = len(self._processes)
+        return max(1, available_cpus() // (in_flight + 1))
+
+    def _start(self, cmd: list[str], cwd: str | None, **kwargs: Any) -> subprocess.Popen:
+        with self._lock:
+            if self._killed:
+                raise RuntimeError(f"Not running {cmd[:2]}: the run was cancelled")
+
+            process = subprocess.Popen(cmd, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **kwargs)
+            self._processes.add(process)
+            self.spawned += 1
+        return process
+
+    def _finish(self, process: subprocess.Popen, started: float) -> None:
+        with self._lock:
+            self._processes.discard(process)
+            self.seconds += time.monotonic() - started
+
+    @contextlib.contextmanager
+    def _slotted(
+        self, args: list[str], cwd: str | None, timeout: float | None, **kwargs: Any
+    ) -> Generator[subprocess.Popen, None, None]:
+        """Start ``git <args>`` in a slot, in text mode; the process is killed on timeout or if the block fails."""
+        timeout = timeout or self.timeout
+        with self._slots:
+            started = time.monotonic()
+            process = self._start(cmd=["git", *args], cwd=cwd, text=True, errors="replace", **kwargs)
+            # A timer kills the process, as communicate() with a timeout polls the process with sleeps
+            timed_out = threading.Event()
+
+            def expire() -> None:
+                timed_out.set()
+                process.kill()
+
+            timer = threading.Timer(interval=timeout, function=expire) if timeout else None
+            if timer:
+                timer.start()
+            try:
+                with process:
+                    try:
+                        yield process
+                    except BaseException:
+                        process.kill()
+                        raise
+            finally:
+                if timer:
+                    timer.cancel()
+                self._finish(process=process, started=started)
+        if timed_out.is_set():
+            raise RuntimeError(f"git {args[0]} timed out after {timeout:g}s in {cwd or os.getcwd()}")
+
+    def run(
+        self, args: list[str], cwd: str | None = None, input_text: str | None = None, timeout: float | None = None
+    ) -> subprocess.CompletedProcess:
+        """Run ``git <args>`` and return the completed process, whatever its return code.
+
+        Raises:
+            RuntimeError: If the runner was killed, or the command timed out.
+        """
+        stdin = subprocess.DEVNULL if input_text is None else subprocess.PIPE
+        with self._slotted(args=args, cwd=cwd, timeout=timeout, stdin=stdin) as process:
+            stdout, stderr = process.communicate(input=input_text)
+        return subprocess.CompletedProcess(
+            args=process.args, returncode=process.returncode, stdout=stdout, stderr=stderr
+        )
+
+    def run_until(
+        self, args: list[str], stop_when: Callable[[str], bool], cwd: str | None = None, timeout: float | None = None
+    ) -> subprocess.CompletedProcess:
+        """Run ``git <args>``, reading its output line by line until `stop_when` returns True for a line.
+
+        The process is killed as soon as `stop_when` returns True; its output then ends with that line, and
+        its return code is 0.
+
+        Raises:
+            RuntimeError: If the runner was killed, or the command timed out.
+        """
+        with self._slotted(args=args, cwd=cwd, timeout=timeout, stdin=subprocess.DEVNULL) as process:
+            assert process.stdout is not None and process.stderr is not None
+            # stderr is drained meanwhile, so that git never blocks on a full stderr pipe
+            stderr_chunks: list[str] = []
+
+            def drain_stderr(stderr: IO[str]) -> None:
+                stderr_chunks.append(stderr.read())
+
+            drain = threading.Thread(target=drain_stderr, args=(process.stderr,), daemon=True)
+            drain.start()
+            lines: list[str] = []
+            stopped = False
+            for line in process.stdout:
+                lines.append(line)
+                if stop_when(line.rstrip("\n")):
+                    stopped = True
+                    process.kill()
+                    break
+
+            drain.join()
+            returncode = 0 if stopped else process.wait()
+        return subprocess.CompletedProcess(
+            args=process.args, returncode=returncode, stdout="".join(lines), stderr="".join(stderr_chunks)
+        )
+
+    def output(
+        self,
+        args: list[str],
+        cwd: str | None = None,
+        input_text: str | None = None,
+        returncodes: tuple[int, ...] = (0,),
+        timeout: float | None = None,
+    ) -> str:
+        """Run ``git <args>`` and return its output.
+
+        Raises:
+            RuntimeError: If the return code is not one of `returncodes`, or the command did not complete.
+        """
+        result = self.run(args=args, cwd=cwd, input_text=input_text, timeout=timeout)
+        if result.returncode not in returncodes:
+            error_message = result.stderr.strip() or f"Unknown git {args[0]} error"
+            raise RuntimeError(
+                f"git {args[0]} failed (rc={result.returncode}) in {cwd or os.getcwd()}: {error_message}"
+            )
+        return result.stdout
+
+    @contextlib.contextmanager
+    def stream(self, args: list[str], cwd: str | None = None) -> Generator[subprocess.Popen, None, None]:
+        """Start ``git <args>`` with binary stdout and stderr pipes, for callers consuming its output as it comes.
+
+        Streamed commands are counted but do not take a slot: their consumer may itself wait on commands
+        needing one.
+        """
+        started = time.monotonic()
+        process = self._start(cmd=["git", *args], cwd=cwd, stdin=subprocess.DEVNULL)
+        try:
+            with process:
+                yield process
+        finally:
+            self._finish(process=process, started=started)
+
+    def kill_all(self) -> None:
+        with self._lock:
+            self._killed = True
+            for process in self._processes:
+                process.kill()
+
+    def resume(self) -> None:
+        """Allow starting commands again after `kill_all`."""
+        with self._lock:
+            self._killed = False
+
+    def reset(self) -> None:
+        with self._lock:
+            self._killed = False
+            self.spawned = 0
+            self.seconds = 0.0
+
+
+GIT_RUNNER = GitRunner()
+
+
+PYTHON_FILES_EXCLUDE_DIRS = [".tox", "venv", ".pytest_cache", "site-packages", ".git"]
+
+
+def _is_excluded_dir(name: str) -> bool:
+    """Return True if the python files under a directory called `name` are not listed.
+
+    Directories match by their whole name, never by a part of it (`venv` does not exclude `myvenv`).
     """
-    exclude_dirs = [".tox", "venv", ".pytest_cache", "site-packages", ".git"]
-    target = str(directory) if directory else os.path.abspath(os.curdir)
+    return name in PYTHON_FILES_EXCLUDE_DIRS
+
 
-    for root, _, files in os.walk(target):
-        if [_dir for _dir in exclude_dirs if _dir in root]:
-            continue
+def _git_python_files(target: str) -> Iterable[str]:
+    """Stream the tracked and untracked (non-ignored) python files under `target` from the git index.
+
+    Raises:
+        RuntimeError: If `target` is not inside a git work tree, or git fails.
+    """
+    args = ["ls-files", "-z", "--cached", "--others", "--exclude-standard", "--", "*.py"]
+    with GIT_RUNNER.stream(args=args, cwd=target) as process:
+        stdout, stderr = process.stdout, process.stderr
+        assert stdout is not None and stderr is not None  # both are pipes
+        seen: set[str] = set()
+        pending = b""
+        for chunk in iter(partial(stdout.read, 65536), b""):
+            *paths, pending = (pending + chunk).split(b"\0")
+            for raw_path in paths:
+                path = os.fsdecode(raw_path)
+                # --cached and --others may both list a file in the middle of a merge
+                if path in seen or any(_is_excluded_dir(name=part) for part in path.split("/")[:-1]):
+                    continue
+
+                seen.add(path)
+                full_path = os.path.join(target, path)
+                # Tracked files deleted from the work tree are still listed by --cached
+                if os.path.isfile(full_path):
+                    yield full_path
+
+        error_output = stderr.read()
+
+    if process.returncode != 0:
+        error_message = error_output.decode(errors="replace").strip() or "Unknown git ls-files error"
+        raise RuntimeError(f"git ls-files failed (rc={process.returncode}) in {target}: {error_message}")
+
+
+def _walk_python_files(target: str) -> Iterable[str]:
+    for root, dirs, files in os.walk(target):
+        # Prune the excluded trees with the rule of `_git_python_files`
+        dirs[:] = [_dir for _dir in dirs if not _is_excluded_dir(name=_dir)]
         for filename in files:
             if filename.endswith(".py"):
                 yield os.path.join(root, filename)
+
+
+def all_python_files(directory: click.Path | None = None) -> Iterable[str]:
+    """
+    Get all python files from current directory and subdirectories
+
+    Inside a git work tree, files are streamed from `git ls-files`, so files ignored by `.gitignore` are
+    skipped and excluded trees are never walked. Otherwise the directory tree is walked.
+    """
+    target = str(directory) if directory else os.path.abspath(os.curdir)
+
+    yielded = False
+    try:
+        for path in _git_python_files(target=target):
+            yielded = True
+            yield path
+        return
+    except (OSError, RuntimeError) as exc:
+        if yielded:
+            raise
+        LOGGER.debug(f"Listing python files with git failed, walking {target} instead: {exc}")
+
+    yield from _walk_python_files(target=target)
@@ -0,0 +1,66 @@
+import subprocess
+
+import pytest
+
+from apps.utils import all_python_files
+
+
+@pytest.fixture
+def project_tree(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "module.py").write_text("")
+    (tmp_path / "pkg" / "notes.txt").write_text("")
+    (tmp_path / "venv" / "lib").mkdir(parents=True)
+    (tmp_path / "venv" / "lib" / "vendored.py").write_text("")
+    (tmp_path / "top.py").write_text("")
+    return tmp_path
+
+
+def test_all_python_files_walks_outside_git(project_tree):
+    assert sorted(all_python_files(directory=str(project_tree))) == [
+        str(project_tree / "pkg" / "module.py"),
+        str(project_tree / "top.py"),
+    ]
+
+
+def test_all_python_files_uses_git_index(project_tree, mocker):
+    subprocess.run(["git", "init", "-q"], cwd=project_tree, check=True)
+    (project_tree / ".gitignore").write_text("ignored.py\nvenv/\n")
+    (project_tree / "ignored.py").write_text("")
+    (project_tree / "deleted.py").write_text("")
+    subprocess.run(["git", "add", "top.py", "deleted.py"], cwd=project_tree, check=True)
+    (project_tree / "deleted.py").unlink()
+    walk = mocker.patch("apps.utils.os.walk")
+
+    assert sorted(all_python_files(directory=str(project_tree))) == [
+        str(project_tree / "pkg" / "module.py"),
+        str(project_tree / "top.py"),
+    ]
+    walk.assert_not_called()
+
+
+def test_all_python_files_git_subdirectory(project_tree):
+    subprocess.run(["git", "init", "-q"], cwd=project_tree, check=True)
+    assert list(all_python_files(directory=str(project_tree / "pkg"))) == [str(project_tree / "pkg" / "module.py")]
+
+
+def test_all_python_files_git_skips_tracked_excluded_dirs(project_tree):
+    subprocess.run(["git", "init", "-q"], cwd=project_tree, check=True)
+    subprocess.run(["git", "add", "-f", "venv/lib/vendored.py"], cwd=project_tree, check=True)
+    assert str(project_tree / "venv" / "lib" / "vendored.py") not in all_python_files(directory=str(project_tree))
+
+
+@pytest.mark.parametrize("in_git", [True, False], ids=["git", "walk"])
+def test_all_python_files_excluded_dirs_match_whole_names(project_tree, in_git):
+    if in_git:
+        subprocess.run(["git", "init", "-q"], cwd=project_tree, check=True)
+    (project_tree / "myvenv").mkdir()
+    (project_tree / "myvenv" / "kept.py").write_text("")
+    (project_tree / "pkg" / ".tox" / "py3").mkdir(parents=True)
+    (project_tree / "pkg" / ".tox" / "py3" / "nested.py").write_text("")
+
+    assert sorted(all_python_files(directory=str(project_tree))) == [
+        str(project_tree / "myvenv" / "kept.py"),
+        str(project_tree / "pkg" / "module.py"),
+        str(project_tree / "top.py"),
+    ]
@@ -0,0 +1,115 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+from apps import utils
+from apps.utils import GitRunner
+
+
+@pytest.fixture
+def slow_git(tmp_path, monkeypatch):
+    """Put a `git` taking 30 seconds first in PATH."""
+    git = tmp_path / "bin" / "git"
+    git.parent.mkdir()
+    git.write_text("#!/bin/sh\nexec sleep 30\n")
+    git.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{git.parent}{os.pathsep}{os.environ['PATH']}")
+    return git
+
+
+def test_git_runner_output_and_counters(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    runner = GitRunner()
+    assert runner.output(args=["rev-parse", "--is-inside-work-tree"], cwd=str(tmp_path)) == "true\n"
+    assert runner.output(args=["grep", "-e", "missing"], cwd=str(tmp_path), returncodes=(0, 1)) == ""
+    with pytest.raises(RuntimeError, match=r"git grep failed \(rc=1\)"):
+        runner.output(args=["grep", "-e", "missing"], cwd=str(tmp_path))
+
+    assert runner.spawned == 3
+    assert runner.seconds > 0
+    runner.reset()
+    assert (runner.spawned, runner.seconds) == (0, 0.0)
+
+
+def test_git_runner_grep_threads(mocker):
+    mocker.patch.object(utils, "available_cpus", return_value=8)
+    runner = GitRunner()
+    assert runner.max_processes == 8
+    assert runner.grep_threads() == 8
+
+    runner._processes = {mocker.Mock(), mocker.Mock(), mocker.Mock()}
+    assert runner.grep_threads() == 2
+    runner._processes = {mocker.Mock() for _ in range(10)}
+    assert runner.grep_threads() == 1
+
+
+def test_git_runner_timeout(slow_git):
+    runner = GitRunner(timeout=0.2)
+    with pytest.raises(RuntimeError, match=r"timed out after 0\.2s"):
+        runner.run(args=["status"])
+    assert not runner._processes
+
+    # Commands have no time limit unless the runner or the call sets one
+    assert GitRunner().timeout is None
+    with pytest.raises(RuntimeError, match=r"timed out after 0\.1s"):
+        GitRunner().output(args=["status"], timeout=0.1)
+
+
+def test_git_runner_caps_processes_and_kills_them(slow_git):
+    runner = GitRunner(max_processes=1)
+    results, errors = [], []
+
+    def run() -> None:
+        try:
+            results.append(runner.run(args=["status"]))
+        except RuntimeError as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    while not runner._processes:
+        time.sleep(0.01)
+
+    # The second command waits for the slot of the first one
+    time.sleep(0.1)
+    assert runner.spawned == 1
+    runner.kill_all()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert runner.spawned == 1
+    assert results[0].returncode != 0
+    assert len(errors) == 1
+    with pytest.raises(RuntimeError, match="cancelled"):
+        runner.run(args=["status"])
+
+    runner.resume()
+    slow_git.write_text("#!/bin/sh\nexit 0\n")
+    assert runner.run(args=["status"]).returncode == 0
+    assert runner.spawned == 2
+
+
+def test_git_runner_run_until(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    (tmp_path / "lines.txt").write_text("".join(f"line {number}\n" for number in range(10000)))
+    runner = GitRunner()
+    args = ["grep", "--untracked", "-h", "-e", "line"]
+
+    result = runner.run_until(args=args, cwd=str(tmp_path), stop_when=lambda line: line == "line 2")
+    assert (result.returncode, result.stdout) == (0, "line 0\nline 1\nline 2\n")
+
+    result = runner.run_until(args=args, cwd=str(tmp_path), stop_when=lambda line: False)
+    assert (result.returncode, len(result.stdout.splitlines())) == (0, 10000)
+    result = runner.run_until(args=["grep", "-e", "missing"], cwd=str(tmp_path), stop_when=lambda line: True)
+    assert (result.returncode, result.stdout) == (1, "")
+    assert not runner._processes
+
+
+def test_git_runner_run_until_drains_stderr(slow_git):
+    # More than a pipe buffer of errors before the first line of output
+    slow_git.write_text("#!/bin/sh\nhead -c 1000000 /dev/zero | tr '\\0' e >&2\necho line 1\necho line 2\n")
+    result = GitRunner().run_until(args=["grep"], stop_when=lambda line: line == "line 1", timeout=10)
+    assert (result.returncode, result.stdout, len(result.stderr)) == (0, "line 1\n", 1000000)
@@ -0,0 +1,353 @@
+"""Benchmark pyutils-unusedcode on synthetic git repositories.
+
+The generated repositories follow the patterns of `tests/unused_code/manifests/`: plain calls, keyword
+unpacking (``**func()``), functions only mentioned in documentation, and pytest fixtures requested as
+parameters, with ``pytest.mark.usefixtures`` or with ``request.getfixturevalue``. A fraction of the
+functions and fixtures is left unused, and the benchmark checks that exactly those are reported.
+
+Every case runs in a fresh interpreter, so its peak RSS is its own, and reports:
+
+- wall time
+- the number of subprocesses started (``git grep``, ``git ls-files``...)
+- peak RSS, of the interpreter and of its largest child process (the parsing workers)
+
+With ``--parse-functions``, the parsers are also timed on one large generated module, with and without a
+``# skip-unused-code`` marker (only files with a marker are parsed with ast_comments).
+
+Usage, from the repository root::
+
+    python -m tests.unused_code.benchmark --files 200 --functions 20 --engine grep --engine index
+    python -m tests.unused_code.benchmark --files 0 --parse-functions 5000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Generator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+FUNCTION_KINDS = ("called", "kwargs", "documented", "unused")
+FIXTURE_KINDS = ("param", "usefixtures", "getfixturevalue", "unused")
+UNUSED_KINDS = {"documented", "unused"}
+
+
+@dataclass
+class BenchmarkConfig:
+    files: int = 20
+    functions_per_file: int = 10
+    fixture_ratio: float = 0.2
+    unused_ratio: float = 0.1
+    seed: int = 0
+
+
+@dataclass
+class SyntheticRepo:
+    root: str
+    python_files: list[str]
+    expected_unused: set[str] = field(default_factory=set)
+
+
+@dataclass
+class BenchmarkResult:
+    case: str
+    wall_time: float
+    subprocesses: int
+    peak_rss_mb: float
+    peak_child_rss_mb: float
+    findings: int
+    correct: bool
+
+
+@dataclass
+class ParserResult:
+    case: str
+    wall_time: float
+
+
+def _pick_kind(rng: random.Random, kinds: tuple[str, ...], unused_ratio: float) -> str:
+    if rng.random() < unused_ratio:
+        return rng.choice([kind for kind in kinds if kind in UNUSED_KINDS])
+    return rng.choice([kind for kind in kinds if kind not in UNUSED_KINDS])
+
+
+def _module_source(index: int, kinds: list[str]) -> str:
+    blocks = [f'"""Synthetic module {index}."""\n']
+    for position, kind in enumerate(kinds):
+        name = f"{kind}_{index}_{position}"
+        if kind == "kwargs":
+            blocks.append(f'def {name}():\n    return {{"value": {position}}}\n')
+        elif kind == "documented":
+            blocks.append(
+                f"def {name}(value):\n"
+                f'    """Return the value.\n\n    Args:\n        {name} (str): Only mentioned in documentation.\n    """\n'
+                "    return value\n"
+            )
+        else:
+            blocks.append(f"def {name}(value):\n    return value\n")
+    return "\n\n".join(blocks)
+
+
+def _conftest_source(index: int, kinds: list[str]) -> str:
+    blocks = ["import pytest\n"]
+    blocks.extend(
+        f'@pytest.fixture\ndef fixture_{kind}_{index}_{position}():\n    return "{kind}"\n'
+        for position, kind in enumerate(kinds)
+    )
+    return "\n\n".join(blocks)
+
+
+def _test_source(index: int, function_kinds: list[str], fixture_kinds: list[str]) -> str:
+    imports = ", ".join(
+        f"{kind}_{index}_{position}" for position, kind in enumerate(function_kinds) if kind in ("called", "kwargs")
+    )
+    blocks = ["import pytest\n" + (f"\nfrom lib.module_{index} import {imports}\n" if imports else "")]
+    for position, kind in enumerate(function_kinds):
+        name = f"{kind}_{index}_{position}"
+        if kind == "called":
+            blocks.append(f"def test_{name}():\n    assert {name}(1) == 1\n")
+        elif kind == "kwargs":
+            blocks.append(f"def test_{name}():\n    assert dict(**{name}())\n")
+
+    for position, kind in enumerate(fixture_kinds):
+        name = f"fixture_{kind}_{index}_{position}"
+        if kind == "param":
+            blocks.append(f"def test_{name}({name}):\n    assert {name}\n")
+        elif kind == "usefixtures":
+            blocks.append(f'@pytest.mark.usefixtures("{name}")\ndef test_{name}():\n    pass\n')
+        elif kind == "getfixturevalue":
+            blocks.append(f'def test_{name}(request):\n    assert request.getfixturevalue("{name}")\n')
+    return "\n\n".join(blocks)
+
+
+def generate_repo(root: str, config: BenchmarkConfig) -> SyntheticRepo:
+    """Generate a git repository of `config.files` library modules, each with a test directory."""
+    rng = random.Random(config.seed)
+    repo = SyntheticRepo(root=root, python_files=[])
+    fixtures_per_file = round(config.functions_per_file * config.fixture_ratio)
+
+    for index in range(config.files):
+        function_kinds = [
+            _pick_kind(rng=rng, kinds=FUNCTION_KINDS, unused_ratio=config.unused_ratio)
+            for _ in range(config.functions_per_file - fixtures_per_file)
+        ]
+        fixture_kinds = [
+            _pick_kind(rng=rng, kinds=FIXTURE_KINDS, unused_ratio=config.unused_ratio) for _ in range(fixtures_per_file)
+        ]
+        files = {
+            f"lib/module_{index}.py": _module_source(index=index, kinds=function_kinds),
+            f"tests/module_{index}/conftest.py": _conftest_source(index=index, kinds=fixture_kinds),
+            f"tests/module_{index}/test_module_{index}.py": _test_source(
+                index=index, function_kinds=function_kinds, fixture_kinds=fixture_kinds
+            ),
+        }
+        for relative_path, source in files.items():
+            path = Path(root, relative_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(source)
+            repo.python_files.append(str(path))
+
+        repo.expected_unused.update(
+            f"{kind}_{index}_{position}" for position, kind in enumerate(function_kinds) if kind in UNUSED_KINDS
+        )
+        repo.expected_unused.update(
+            f"fixture_{kind}_{index}_{position}" for position, kind in enumerate(fixture_kinds) if kind == "unused"
+        )
+
+    Path(root, "lib", "__init__.py").write_text("")
+    subprocess.run(["git", "init", "-q"], cwd=root, check=True)
+    subprocess.run(["git", "add", "."], cwd=root, check=True)
+    return repo
+
+
+@contextlib.contextmanager
+def count_subprocesses() -> Generator[list[int], None, None]:
+    """Count the `subprocess.Popen` instances created in the block (``subprocess.run`` included)."""
+    counter = [0]
+    original_init = subprocess.Popen.__init__
+
+    def counting_init(self: subprocess.Popen, *args: Any, **kwargs: Any) -> None:
+        counter[0] += 1
+        original_init(self, *args, **kwargs)
+
+    subprocess.Popen.__init__ = counting_init  # type: ignore[method-assign]
+    try:
+        yield counter
+    finally:
+        subprocess.Popen.__init__ = original_init  # type: ignore[method-assign]
+
+
+def _peak_rss_mb(who: int = resource.RUSAGE_SELF) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_process_file(repo: SyntheticRepo) -> set[str]:
+    from apps.unused_code.unused_code import process_file
+
+    findings: set[str] = set()
+    for py_file in repo.python_files:
+        if output := process_file(py_file=py_file, func_ignore_prefix=[], file_ignore_list=[]):
+            findings.update(line.split(":")[1] for line in output.splitlines())
+    return findings
+
+
+def _run_cli(repo: SyntheticRepo, args: list[str]) -> set[str]:
+    from apps.unused_code.unused_code import get_unused_functions
+
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout), contextlib.suppress(SystemExit):
+        get_unused_functions.main(args=["--config-file-path", "missing.yaml", *args], standalone_mode=False)
+    return {line.split(":")[1] for line in stdout.getvalue().splitlines()}
+
+
+def run_case(case: str, repo: SyntheticRepo, run: Callable[[], set[str]]) -> BenchmarkResult:
+    """Run one case in the current process, from the root of `repo`."""
+    os.chdir(repo.root)
+    with count_subprocesses() as subprocesses:
+        start = time.perf_counter()
+        findings = run()
+        wall_time = time.perf_counter() - start
+
+    return BenchmarkResult(
+        case=case,
+        wall_time=wall_time,
+        subprocesses=subprocesses[0],
+        peak_rss_mb=_peak_rss_mb(),
+        peak_child_rss_mb=_peak_rss_mb(who=resource.RUSAGE_CHILDREN),
+        findings=len(findings),
+        correct=findings == repo.expected_unused,
+    )
+
+
+def _run_case_by_name(case: str, repo: SyntheticRepo, cli_args: list[str]) -> BenchmarkResult:
+    if case == "process_file":
+        return run_case(case=case, repo=repo, run=lambda: _run_process_file(repo=repo))
+    return run_case(case=case, repo=repo, run=lambda: _run_cli(repo=repo, args=cli_args))
+
+
+def run_isolated(case: str, repo: SyntheticRepo, cli_args: list[str] | None = None) -> BenchmarkResult:
+    """Run one case in a fresh interpreter, so that its peak RSS is not shared with other cases."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return executor.submit(_run_case_by_name, case=case, repo=repo, cli_args=cli_args or []).result()
+
+
+def run_benchmark(config: BenchmarkConfig, engines: list[str], jobs: int | None = None) -> list[BenchmarkResult]:
+    with tempfile.TemporaryDirectory(prefix="unused-code-benchmark-") as root:
+        repo = generate_repo(root=root, config=config)
+        results = [run_isolated(case="process_file", repo=repo)]
+        for engine in engines:
+            cli_args = ["--engine", engine, *(["--jobs", str(jobs)] if jobs else [])]
+            results.append(run_isolated(case=f"get_unused_functions[{engine}]", repo=repo, cli_args=cli_args))
+        return results
+
+
+def large_module_source(functions: int, skip_marker: bool = False) -> str:
+    """Return a module of `functions` functions with comments, optionally with one skip marker."""
+    kinds = [FUNCTION_KINDS[position % len(FUNCTION_KINDS)] for position in range(functions)]
+    source = _module_source(index=0, kinds=kinds).replace("    return value\n", "    # Comment\n    return value\n")
+    if skip_marker:
+        source += "\n\ndef skipped():\n    # skip-unused-code\n    pass\n"
+    return source
+
+
+def run_parser_benchmark(functions: int, repeat: int = 3) -> list[ParserResult]:
+    """Time the parsers on a large module; every case keeps its fastest of `repeat` runs."""
+    import ast
+
+    import ast_comments
+
+    from apps.unused_code.unused_code import _FUNCTION_RECORDS_CACHE, extract_function_records
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="unused-code-parser-benchmark-") as root:
+        for skip_marker in (False, True):
+            source = large_module_source(functions=functions, skip_marker=skip_marker)
+            py_file = os.path.join(root, f"module_{int(skip_marker)}.py")
+            Path(py_file).write_text(source)
+            cases: dict[str, Callable[[], Any]] = {
+                "ast.parse": partial(ast.parse, source),
+                "ast_comments.parse": partial(ast_comments.parse, source=source),
+                "extract_function_records": partial(extract_function_records, py_file=py_file),
+            }
+            for case, run in cases.items():
+                timings = []
+                for _ in range(repeat):
+                    _FUNCTION_RECORDS_CACHE.cache_clear()
+                    start = time.perf_counter()
+                    run()
+                    timings.append(time.perf_counter() - start)
+                marker = "with marker" if skip_marker else "no marker"
+                results.append(ParserResult(case=f"{case} ({marker})", wall_time=min(timings)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=BenchmarkConfig.files)
+    parser.add_argument("--functions", type=int, default=BenchmarkConfig.functions_per_file)
+    parser.add_argument("--fixture-ratio", type=float, default=BenchmarkConfig.fixture_ratio)
+    parser.add_argument("--unused-ratio", type=float, default=BenchmarkConfig.unused_ratio)
+    parser.add_argument("--seed", type=int, default=BenchmarkConfig.seed)
+    parser.add_argument("--engine", action="append", help="Engines to run get_unused_functions with (default: grep)")
+    parser.add_argument("--jobs", type=int)
+    parser.add_argument("--parse-functions", type=int, help="Also time the parsers on a module of this many functions")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    config = BenchmarkConfig(
+        files=args.files,
+        functions_per_file=args.functions,
+        fixture_ratio=args.fixture_ratio,
+        unused_ratio=args.unused_ratio,
+        seed=args.seed,
+    )
+    results = run_benchmark(config=config, engines=args.engine or ["grep"], jobs=args.jobs) if config.files else []
+    parser_results = run_parser_benchmark(functions=args.parse_functions) if args.parse_functions else []
+
+    if results:
+        print(
+            f"{'case':<34} {'wall (s)':>9} {'subprocesses':>13} {'peak RSS (MB)':>14} {'child RSS (MB)':>15} "
+            f"{'findings':>9} correct"
+        )
+    for result in results:
+        print(
+            f"{result.case:<34} {result.wall_time:>9.2f} {result.subprocesses:>13} {result.peak_rss_mb:>14.1f} "
+            f"{result.peak_child_rss_mb:>15.1f} {result.findings:>9} {result.correct}"
+        )
+
+    if parser_results:
+        print(f"{'parser case':<44} {'wall (s)':>9}")
+    for parser_result in parser_results:
+        print(f"{parser_result.case:<44} {parser_result.wall_time:>9.3f}")
+
+    if args.json:
+        with open(args.json, "w") as fd:
+            json.dump(
+                {
+                    "config": asdict(config),
+                    "results": [asdict(result) for result in results],
+                    "parser_results": [asdict(result) for result in parser_results],
+                },
+                fd,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
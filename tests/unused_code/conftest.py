@@ -0,0 +1,46 @@
+import subprocess
+
+import pytest
+
+from apps.unused_code.unused_code import get_unused_functions
+from tests.utils import get_cli_runner
+
+LIB_SOURCE = "def used():\n    pass\n\n\ndef unused():\n    pass\n"
+MAIN_SOURCE = "from lib import used\n\nused()\n"
+
+
+@pytest.fixture
+def repo_files():
+    """The files of `git_repo` by relative path; override or parametrize it to change them."""
+    return {"lib.py": LIB_SOURCE, "main.py": MAIN_SOURCE}
+
+
+@pytest.fixture
+def git_repo(tmp_path, monkeypatch, repo_files):
+    """A git repository of `repo_files` with a single commit, as the working directory."""
+    for path, content in repo_files.items():
+        file_path = tmp_path / path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(content, bytes):
+            file_path.write_bytes(content)
+        else:
+            file_path.write_text(content)
+
+    for args in (
+        ["init", "-q"],
+        ["add", "-A"],
+        ["-c", "user.name=test", "-c", "user.email=test@example.com", "commit", "-q", "--allow-empty", "-m", "base"],
+    ):
+        subprocess.run(["git", *args], cwd=tmp_path, check=True, capture_output=True)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def run_cli():
+    """Return a function running pyutils-unusedcode with the given arguments, without a config file."""
+
+    def run(*args):
+        return get_cli_runner().invoke(get_unused_functions, ["--config-file-path", "missing.yaml", *args])
+
+    return run
@@ -0,0 +1,65 @@
+import pytest
+
+from tests.unused_code.benchmark import (
+    BenchmarkConfig,
+    _run_cli,
+    count_subprocesses,
+    generate_repo,
+    large_module_source,
+    run_benchmark,
+    run_case,
+    run_parser_benchmark,
+)
+
+SMALL_CONFIG = BenchmarkConfig(files=3, functions_per_file=8, fixture_ratio=0.5, unused_ratio=0.3)
+
+
+@pytest.fixture
+def synthetic_repo(tmp_path, monkeypatch):
+    # run_case changes the working directory
+    monkeypatch.chdir(tmp_path)
+    return generate_repo(root=str(tmp_path), config=SMALL_CONFIG)
+
+
+def test_generate_repo_is_deterministic(tmp_path):
+    first = generate_repo(root=str(tmp_path / "first"), config=SMALL_CONFIG)
+    second = generate_repo(root=str(tmp_path / "second"), config=SMALL_CONFIG)
+    assert first.expected_unused == second.expected_unused
+    assert first.expected_unused
+    assert len(first.python_files) == 3 * SMALL_CONFIG.files
+
+
+@pytest.mark.parametrize("engine", ["grep", "index", "python"])
+def test_synthetic_repo_findings_match_expected(synthetic_repo, engine):
+    result = run_case(
+        case=engine, repo=synthetic_repo, run=lambda: _run_cli(repo=synthetic_repo, args=["--engine", engine])
+    )
+    assert result.correct
+    assert result.findings == len(synthetic_repo.expected_unused)
+
+
+def test_count_subprocesses():
+    with count_subprocesses() as counter:
+        import subprocess
+
+        subprocess.run(["true"], check=True)
+    assert counter[0] == 1
+
+
+def test_run_benchmark(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = run_benchmark(config=BenchmarkConfig(files=2, functions_per_file=4), engines=["index"])
+    assert [result.case for result in results] == ["process_file", "get_unused_functions[index]"]
+    assert all(result.correct and result.wall_time > 0 and result.peak_rss_mb > 0 for result in results)
+    assert results[1].subprocesses < results[0].subprocesses
+
+
+def test_run_parser_benchmark():
+    results = run_parser_benchmark(functions=20, repeat=1)
+    assert len(results) == 6
+    assert all(result.wall_time > 0 for result in results)
+
+
+def test_large_module_source_skip_marker():
+    assert "# skip-unused-code" not in large_module_source(functions=10)
+    assert "# skip-unused-code" in large_module_source(functions=10, skip_marker=True)
@@ -0,0 +1,70 @@
+import shutil
+import subprocess
+
+import pytest
+
+from apps.unused_code.byte_search import compile_words_regex, search_file
+from apps.unused_code.unused_code import PythonSearch, get_unused_functions
+from tests.utils import get_cli_runner
+
+MANIFESTS_DIR = "tests/unused_code/manifests"
+
+
+@pytest.fixture
+def search_dir(tmp_path):
+    (tmp_path / "module.py").write_text("def helper():\r\n    pass\n\nvalue = helper(helper)\nhelpers = 1\n")
+    (tmp_path / "empty.py").write_text("")
+    (tmp_path / "blob.bin").write_bytes(b"helper\0binary")
+    (tmp_path / "no_newline.md").write_text("call helper")
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    ("relative_path", "expected"),
+    [
+        ("module.py", ["module.py:1:def helper():", "module.py:4:value = helper(helper)"]),
+        ("empty.py", []),
+        ("blob.bin", []),
+        ("no_newline.md", ["no_newline.md:1:call helper"]),
+        ("missing.py", []),
+    ],
+)
+def test_search_file(search_dir, relative_path, expected):
+    regex = compile_words_regex(words=["helper", "other"])
+    assert (
+        search_file(root=str(search_dir), relative_path=relative_path, words=["helper", "other"], regex=regex)
+        == expected
+    )
+
+
+def test_python_search_matches_git_grep(search_dir):
+    subprocess.run(["git", "init", "-q"], cwd=search_dir, check=True)
+    git_grep = subprocess.run(
+        ["git", "grep", "-n", "--untracked", "-I", "-P", "-e", r"\bhelper\b"],
+        cwd=search_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    usages = PythonSearch().find_usages(function_names=["helper"], py_file=str(search_dir / "module.py"))
+    assert sorted(usages["helper"]) == sorted(line.rstrip("\r") for line in git_grep.stdout.splitlines())
+
+
+def test_python_engine_matches_grep_engine():
+    args = ["--directory", f"{MANIFESTS_DIR}/"]
+    grep_result = get_cli_runner().invoke(get_unused_functions, [*args, "--engine", "grep"])
+    python_result = get_cli_runner().invoke(get_unused_functions, [*args, "--engine", "python"])
+    assert python_result.exit_code == grep_result.exit_code
+    assert python_result.output == grep_result.output
+
+
+def test_python_engine_outside_git(tmp_path, monkeypatch):
+    shutil.copytree(MANIFESTS_DIR, tmp_path / "manifests")
+    monkeypatch.chdir(tmp_path)
+    result = get_cli_runner().invoke(get_unused_functions, ["--engine", "python"])
+    assert result.exit_code == 1
+    assert "manifests/unused_code_file_for_test.py:unused_code_unused_function_no_docs" in result.output
+
+    grep_result = get_cli_runner().invoke(get_unused_functions, ["--engine", "grep"])
+    assert grep_result.exit_code == 1
+    assert grep_result.output == ""
@@ -0,0 +1,101 @@
+import subprocess
+import textwrap
+
+import pytest
+
+from apps.unused_code.changed_scope import changed_scope, removed_words
+
+
+@pytest.fixture
+def repo_files():
+    return {
+        "lib.py": textwrap.dedent(
+            """
+            def called_once():
+                return 1
+
+
+            def unused_func():
+                return 2
+            """
+        ),
+        "other.py": textwrap.dedent(
+            """
+            def other_unused():
+                return 3
+            """
+        ),
+        "caller.py": "from lib import called_once\n\ncalled_once()\n",
+    }
+
+
+def test_changed_scope_no_changes(git_repo):
+    assert changed_scope(git_root=str(git_repo), ref="HEAD") == {}
+
+
+def test_changed_scope_changed_file_and_removed_reference(git_repo):
+    (git_repo / "caller.py").write_text("print('no calls')\n")
+    assert "called_once" in removed_words(git_root=str(git_repo), ref="HEAD")
+    assert changed_scope(git_root=str(git_repo), ref="HEAD") == {
+        str(git_repo / "caller.py"): None,
+        str(git_repo / "lib.py"): {"called_once"},
+    }
+
+
+def test_changed_scope_untracked_new_file(git_repo, run_cli):
+    (git_repo / "pkg").mkdir()
+    (git_repo / "pkg" / "newfile.py").write_text("def brand_new_unused():\n    pass\n")
+    (git_repo / ".gitignore").write_text("ignored.py\n")
+    (git_repo / "ignored.py").write_text("def ignored_unused():\n    pass\n")
+    assert changed_scope(git_root=str(git_repo), ref="HEAD") == {str(git_repo / "pkg" / "newfile.py"): None}
+    assert run_cli("--since", "HEAD").output.splitlines() == [
+        "pkg/newfile.py:brand_new_unused:1:0 Is not used anywhere in the code."
+    ]
+
+
+def test_changed_scope_from_the_merge_base(git_repo):
+    def git(*args):
+        subprocess.run(
+            ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+            cwd=git_repo,
+            check=True,
+            capture_output=True,
+        )
+
+    git("branch", "main")
+    git("checkout", "-q", "-b", "feature")
+    (git_repo / "caller.py").write_text("print('no calls')\n")
+    git("commit", "-q", "-am", "feature change")
+    # Landed on main after the feature branched off
+    git("checkout", "-q", "main")
+    (git_repo / "other.py").write_text("def other_unused():\n    return 4\n")
+    git("commit", "-q", "-am", "main change")
+    git("checkout", "-q", "feature")
+
+    assert changed_scope(git_root=str(git_repo), ref="main") == {
+        str(git_repo / "caller.py"): None,
+        str(git_repo / "lib.py"): {"called_once"},
+    }
+
+
+def test_since_reports_only_changed_functions(git_repo, run_cli):
+    (git_repo / "caller.py").write_text("print('no calls')\n")
+    result = run_cli("--since", "HEAD")
+    assert result.exit_code == 1
+    assert result.output.splitlines() == ["lib.py:called_once:2:0 Is not used anywhere in the code."]
+
+    full_result = run_cli()
+    assert set(result.output.splitlines()) < set(full_result.output.splitlines())
+
+
+def test_since_changed_file_reports_all_functions(git_repo, run_cli):
+    with open(git_repo / "other.py", "a") as fd:
+        fd.write("# touched\n")
+    result = run_cli("--since", "HEAD", "--file-path", "other.py")
+    assert result.output.splitlines() == ["other.py:other_unused:2:0 Is not used anywhere in the code."]
+    assert run_cli("--since", "HEAD", "--file-path", "lib.py").exit_code == 0
+
+
+def test_since_invalid_ref(git_repo, run_cli):
+    result = run_cli("--since", "no-such-ref")
+    assert result.exit_code == 1
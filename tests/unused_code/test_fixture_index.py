@@ -0,0 +1,232 @@
+import ast
+import subprocess
+import textwrap
+from pathlib import Path
+
+import pytest
+
+from apps.unused_code.fixture_index import FixtureUsageIndex, _is_pytest_mark_usefixtures_call
+from apps.unused_code.unused_code import GitGrepSearch, get_unused_functions
+from tests.utils import get_cli_runner
+
+
+def _index(code: str, relative_path: str = "conftest.py") -> FixtureUsageIndex:
+    index = FixtureUsageIndex(root="/repo")
+    index.add_tree(relative_path=relative_path, tree=ast.parse(textwrap.dedent(code)))
+    return index
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        pytest.param(
+            """
+            def test_something(my_fixture):
+                pass
+            """,
+            id="parameter",
+        ),
+        pytest.param(
+            """
+            def test_something(other, /, *, my_fixture: int):
+                pass
+            """,
+            id="keyword-only-parameter",
+        ),
+        pytest.param(
+            """
+            import pytest
+
+            @pytest.mark.usefixtures("my_fixture")
+            def test_something():
+                pass
+            """,
+            id="usefixtures-decorator",
+        ),
+        pytest.param(
+            """
+            import pytest
+
+            @pytest.mark.usefixtures("my_fixture")
+            class TestSomething:
+                def test_one(self):
+                    pass
+            """,
+            id="usefixtures-class",
+        ),
+        pytest.param(
+            """
+            import pytest
+
+            pytestmark = [pytest.mark.usefixtures("other", "my_fixture")]
+            """,
+            id="usefixtures-pytestmark-list",
+        ),
+        pytest.param(
+            """
+            import pytest
+
+            my_marks = pytest.mark.usefixtures("my_fixture")
+            """,
+            id="usefixtures-assignment",
+        ),
+        pytest.param(
+            """
+            def test_something(request):
+                request.getfixturevalue("my_fixture")
+            """,
+            id="getfixturevalue",
+        ),
+        pytest.param(
+            """
+            def test_something(request):
+                request.getfixturevalue(argname="my_fixture")
+            """,
+            id="getfixturevalue-argname",
+        ),
+        pytest.param(
+            """
+            def pytest_runtest_setup(item):
+                item.fixturenames.insert(0, "my_fixture")
+            """,
+            id="fixturenames-insert",
+        ),
+    ],
+)
+def test_fixture_usage_index_finds_usage(code):
+    assert _index(code=code).find(fixture_name="my_fixture") == "/repo/conftest.py"
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        pytest.param(
+            """
+            def my_fixture():
+                pass
+            """,
+            id="definition",
+        ),
+        pytest.param(
+            """
+            # def test_something(my_fixture):
+            value = "my_fixture"
+            """,
+            id="comment-and-plain-string",
+        ),
+        pytest.param(
+            """
+            def test_something(request):
+                request.getfixturevalue(other="my_fixture")
+                item.fixturenames.append("my_fixture")
+            """,
+            id="other-calls",
+        ),
+    ],
+)
+def test_fixture_usage_index_ignores_non_usage(code):
+    assert _index(code=code).find(fixture_name="my_fixture") is None
+
+
+def test_fixture_usage_index_build_scope(tmp_path):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "test_module.py").write_text("def test_one(param_fixture):\n    pass\n")
+    (tmp_path / "tests" / "conftest.py").write_text("def conftest_fixture(dependency_fixture):\n    pass\n")
+    (tmp_path / "helpers.py").write_text("def helper(helper_argument):\n    pass\n")
+    (tmp_path / "plugin.py").write_text(
+        "import pytest\n\n@pytest.fixture\ndef plugin_fixture(plugin_dependency):\n"
+        "    pytest.mark.usefixtures('plugin_mark')\n"
+    )
+    (tmp_path / "tests" / "utils").mkdir()
+    (tmp_path / "tests" / "utils" / "marks.py").write_text(
+        "import pytest\n\nWITH_SETUP = pytest.mark.usefixtures('marked_fixture')\n\n"
+        "def lookup(request):\n    return request.getfixturevalue('looked_up_fixture')\n"
+    )
+    (tmp_path / "test_invalid.py").write_text("def broken(:\n")
+
+    index = FixtureUsageIndex.build(root=str(tmp_path), parse_file=lambda path: ast.parse(Path(path).read_text()))
+    assert index.find(fixture_name="param_fixture") == str(tmp_path / "tests" / "test_module.py")
+    assert index.find(fixture_name="dependency_fixture") == str(tmp_path / "tests" / "conftest.py")
+    assert index.find(fixture_name="helper_argument") is None
+    # Fixtures of modules that are not conftest files request fixtures as well
+    assert index.find(fixture_name="plugin_dependency") == str(tmp_path / "plugin.py")
+    # Marks and fixture lookups count in every file, helper modules included
+    assert index.find(fixture_name="plugin_mark") == str(tmp_path / "plugin.py")
+    assert index.find(fixture_name="marked_fixture") == str(tmp_path / "tests" / "utils" / "marks.py")
+    assert index.find(fixture_name="looked_up_fixture") == str(tmp_path / "tests" / "utils" / "marks.py")
+    assert index.find(fixture_name="request") is None
+
+
+def test_find_fixture_usage_builds_index_once(tmp_path, mocker):
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    (tmp_path / "conftest.py").write_text("def test_one(my_fixture):\n    pass\n")
+    build = mocker.spy(FixtureUsageIndex, "build")
+    usage_search = GitGrepSearch()
+    py_file = str(tmp_path / "fixtures.py")
+    assert usage_search.find_fixture_usage(fixture_name="my_fixture", py_file=py_file) == str(tmp_path / "conftest.py")
+    assert usage_search.find_fixture_usage(fixture_name="missing", py_file=py_file) is None
+    assert build.call_count == 1
+
+
+def test_fixture_requested_from_a_plugin_module_is_used(tmp_path, monkeypatch):
+    (tmp_path / "utilities").mkdir()
+    (tmp_path / "utilities" / "plugin_fixtures.py").write_text(
+        textwrap.dedent(
+            """
+            import pytest
+
+
+            @pytest.fixture
+            def fx():
+                return 1
+
+
+            @pytest.fixture
+            def fx_user(fx, tmp_path):
+                return tmp_path
+            """
+        )
+    )
+    (tmp_path / "conftest.py").write_text('pytest_plugins = ["utilities.plugin_fixtures"]\n')
+    (tmp_path / "test_module.py").write_text("def test_one(fx_user):\n    pass\n")
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    monkeypatch.chdir(tmp_path)
+
+    result = get_cli_runner().invoke(
+        get_unused_functions, ["--config-file-path", "missing.yaml", "--file-path", "utilities/plugin_fixtures.py"]
+    )
+    assert (result.exit_code, result.output) == (0, "")
+
+
+def test_fixture_usage_index_update_file(tmp_path):
+    parse_file = lambda path: ast.parse(Path(path).read_text())
+    (tmp_path / "test_module.py").write_text("def test_one(old_fixture):\n    pass\n")
+    index = FixtureUsageIndex(root=str(tmp_path))
+    index.update_file(relative_path="test_module.py", parse_file=parse_file)
+    assert index.find(fixture_name="old_fixture") == str(tmp_path / "test_module.py")
+
+    (tmp_path / "test_module.py").write_text("def test_one(new_fixture):\n    pass\n")
+    index.update_file(relative_path="test_module.py", parse_file=parse_file)
+    assert index.find(fixture_name="old_fixture") is None
+    assert index.find(fixture_name="new_fixture") == str(tmp_path / "test_module.py")
+
+    (tmp_path / "test_module.py").unlink()
+    index.update_file(relative_path="test_module.py", parse_file=parse_file)
+    assert index.find(fixture_name="new_fixture") is None
+
+
+def test_is_pytest_mark_usefixtures_call():
+    tree = ast.parse(
+        textwrap.dedent(
+            """
+    import pytest
+
+    @pytest.mark.usefixtures("my_fixture")
+    def test_something():
+        pass
+    """
+        )
+    )
+    decorator = tree.body[1].decorator_list[0]
+    assert _is_pytest_mark_usefixtures_call(decorator)
@@ -0,0 +1,88 @@
+import subprocess
+import textwrap
+
+import pytest
+
+from apps.unused_code.identifier_index import IdentifierIndex, words_in_files
+from apps.unused_code.unused_code import IndexSearch, process_file
+
+
+@pytest.fixture
+def repo_files():
+    return {
+        "module.py": textwrap.dedent(
+            '''
+            def helper():
+                """helper docstring"""
+                return 1  # helper comment
+
+
+            value = helper()
+            '''
+        ),
+        "notes.md": "call helper before anything\n",
+        "blob.bin": b"helper\0binary",
+        ".gitignore": "ignored.py\n",
+        "ignored.py": "helper()\n",
+    }
+
+
+def test_identifier_index_occurrences(git_repo):
+    index = IdentifierIndex.build(root=str(git_repo))
+    occurrences = {(index.files[file_index], line) for file_index, line in index.occurrences["helper"]}
+    # Code, strings and comments alike, in every searchable text file
+    assert occurrences == {("module.py", 2), ("module.py", 3), ("module.py", 4), ("module.py", 7), ("notes.md", 1)}
+
+
+def test_identifier_index_grep_matches_git_grep_scope(git_repo):
+    index = IdentifierIndex.build(root=str(git_repo))
+    git_grep = subprocess.run(
+        ["git", "grep", "-n", "--untracked", "-I", "-P", "-e", r"\bhelper\b"],
+        cwd=git_repo,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert sorted(index.grep(name="helper")) == sorted(git_grep.stdout.splitlines())
+
+
+def test_identifier_index_grep_one_entry_per_line(git_repo):
+    (git_repo / "twice.py").write_text("helper(helper)\n")
+    index = IdentifierIndex.build(root=str(git_repo))
+    assert index.grep(name="helper").count("twice.py:1:helper(helper)") == 1
+    assert index.grep(name="missing") == []
+
+
+def test_words_in_files(git_repo):
+    # Deleted files are skipped
+    assert words_in_files(paths=[str(git_repo / "notes.md"), str(git_repo / "deleted.py")]) == {
+        "call",
+        "helper",
+        "before",
+        "anything",
+    }
+
+
+def test_process_file_with_index_search(git_repo, mocker):
+    git_grep = mocker.patch("apps.unused_code.unused_code._git_grep")
+    assert (
+        process_file(
+            py_file=str(git_repo / "module.py"), func_ignore_prefix=[], file_ignore_list=[], usage_search=IndexSearch()
+        )
+        == ""
+    )
+    git_grep.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--directory", "tests/unused_code/manifests/"],
+        ["--file-path", "tests/unused_code/manifests/unused_code_file_for_test.py"],
+    ],
+)
+def test_index_engine_matches_grep_engine(args, run_cli):
+    grep_result = run_cli(*args, "--engine", "grep")
+    index_result = run_cli(*args, "--engine", "index")
+    assert index_result.exit_code == grep_result.exit_code
+    assert index_result.output == grep_result.output
@@ -0,0 +1,93 @@
+import pytest
+
+from apps.unused_code.profiling import GIT_GREP_PHASE, PHASES, QUEUE_WAIT_PHASE, Profiler, split_by_usage_lines
+from apps.unused_code.unused_code import GitGrepSearch, analyze_file, get_unused_functions
+from tests.utils import get_cli_runner
+
+MANIFESTS_ARGS = ["--directory", "tests/unused_code/manifests/"]
+
+
+@pytest.fixture
+def profiler():
+    profiler = Profiler()
+    profiler.reset(enabled=True)
+    return profiler
+
+
+def test_profiler_disabled_records_nothing():
+    profiler = Profiler()
+    with profiler.phase(phase=GIT_GREP_PHASE):
+        pass
+    profiler.add_sample(phase=GIT_GREP_PHASE, seconds=1)
+    profiler.record_function(py_file="a.py", name="func", seconds=1, usage_lines=1)
+    func = lambda: None
+    assert profiler.task(func=func, label="a.py") is func
+    assert profiler._samples == {}
+    assert profiler._functions == []
+
+
+def test_profiler_report_percentiles(profiler):
+    for milliseconds in range(1, 101):
+        profiler.add_sample(phase=GIT_GREP_PHASE, seconds=milliseconds / 1000)
+
+    git_grep_line = next(line for line in profiler.report().splitlines() if line.startswith(GIT_GREP_PHASE))
+    assert git_grep_line.split()[2:] == ["100", "5.050", "50.0", "95.0", "100.0"]
+
+
+def test_profiler_slowest_files_and_functions(profiler):
+    for index in range(3):
+        profiler.task(func=lambda: None, label=f"file_{index}.py")()
+        profiler.record_function(py_file="a.py", name=f"func_{index}", seconds=index, usage_lines=index)
+
+    report = profiler.report(top=2)
+    assert len(profiler._samples[QUEUE_WAIT_PHASE]) == 3
+    assert "Slowest 2 files:" in report
+    assert report.splitlines()[-2:] == [
+        "     2.000s  a.py:func_2 (2 usage lines)",
+        "     1.000s  a.py:func_1 (1 usage lines)",
+    ]
+
+
+def test_profiler_timed_iter(profiler):
+    assert list(profiler.timed_iter(phase="discovery", iterable=["a.py", "b.py"])) == ["a.py", "b.py"]
+    # The step raising StopIteration is timed as well
+    assert len(profiler._samples["discovery"]) == 3
+
+
+def test_get_unused_functions_profile():
+    result = get_cli_runner().invoke(get_unused_functions, MANIFESTS_ARGS)
+    profiled_result = get_cli_runner().invoke(
+        get_unused_functions, [*MANIFESTS_ARGS, "--profile", "--profile-top", "1"]
+    )
+    assert profiled_result.exit_code == result.exit_code == 1
+    assert profiled_result.stdout == result.stdout
+    phase_lines = {line.split()[0] for line in profiled_result.stderr.splitlines()}
+    assert {phase.split()[0] for phase in PHASES} <= phase_lines
+    assert "Slowest 1 functions:" in profiled_result.stderr
+
+
+def test_split_by_usage_lines():
+    assert split_by_usage_lines(seconds=4, usage_lines={"common": 3, "rare": 1, "unused": 0}) == {
+        "common": 3,
+        "rare": 1,
+        "unused": 0,
+    }
+    assert split_by_usage_lines(seconds=4, usage_lines={"first": 0, "second": 0}) == {"first": 2, "second": 2}
+
+
+def test_function_times_include_the_usage_search(profiler, mocker, tmp_path):
+    py_file = tmp_path / "lib.py"
+    py_file.write_text("def common():\n    pass\n\n\ndef rare():\n    pass\n")
+    # The clock only moves while searching: the search takes 4s, deciding each function takes no time
+    now = [0.0]
+
+    def find_usages(function_names, py_file, is_usage=None):
+        now[0] += 4
+        return {"common": ["a.py:1:common()", "a.py:2:common()", "a.py:3:common()"], "rare": ["a.py:4:rare()"]}
+
+    mocker.patch("apps.unused_code.unused_code.PROFILER", profiler)
+    mocker.patch("apps.unused_code.unused_code.time.perf_counter", side_effect=lambda: now[0])
+    mocker.patch.object(GitGrepSearch, "find_usages", side_effect=find_usages)
+
+    analyze_file(py_file=str(py_file), func_ignore_prefix=[], file_ignore_list=[], usage_search=GitGrepSearch())
+    assert [(name, seconds) for seconds, _, name, _ in profiler._functions] == [("common", 3), ("rare", 1)]
@@ -0,0 +1,115 @@
+import pytest
+
+from apps.unused_code.records import FunctionResult
+from apps.unused_code.reference_graph import ReferenceGraph
+
+LIB_SOURCE = """import pytest
+
+
+def entry():
+    return helper()
+
+
+def helper():
+    return leaf()
+
+
+def leaf():
+    return 1
+
+
+def cli():
+    return 0
+
+
+def dead():
+    return dead_helper()
+
+
+def dead_helper():
+    return dead_leaf()
+
+
+def dead_leaf():
+    return 2
+
+
+def recursive_dead(n):
+    return recursive_dead(n - 1)
+
+
+@pytest.fixture
+def requested_fixture():
+    return dead_leaf
+
+
+entry()
+"""
+
+
+def _result(name, lineno, end_lineno, used=True, references=None, py_file="/repo/lib.py"):
+    return FunctionResult(
+        py_file=py_file,
+        name=name,
+        lineno=lineno,
+        col_offset=0,
+        used=used,
+        end_lineno=end_lineno,
+        references=references or [],
+    )
+
+
+def test_reference_graph_enclosing_function():
+    first = _result(name="first", lineno=3, end_lineno=5)
+    second = _result(name="second", lineno=8, end_lineno=8)
+    graph = ReferenceGraph(results=[second, first])
+    assert graph.enclosing_function(path="/repo/lib.py", line=4) is first
+    assert graph.enclosing_function(path="/repo/lib.py", line=8) is second
+    assert graph.enclosing_function(path="/repo/lib.py", line=1) is None
+    assert graph.enclosing_function(path="/repo/lib.py", line=6) is None
+    assert graph.enclosing_function(path="/repo/other.py", line=4) is None
+
+
+def test_reference_graph_mark_unreachable():
+    results = [
+        _result(name="root", lineno=1, end_lineno=2, references=[("/repo/main.py", 1)]),
+        _result(name="callee", lineno=4, end_lineno=5, references=[("/repo/lib.py", 2)]),
+        _result(name="unused", lineno=7, end_lineno=8, used=False),
+        _result(name="chained", lineno=10, end_lineno=11, references=[("/repo/lib.py", 8)]),
+        _result(name="cycle_a", lineno=13, end_lineno=14, references=[("/repo/lib.py", 17)]),
+        _result(name="cycle_b", lineno=16, end_lineno=17, references=[("/repo/lib.py", 14)]),
+        _result(name="fixture", lineno=19, end_lineno=20),
+    ]
+    unreachable = ReferenceGraph(results=results).mark_unreachable()
+    assert [result.name for result in unreachable] == ["chained", "cycle_a", "cycle_b"]
+    assert all(not result.used and result.unreachable for result in unreachable)
+    assert [result.name for result in results if result.used] == ["root", "callee", "fixture"]
+
+
+@pytest.fixture
+def repo_files():
+    return {
+        "lib.py": LIB_SOURCE,
+        "pyproject.toml": '[project.scripts]\ntool = "lib:cli"\n',
+        "conftest.py": "def test_fixture(requested_fixture):\n    assert requested_fixture\n",
+    }
+
+
+def test_get_unused_functions_transitive(git_repo, run_cli):
+    result = run_cli()
+    assert result.exit_code == 1
+    assert result.output.splitlines() == ["lib.py:dead:20:0 Is not used anywhere in the code."]
+
+    transitive_result = run_cli("--transitive")
+    assert transitive_result.exit_code == 1
+    assert transitive_result.output.splitlines() == [
+        "lib.py:dead:20:0 Is not used anywhere in the code.",
+        "lib.py:dead_helper:24:0 Is only used by unused code.",
+        "lib.py:recursive_dead:32:0 Is only used by unused code.",
+    ]
+
+
+def test_get_unused_functions_transitive_requires_whole_repository(git_repo, run_cli):
+    result = run_cli("--transitive", "--file-path", "lib.py")
+    assert result.exit_code == 1
+    assert result.output == ""
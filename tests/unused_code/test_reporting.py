@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from apps.unused_code.records import FunctionResult
+from apps.unused_code.reporting import JSONL_FORMAT, SARIF_FORMAT, TEXT_FORMAT, FindingsReporter
+from apps.unused_code.unused_code import get_unused_functions
+from tests.utils import get_cli_runner
+
+MANIFESTS_ARGS = ["--directory", "tests/unused_code/manifests/"]
+
+
+def _result(py_file: str, name: str, lineno: int, used: bool = False) -> FunctionResult:
+    return FunctionResult(py_file=py_file, name=name, lineno=lineno, col_offset=0, used=used)
+
+
+@pytest.fixture
+def file_results():
+    return [
+        [_result(py_file="b.py", name="b_func", lineno=3), _result(py_file="b.py", name="used", lineno=9, used=True)],
+        [_result(py_file="a.py", name="z_func", lineno=1), _result(py_file="a.py", name="a_func", lineno=5)],
+    ]
+
+
+def test_reporter_text_sorted(file_results, capsys):
+    reporter = FindingsReporter(output_format=TEXT_FORMAT)
+    for results in file_results:
+        reporter.add(results=results)
+    assert capsys.readouterr().out == ""
+
+    reporter.finish()
+    assert reporter.found
+    assert capsys.readouterr().out.splitlines() == [
+        "a.py:z_func:1:0 Is not used anywhere in the code.",
+        "a.py:a_func:5:0 Is not used anywhere in the code.",
+        "b.py:b_func:3:0 Is not used anywhere in the code.",
+    ]
+
+
+def test_reporter_jsonl_stream(file_results, capsys):
+    reporter = FindingsReporter(output_format=JSONL_FORMAT, stream=True)
+    reporter.add(results=file_results[0])
+    assert [json.loads(line) for line in capsys.readouterr().out.splitlines()] == [
+        {
+            "path": "b.py",
+            "function": "b_func",
+            "line": 3,
+            "column": 0,
+            "message": "b_func is not used anywhere in the code.",
+        }
+    ]
+
+    reporter.add(results=file_results[1])
+    reporter.finish()
+    assert [json.loads(line)["function"] for line in capsys.readouterr().out.splitlines()] == ["z_func", "a_func"]
+
+
+def test_reporter_sarif(file_results, capsys):
+    reporter = FindingsReporter(output_format=SARIF_FORMAT, stream=True)
+    for results in file_results:
+        reporter.add(results=results)
+    assert capsys.readouterr().out == ""
+
+    reporter.finish()
+    sarif = json.loads(capsys.readouterr().out)
+    assert sarif["version"] == "2.1.0"
+    results = sarif["runs"][0]["results"]
+    assert [result["locations"][0]["physicalLocation"]["artifactLocation"]["uri"] for result in results] == [
+        "a.py",
+        "a.py",
+        "b.py",
+    ]
+    assert results[0]["locations"][0]["physicalLocation"]["region"] == {"startLine": 1, "startColumn": 1}
+
+
+def test_reporter_sarif_without_findings(capsys):
+    reporter = FindingsReporter(output_format=SARIF_FORMAT)
+    reporter.add(results=[_result(py_file="a.py", name="used", lineno=1, used=True)])
+    reporter.finish()
+    assert not reporter.found
+    assert json.loads(capsys.readouterr().out)["runs"][0]["results"] == []
+
+
+def test_get_unused_functions_jsonl_matches_text():
+    text_result = get_cli_runner().invoke(get_unused_functions, MANIFESTS_ARGS)
+    jsonl_result = get_cli_runner().invoke(get_unused_functions, [*MANIFESTS_ARGS, "--format", "jsonl", "--stream"])
+    assert jsonl_result.exit_code == text_result.exit_code == 1
+    findings = [json.loads(line) for line in jsonl_result.output.splitlines()]
+    assert sorted(f"{finding['path']}:{finding['function']}:{finding['line']}" for finding in findings) == sorted(
+        line.split(" ", 1)[0].rsplit(":", 1)[0] for line in text_result.output.splitlines()
+    )
+
+
+def test_get_unused_functions_fail_fast():
+    full_result = get_cli_runner().invoke(get_unused_functions, MANIFESTS_ARGS)
+    result = get_cli_runner().invoke(get_unused_functions, [*MANIFESTS_ARGS, "--fail-fast", "-j", "1"])
+    assert result.exit_code == 1
+    assert result.output
+    assert set(result.output.splitlines()) <= set(full_result.output.splitlines())
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import textwrap
+
+import pytest
+
+from apps.unused_code.result_cache import ResultCache, blob_shas
+
+
+@pytest.fixture
+def repo_files():
+    return {
+        "lib.py": textwrap.dedent(
+            """
+            def used_func():
+                return 1
+
+
+            def unused_func():
+                return 2
+            """
+        ),
+        "caller.py": "from lib import used_func\n\nused_func()\n",
+    }
+
+
+def test_blob_shas_match_git_hash_object(git_repo):
+    (git_repo / "untracked.py").write_text("x = 1\n")
+    (git_repo / "caller.py").write_text("modified = True\n")
+    shas = blob_shas(git_root=str(git_repo))
+    for path in ("lib.py", "caller.py", "untracked.py"):
+        expected = subprocess.run(
+            ["git", "hash-object", path], cwd=git_repo, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        assert shas[path] == expected
+
+
+def test_result_cache_reused_when_unchanged(git_repo, mocker, run_cli):
+    first = run_cli("--cache")
+    assert first.exit_code == 1
+    assert "unused_func" in first.output
+    assert os.path.isfile(git_repo / ".git" / "pyutils-unusedcode" / "results.json")
+
+    analyze_file = mocker.patch("apps.unused_code.unused_code.analyze_file")
+    second = run_cli("--cache")
+    analyze_file.assert_not_called()
+    assert second.output == first.output
+
+
+def test_result_cache_invalidated_by_new_reference(git_repo, run_cli):
+    assert "unused_func" in run_cli("--cache").output
+
+    (git_repo / "other.py").write_text("from lib import unused_func\n\nunused_func()\n")
+    result = run_cli("--cache")
+    assert result.exit_code == 0
+    assert "unused_func" not in result.output
+
+
+def test_result_cache_invalidated_by_removed_reference(git_repo, run_cli):
+    assert "lib.py:used_func:" not in run_cli("--cache").output
+
+    (git_repo / "caller.py").write_text("print('no calls')\n")
+    assert "lib.py:used_func:" in run_cli("--cache").output
+
+
+def test_result_cache_ignored_with_different_settings(git_repo, mocker, run_cli):
+    run_cli("--cache")
+    store = mocker.spy(ResultCache, "store")
+    run_cli("--cache", "--exclude-function-prefixes", "unused")
+    assert store.called
+
+
+def test_result_cache_custom_dir(git_repo, tmp_path_factory, run_cli):
+    cache_dir = tmp_path_factory.mktemp("cache")
+    run_cli("--cache", "--cache-dir", str(cache_dir))
+    assert os.path.isfile(cache_dir / "results.json")
@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from apps.unused_code import scheduler
+from apps.unused_code.scheduler import TaskPool, bounded_as_completed, largest_first
+
+
+@pytest.fixture
+def cpus(mocker):
+    return mocker.patch.object(scheduler, "available_cpus", return_value=4)
+
+
+def test_task_pool_shares_with_idle_workers(cpus):
+    calls: list[tuple[list[int], int]] = []
+    shared = threading.Event()
+
+    def run(items: list[int]) -> list[int]:
+        calls.append((items, threading.get_ident()))
+        if 0 in items:
+            # The calling task waits until a worker has started a share
+            assert shared.wait(timeout=5)
+        else:
+            shared.set()
+        return items
+
+    with TaskPool(max_workers=4) as pool:
+        results = pool.submit(pool.share, items=list(range(10)), run=run).result()
+
+    assert sorted(item for items in results for item in items) == list(range(10))
+    assert len(calls) > 1
+    assert len({thread for _, thread in calls}) > 1
+    # Three idle workers: the task keeps the first of four shares
+    assert [0, 1, 2] in [items for items, _ in calls]
+
+
+def test_task_pool_runs_in_one_piece_without_idle_workers(cpus):
+    cpus.return_value = 1
+    with TaskPool(max_workers=4) as pool:
+        assert pool.submit(pool.share, items=[1, 2, 3], run=sum).result() == [6]
+
+    with TaskPool(max_workers=1) as pool:
+        assert pool.idle_workers() == 1
+        assert pool.submit(pool.share, items=[1, 2, 3], run=sum).result() == [6]
+
+
+def test_task_pool_takes_back_shares_not_started(cpus, mocker):
+    calls: list[list[int]] = []
+
+    def run(items: list[int]) -> list[int]:
+        calls.append(items)
+        return items
+
+    # A single worker: the shares wait in the queue behind the task offering them
+    with TaskPool(max_workers=1) as pool:
+        mocker.patch.object(pool, "idle_workers", return_value=3)
+        assert pool.submit(pool.share, items=list(range(8)), run=run).result() == [[0, 1], [2, 3, 4, 5, 6, 7]]
+
+    assert calls == [[0, 1], [2, 3, 4, 5, 6, 7]]
+
+
+def test_task_pool_share_propagates_errors(cpus):
+    def run(items: list[int]) -> int:
+        if 9 in items:
+            raise ValueError("failed share")
+        return len(items)
+
+    with TaskPool(max_workers=4) as pool, pytest.raises(ValueError, match="failed share"):
+        pool.submit(pool.share, items=list(range(10)), run=run).result()
+
+
+def test_bounded_as_completed_keeps_a_window_of_futures():
+    pulled: list[int] = []
+    completed: list[int] = []
+
+    def items():
+        for item in range(10):
+            pulled.append(item)
+            yield item
+
+    def submit(item: int) -> Future:
+        # Items are only pulled once there is room in the window
+        assert len(pulled) - len(completed) <= 3
+        future: Future = Future()
+        future.set_result(item * 2)
+        return future
+
+    for item, future in bounded_as_completed(items=items(), submit=submit, window=3):
+        completed.append(item)
+        assert future.result() == item * 2
+
+    assert sorted(completed) == list(range(10))
+
+
+def test_largest_first(tmp_path):
+    paths = []
+    for name, size in [("a.py", 1), ("b.py", 5), ("c.py", 3), ("d.py", 9), ("e.py", 2)]:
+        (tmp_path / name).write_text("x" * size)
+        paths.append(str(tmp_path / name))
+    missing = str(tmp_path / "missing.py")
+
+    def names(ordered):
+        return [path.rsplit("/", 1)[1] for path in ordered]
+
+    assert names(largest_first(paths=[*paths, missing], lookahead=10)) == [
+        "d.py",
+        "b.py",
+        "c.py",
+        "e.py",
+        "a.py",
+        "missing.py",
+    ]
+    # Only the next `lookahead` paths are ordered
+    assert names(largest_first(paths=paths, lookahead=2)) == ["b.py", "d.py", "c.py", "e.py", "a.py"]
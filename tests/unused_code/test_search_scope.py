@@ -0,0 +1,113 @@
+import subprocess
+
+import pytest
+import yaml
+
+from apps.unused_code.search_scope import SearchScope, list_searchable_files
+from apps.unused_code.unused_code import GitGrepSearch, get_unused_functions
+from apps.utils import GIT_RUNNER
+from tests.utils import get_cli_runner
+
+UNUSED_MESSAGE = "lib.py:helper:1:0 Is not used anywhere in the code."
+
+
+@pytest.fixture
+def repo_files():
+    return {
+        "lib.py": "def helper():\n    pass\n",
+        "data/fixture.json": '{"callback": "helper"}\n',
+        "venv/vendored.py": "helper()\n",
+    }
+
+
+def _run(repo, search_scope, engine="grep"):
+    config_file = repo / "config.yaml"
+    config_file.write_text(yaml.safe_dump({"pyutils-unusedcode": {"search_scope": search_scope}}))
+    return get_cli_runner().invoke(
+        get_unused_functions,
+        ["--config-file-path", str(config_file), "--engine", engine, "--file-path", str(repo / "lib.py")],
+    )
+
+
+@pytest.mark.parametrize(
+    ("config", "expected"),
+    [
+        ({}, SearchScope()),
+        (
+            {"include": ["*.py", "*.yaml"], "exclude": ["tests/data"], "max_file_size": 1000, "untracked": False},
+            SearchScope(include=("*.py", "*.yaml"), exclude=("tests/data",), max_file_size=1000, untracked=False),
+        ),
+    ],
+)
+def test_search_scope_from_config(config, expected):
+    assert SearchScope.from_config(config=config) == expected
+
+
+@pytest.mark.parametrize(
+    "config",
+    [{"includes": ["*.py"]}, {"include": "*.py"}, {"exclude": [""]}, {"max_file_size": "1M"}, {"max_file_size": -1}],
+)
+def test_search_scope_from_config_rejects_invalid_values(config):
+    with pytest.raises(ValueError):
+        SearchScope.from_config(config=config)
+
+
+@pytest.mark.parametrize(
+    ("scope", "path", "matches"),
+    [
+        (SearchScope(), "pkg/module.py", True),
+        (SearchScope(), "pkg/venv/module.py", False),
+        (SearchScope(include=("*.py",)), "pkg/module.py", True),
+        (SearchScope(include=("*.py",)), "pkg/data.json", False),
+        (SearchScope(include=("pkg",)), "pkg/data.json", True),
+        (SearchScope(exclude=("pkg/",)), "pkg/module.py", False),
+        (SearchScope(exclude=("*.lock",)), "deps/uv.lock", False),
+    ],
+)
+def test_search_scope_matches(scope, path, matches):
+    assert scope.matches(relative_path=path) == matches
+
+
+@pytest.mark.parametrize("engine", ["grep", "index", "python"])
+def test_search_scope_restricts_usage_searches(git_repo, engine):
+    # Vendored code is never searched, like it is never analyzed
+    assert _run(repo=git_repo, search_scope={}, engine=engine).output == ""
+    assert _run(repo=git_repo, search_scope={"include": ["*.py"]}, engine=engine).output.strip() == UNUSED_MESSAGE
+    assert _run(repo=git_repo, search_scope={"exclude": ["data"]}, engine=engine).output.strip() == UNUSED_MESSAGE
+    assert _run(repo=git_repo, search_scope={"max_file_size": 10}, engine=engine).output.strip() == UNUSED_MESSAGE
+
+
+@pytest.mark.parametrize("engine", ["grep", "index", "python"])
+def test_search_scope_untracked_files(git_repo, engine):
+    (git_repo / "main.py").write_text("from lib import helper\n\nhelper()\n")
+    subprocess.run(["git", "rm", "-q", "--cached", "data/fixture.json"], cwd=git_repo, check=True)
+    (git_repo / "data" / "fixture.json").unlink()
+    assert _run(repo=git_repo, search_scope={}, engine=engine).output == ""
+    assert _run(repo=git_repo, search_scope={"untracked": False}, engine=engine).output.strip() == UNUSED_MESSAGE
+
+
+def test_list_searchable_files_within_scope(git_repo):
+    (git_repo / "large.py").write_text("x = 1\n" * 100)
+    assert sorted(list_searchable_files(root=str(git_repo))) == ["data/fixture.json", "large.py", "lib.py"]
+    assert list_searchable_files(
+        root=str(git_repo), search_scope=SearchScope(include=("*.py",), max_file_size=100, untracked=False)
+    ) == ["lib.py"]
+
+
+def test_git_grep_search_drops_too_large_files_from_the_output(git_repo, mocker):
+    (git_repo / "too_large").mkdir()
+    for index in range(20):
+        (git_repo / "too_large" / f"caller_{index}.py").write_text(f"helper()  # caller {index:>40}\n")
+    search = GitGrepSearch(search_scope=SearchScope(max_file_size=30))
+    assert len(search.too_large_files(root=str(git_repo))) == 20
+    run = mocker.spy(GIT_RUNNER, "run")
+
+    usages = search.find_usages(function_names=["helper"], py_file=str(git_repo / "lib.py"))
+    assert sorted(usages["helper"]) == ['data/fixture.json:1:{"callback": "helper"}', "lib.py:1:def helper():"]
+    # The too large files are not listed on the command line
+    assert not [arg for arg in run.call_args.kwargs["args"] if "too_large" in arg]
+
+
+def test_invalid_search_scope_config(git_repo):
+    result = _run(repo=git_repo, search_scope={"untracked": "no"})
+    assert result.exit_code == 1
@@ -0,0 +1,157 @@
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+
+import click
+import pytest
+
+from apps.unused_code import client, server, unused_code
+from apps.unused_code.server import AnalysisServer
+from apps.unused_code.unused_code import _WarmState
+
+LIB_SOURCE = "def used():\n    pass\n\n\ndef unused():\n    pass\n"
+UNUSED_MESSAGE = "lib.py:unused:5:0 Is not used anywhere in the code.\n"
+
+
+@pytest.fixture
+def repo_files():
+    return {"lib.py": LIB_SOURCE, "main.py": "from lib import used\n\nused()\n"}
+
+
+@pytest.fixture
+def server_repo(git_repo, monkeypatch):
+    # Unix socket paths are limited to about a hundred bytes, pytest temporary directories can be longer
+    runtime = tempfile.mkdtemp(prefix="pu-")
+    monkeypatch.setenv("XDG_RUNTIME_DIR", runtime)
+    monkeypatch.delenv(client.NO_SERVER_ENV, raising=False)
+    warm_state = _WarmState()
+    monkeypatch.setattr(unused_code, "_WARM_STATE", warm_state)
+    monkeypatch.setattr(server, "_WARM_STATE", warm_state)
+    yield git_repo
+    shutil.rmtree(runtime, ignore_errors=True)
+
+
+def test_analysis_server_run(server_repo):
+    unused_code._WARM_STATE.enabled = True
+    analysis_server = AnalysisServer(root=str(server_repo))
+    response = analysis_server.handle_request(request={"command": "run", "argv": [], "cwd": str(server_repo)})
+    assert response == {"stdout": UNUSED_MESSAGE, "stderr": "", "exit_code": 1}
+
+    (server_repo / "main.py").write_text("from lib import used, unused\n\nused()\nunused()\n")
+    response = analysis_server.handle_request(request={"command": "run", "argv": [], "cwd": str(server_repo)})
+    assert response == {"stdout": "", "stderr": "", "exit_code": 0}
+
+    response = analysis_server.handle_request(request={"command": "run", "argv": ["--bogus"], "cwd": str(server_repo)})
+    assert response["exit_code"] == 2
+    assert "No such option" in response["stderr"]
+
+    response = analysis_server.handle_request(
+        request={"command": "run", "argv": ["--file-path", "missing.py"], "cwd": str(server_repo)}
+    )
+    assert response["exit_code"] == 2
+    assert analysis_server.handle_request(request={"command": "status"})["runs"] == 4
+
+
+def test_forward_to_server(server_repo, capsys):
+    analysis_server = AnalysisServer(root=str(server_repo))
+    thread = threading.Thread(target=analysis_server.serve)
+    thread.start()
+    try:
+        while client.send_request(root=str(server_repo), request={"command": "status"}) is None:
+            thread.join(timeout=0.05)
+
+        assert client.forward(argv=[], cwd=str(server_repo)) == 1
+        assert capsys.readouterr().out == UNUSED_MESSAGE
+        assert client.forward(argv=["--watch"], cwd=str(server_repo)) is None
+    finally:
+        client.send_request(root=str(server_repo), request={"command": "stop"})
+        thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert client.forward(argv=[], cwd=str(server_repo)) is None
+
+
+def test_forward_without_server(server_repo, tmp_path_factory):
+    assert client.forward(argv=[], cwd=str(server_repo)) is None
+    assert client.forward(argv=[], cwd=str(tmp_path_factory.mktemp("not_a_repo"))) is None
+
+
+def test_socket_path_is_per_repository(server_repo, tmp_path_factory):
+    other = str(tmp_path_factory.mktemp("other"))
+    assert client.socket_path(root=str(server_repo)) != client.socket_path(root=other)
+    assert client.socket_path(root=str(server_repo)).startswith(client.runtime_dir())
+
+
+def _answer_every_run(sock):
+    while True:
+        try:
+            connection, _ = sock.accept()
+        except OSError:
+            return
+        with connection, connection.makefile("rwb") as stream:
+            stream.readline()
+            stream.write(b'{"stdout": "", "stderr": "", "exit_code": 0}\n')
+
+
+def test_forward_ignores_servers_of_other_users(server_repo):
+    directory = client.runtime_dir()
+    os.makedirs(directory)
+    os.chmod(directory, 0o755)
+    path = client.socket_path(root=str(server_repo))
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(path)
+        sock.listen()
+        thread = threading.Thread(target=_answer_every_run, args=(sock,))
+        thread.start()
+        try:
+            # A directory or socket others can write to may not be ours
+            os.chmod(path, 0o600)
+            assert client.forward(argv=[], cwd=str(server_repo)) is None
+            os.chmod(directory, 0o700)
+            os.chmod(path, 0o666)
+            assert client.forward(argv=[], cwd=str(server_repo)) is None
+            os.chmod(path, 0o600)
+            assert client.forward(argv=[], cwd=str(server_repo)) == 0
+        finally:
+            sock.shutdown(socket.SHUT_RDWR)
+            thread.join(timeout=5)
+
+
+def test_forward_ignores_a_symlinked_socket(server_repo):
+    os.makedirs(client.runtime_dir(), mode=0o700)
+    # The target is private, but anyone able to create the link could point it elsewhere
+    target_directory = tempfile.mkdtemp(prefix="pu-")
+    target = os.path.join(target_directory, "server.sock")
+    path = client.socket_path(root=str(server_repo))
+    os.symlink(target, path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(target)
+        os.chmod(target, 0o600)
+        sock.listen()
+        thread = threading.Thread(target=_answer_every_run, args=(sock,))
+        thread.start()
+        try:
+            assert client.forward(argv=[], cwd=str(server_repo)) is None
+        finally:
+            sock.shutdown(socket.SHUT_RDWR)
+            thread.join(timeout=5)
+            shutil.rmtree(target_directory, ignore_errors=True)
+
+
+def test_is_private_rejects_symlinks_whatever_their_mode(mocker, tmp_path):
+    link_stat = os.stat_result((stat.S_IFLNK | 0o600, 0, 0, 1, os.getuid(), os.getgid(), 0, 0, 0, 0))
+    mocker.patch.object(client.os, "lstat", return_value=link_stat)
+    assert not client.is_private(path=str(tmp_path / "link.sock"))
+
+    mocker.patch.object(client.os, "lstat", return_value=os.stat_result((stat.S_IFSOCK | 0o600, *link_stat[1:])))
+    assert client.is_private(path=str(tmp_path / "link.sock"))
+
+
+def test_serve_refuses_a_shared_runtime_dir(server_repo):
+    os.makedirs(client.runtime_dir(), mode=0o777)
+    os.chmod(client.runtime_dir(), 0o777)
+    with pytest.raises(click.ClickException, match="not accessible to others"):
+        AnalysisServer(root=str(server_repo)).serve()
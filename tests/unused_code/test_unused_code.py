@@ -133,7 +133,7 @@ def test_git_grep_raises_on_unexpected_error(mocker):
             self.stdout = ""
             self.stderr = "fatal: not a git repository"
 
-    mocker.patch("apps.unused_code.unused_code.subprocess.run", return_value=FakeCompleted())
+    mocker.patch("apps.unused_code.unused_code.GIT_RUNNER.run", return_value=FakeCompleted())
     with pytest.raises(RuntimeError):
         _git_grep(pattern="anything")
 
@@ -1,25 +1,33 @@
 from __future__ import annotations
 
 import ast
+import dataclasses
 import logging
 import os
+import re
 import subprocess
 import textwrap
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 from ast_comments import parse
 
 import apps.unused_code.unused_code
 from apps.unused_code.unused_code import (
-    _check_fixturenames_insert_pattern,
-    _check_getfixturevalue_pattern,
+    _FUNCTION_RECORDS_CACHE,
+    GitGrepSearch,
+    _build_batch_usage_pattern,
     _find_git_root,
+    _fixed_words,
     _git_grep,
+    _group_entries_by_name,
     _is_documentation_pattern,
-    _is_pytest_mark_usefixtures_call,
-    _is_usefixtures_context,
     _iter_functions,
+    _parse_file,
     _resolve_absolute_path,
+    extract_function_records,
     get_unused_functions,
     is_fixture_autouse,
     is_ignore_function_list,
@@ -109,32 +117,6 @@ def test_is_fixture_autouse(code, is_autouse):
     assert is_fixture_autouse(func) == is_autouse
 
 
-def test_check_fixturenames_insert_pattern(tmp_path):
-    py_file = tmp_path / "tmp_fixture_insert.py"
-    py_file.write_text('item.fixturenames.insert(0, "my_fixture")')
-    assert _check_fixturenames_insert_pattern("my_fixture", str(py_file))
-    assert not _check_fixturenames_insert_pattern("other_fixture", str(py_file))
-
-
-def test_check_getfixturevalue_pattern(tmp_path):
-    py_file = tmp_path / "tmp_getfixturevalue.py"
-    py_file.write_text('request.getfixturevalue("my_fixture")')
-    assert _check_getfixturevalue_pattern("my_fixture", str(py_file))
-    assert not _check_getfixturevalue_pattern("other_fixture", str(py_file))
-
-
-def test_check_fixturenames_insert_pattern_error(tmp_path):
-    py_file = tmp_path / "tmp_fixture_insert_error.py"
-    py_file.write_text("invalid python code")
-    assert not _check_fixturenames_insert_pattern("my_fixture", str(py_file))
-
-
-def test_check_getfixturevalue_pattern_error(tmp_path):
-    py_file = tmp_path / "tmp_getfixturevalue_error.py"
-    py_file.write_text("invalid python code")
-    assert not _check_getfixturevalue_pattern("my_fixture", str(py_file))
-
-
 @pytest.mark.parametrize(
     ("line", "is_doc"),
     [
@@ -150,7 +132,7 @@ def test_is_documentation_pattern(line, is_doc):
 
 def test_git_grep_error(mocker):
     mocker.patch(
-        "apps.unused_code.unused_code.subprocess.run",
+        "apps.unused_code.unused_code.GIT_RUNNER.run",
         side_effect=RuntimeError("git error"),
     )
     with pytest.raises(RuntimeError):
@@ -171,82 +153,11 @@ def test_is_ignore_function_list(prefixes, func_name, is_ignored):
     assert is_ignore_function_list(prefixes, func) == is_ignored
 
 
-def test_is_usefixtures_context(tmp_path):
-    py_file = tmp_path / "tmp_usefixtures.py"
-    py_file.write_text(
-        textwrap.dedent(
-            """
-    import pytest
-
-    @pytest.mark.usefixtures("my_fixture")
-    def test_something():
-        pass
-    """
-        )
-    )
-    assert _is_usefixtures_context(str(py_file), "4", "my_fixture")
-
-
-def test_is_usefixtures_context_in_list(tmp_path):
-    py_file = tmp_path / "tmp_usefixtures_list.py"
-    py_file.write_text(
-        textwrap.dedent(
-            """
-    import pytest
-
-    pytestmark = [pytest.mark.usefixtures("my_fixture")]
-
-    def test_something():
-        pass
-    """
-        )
-    )
-    assert _is_usefixtures_context(str(py_file), "4", "my_fixture")
-
-
-def test_is_usefixtures_context_in_assignment(tmp_path):
-    py_file = tmp_path / "tmp_usefixtures_assignment.py"
-    py_file.write_text(
-        textwrap.dedent(
-            """
-    import pytest
-
-    my_marks = pytest.mark.usefixtures("my_fixture")
-
-    @my_marks
-    def test_something():
-        pass
-    """
-        )
-    )
-    assert _is_usefixtures_context(str(py_file), "4", "my_fixture")
-
-
-def test_is_usefixtures_context_class(tmp_path):
-    py_file = tmp_path / "tmp_usefixtures_class.py"
-    py_file.write_text(
-        textwrap.dedent(
-            """
-    import pytest
-
-    @pytest.mark.usefixtures("my_fixture")
-    class TestSomething:
-        def test_one(self):
-            pass
-    """
-        )
-    )
-    assert _is_usefixtures_context(str(py_file), "4", "my_fixture")
-
-
 def test_detect_supported_grep_flag_fallback(mocker):
     apps.unused_code.unused_code._detect_supported_grep_flag.cache_clear()
     mocker.patch(
-        "apps.unused_code.unused_code.subprocess.run",
-        side_effect=[
-            subprocess.CalledProcessError(1, "git"),
-            subprocess.CalledProcessError(1, "git"),
-        ],
+        "apps.unused_code.unused_code.GIT_RUNNER.run",
+        side_effect=[OSError("git"), RuntimeError("git")],
     )
     with pytest.raises(RuntimeError):
         apps.unused_code.unused_code._detect_supported_grep_flag()
@@ -477,22 +388,6 @@ def test_resolve_absolute_path(tmp_path):
         os.chdir(original_cwd)
 
 
-def test_is_pytest_mark_usefixtures_call():
-    tree = parse(
-        textwrap.dedent(
-            """
-    import pytest
-
-    @pytest.mark.usefixtures("my_fixture")
-    def test_something():
-        pass
-    """
-        )
-    )
-    decorator = tree.body[1].decorator_list[0]
-    assert _is_pytest_mark_usefixtures_call(decorator)
-
-
 def test_iter_functions():
     tree = parse(
         textwrap.dedent(
@@ -532,7 +427,7 @@ def test_process_file_ignore_file(tmp_path):
 
 def test_get_unused_functions_processing_error(mocker):
     mocker.patch(
-        "apps.unused_code.unused_code.process_file",
+        "apps.unused_code.unused_code.analyze_file",
         side_effect=Exception("processing error"),
     )
     result = get_cli_runner().invoke(get_unused_functions)
@@ -544,3 +439,334 @@ def test_get_unused_functions_verbose(mocker):
     mocker.patch("apps.unused_code.unused_code.LOGGER.setLevel")
     get_cli_runner().invoke(get_unused_functions, ["--verbose"])
     apps.unused_code.unused_code.LOGGER.setLevel.assert_called_once_with(logging.DEBUG)
+
+
+def test_get_unused_functions_git_timeout(mocker):
+    runner = mocker.patch.object(
+        apps.unused_code.unused_code, "GIT_RUNNER", wraps=apps.unused_code.unused_code.GIT_RUNNER
+    )
+    args = ["--file-path", "tests/unused_code/manifests/unused_code_file_for_test.py"]
+    get_cli_runner().invoke(get_unused_functions, [*args, "--git-timeout", "30"])
+    assert runner.timeout == 30
+    get_cli_runner().invoke(get_unused_functions, args)
+    assert runner.timeout is None
+
+
+@pytest.mark.parametrize(
+    ("function_names", "flag", "expected"),
+    [
+        (["only_one"], "-P", r"\bonly_one\b"),
+        (["only_one"], "-G", r"\<only_one\>"),
+        (["first", "second"], "-P", r"\b(?:first|second)\b"),
+        (["first", "second"], "-G", [r"\<first\>", r"\<second\>"]),
+    ],
+)
+def test_build_batch_usage_pattern(function_names, flag, expected):
+    assert _build_batch_usage_pattern(function_names=function_names, flag=flag) == expected
+
+
+def test_group_entries_by_name():
+    entries = [
+        "a.py:1:first(second)",
+        "b.py:2:first_not_second = 1",
+        "malformed",
+        "c.py:3:second()",
+    ]
+    assert _group_entries_by_name(entries=entries, function_names=["first", "second", "third"]) == {
+        "first": ["a.py:1:first(second)"],
+        "second": ["a.py:1:first(second)", "c.py:3:second()"],
+        "third": [],
+    }
+
+
+def test_process_file_runs_one_git_grep_per_file(mocker, tmp_path):
+    py_file = tmp_path / "tmp_batched.py"
+    py_file.write_text(
+        textwrap.dedent(
+            """
+    import pytest
+
+    def first():
+        pass
+
+    def second():
+        pass
+
+    @pytest.fixture
+    def third():
+        pass
+    """
+        )
+    )
+    git_grep = mocker.patch(
+        "apps.unused_code.unused_code._git_grep",
+        return_value=["other.py:1:first()", "other.py:2:def test_it(third):"],
+    )
+    result = process_file(str(py_file), [], [])
+    assert git_grep.call_count == 1
+    assert "first" not in result
+    assert "third" not in result
+    assert "second" in result
+
+
+def test_git_grep_search_reuses_results_across_files(mocker):
+    mocker.patch("apps.unused_code.unused_code._detect_supported_grep_flag", return_value="-P")
+    git_grep = mocker.patch("apps.unused_code.unused_code._git_grep", return_value=["a.py:1:setup()"])
+    search = GitGrepSearch()
+
+    assert search.find_usages(function_names=["setup", "client"], py_file="first.py") == {
+        "setup": ["a.py:1:setup()"],
+        "client": [],
+    }
+    assert search.find_usages(function_names=["setup", "namespace"], py_file="second.py")["setup"] == ["a.py:1:setup()"]
+    assert [call.kwargs["pattern"] for call in git_grep.call_args_list] == [
+        r"\b(?:setup|client)\b",
+        r"\bnamespace\b",
+    ]
+
+
+def test_git_grep_search_single_flight(mocker):
+    mocker.patch("apps.unused_code.unused_code._detect_supported_grep_flag", return_value="-P")
+    started = threading.Event()
+
+    def _slow_grep(pattern, **kwargs):
+        started.set()
+        time.sleep(0.2)
+        return ["a.py:1:setup()"]
+
+    git_grep = mocker.patch("apps.unused_code.unused_code._git_grep", side_effect=_slow_grep)
+    search = GitGrepSearch()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        first = executor.submit(search.find_usages, function_names=["setup"], py_file="first.py")
+        started.wait()
+        others = [executor.submit(search.find_usages, function_names=["setup"], py_file="other.py") for _ in range(3)]
+        results = [future.result() for future in [first, *others]]
+
+    assert git_grep.call_count == 1
+    assert all(result == {"setup": ["a.py:1:setup()"]} for result in results)
+
+
+@pytest.mark.parametrize("error", [RuntimeError, KeyboardInterrupt, SystemExit])
+def test_git_grep_search_propagates_errors_to_waiters(mocker, error):
+    mocker.patch("apps.unused_code.unused_code._detect_supported_grep_flag", return_value="-P")
+    mocker.patch("apps.unused_code.unused_code._git_grep", side_effect=error("git grep failed"))
+    search = GitGrepSearch()
+
+    with pytest.raises(error):
+        search.find_usages(function_names=["setup"], py_file="first.py")
+
+    # A waiter left with an unresolved future would block forever: wait in a daemon thread
+    raised: list[BaseException] = []
+
+    def wait() -> None:
+        try:
+            search.find_usages(function_names=["setup"], py_file="second.py")
+        except BaseException as exc:  # noqa: BLE001
+            raised.append(exc)
+
+    waiter = threading.Thread(target=wait, daemon=True)
+    waiter.start()
+    waiter.join(timeout=5)
+    assert [type(exc) for exc in raised] == [error]
+
+
+def test_git_grep_stops_at_first_usage(tmp_path):
+    (tmp_path / "module.py").write_text("# helper\n" + "helper()\n" * 1000)
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+    assert _git_grep(
+        pattern=r"\bhelper\b", file_path=str(tmp_path / "module.py"), stop_when=lambda line: "#" not in line
+    ) == ["module.py:1:# helper", "module.py:2:helper()"]
+    assert len(_git_grep(pattern=r"\bhelper\b", file_path=str(tmp_path / "module.py"))) == 1001
+
+
+@pytest.mark.parametrize(
+    ("pattern", "flag", "words"),
+    [
+        (r"\bhelper\b", "-P", ["helper"]),
+        (r"\<helper\>", "-G", ["helper"]),
+        (r"\b(?:setup|client)\b", "-P", None),
+        ([r"\<setup\>", r"\<client\>"], "-G", ["setup", "client"]),
+        (r"\*\*helper\s*\(", "-P", None),
+        (r"\bfunción\b", "-P", None),
+    ],
+)
+def test_fixed_words(pattern, flag, words):
+    assert _fixed_words(pattern=pattern, flag=flag) == words
+
+
+@pytest.mark.parametrize("flag", ["-P", "-G"])
+def test_git_grep_fixed_strings_match_regex_engines(tmp_path, mocker, flag):
+    mocker.patch("apps.unused_code.unused_code._detect_supported_grep_flag", return_value=flag)
+    run = mocker.spy(apps.unused_code.unused_code.GIT_RUNNER, "run")
+    (tmp_path / "module.py").write_text(
+        "helper()\nhelper_x = 1\nxhelper()\nhelper2\nhelper_x helper\néhelper\nsetup(client)\n# helper\n"
+    )
+    subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+
+    for names in (["helper"], ["helper", "client"]):
+        pattern = _build_batch_usage_pattern(function_names=names, flag=flag)
+        patterns = [pattern] if isinstance(pattern, str) else pattern
+        expected = subprocess.run(
+            ["git", "grep", "-n", "--untracked", flag, *[arg for item in patterns for arg in ("-e", item)]],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.splitlines()
+        assert _git_grep(pattern=pattern, file_path=str(tmp_path / "module.py")) == expected
+    assert {"-w", "-F"} <= set(run.call_args_list[0].kwargs["args"])
+
+
+def test_git_grep_search_stops_once_every_name_is_used(mocker):
+    mocker.patch("apps.unused_code.unused_code._detect_supported_grep_flag", return_value="-P")
+    lines = ["a.py:1:# setup", "a.py:2:setup()", "a.py:3:client()", "a.py:4:setup(client())"]
+
+    def _streaming_grep(pattern, stop_when=None, **kwargs):
+        entries = []
+        for line in lines:
+            entries.append(line)
+            if stop_when is not None and stop_when(line):
+                break
+        return entries
+
+    git_grep = mocker.patch("apps.unused_code.unused_code._git_grep", side_effect=_streaming_grep)
+    search = GitGrepSearch()
+
+    assert search.find_usages(
+        function_names=["setup", "client"], py_file="first.py", is_usage=lambda name, entry: "#" not in entry
+    ) == {"setup": ["a.py:1:# setup", "a.py:2:setup()"], "client": ["a.py:3:client()"]}
+    # Complete results are searched for apart from the stopped ones
+    assert search.find_usages(function_names=["setup"], py_file="second.py") == {
+        "setup": ["a.py:1:# setup", "a.py:2:setup()", "a.py:4:setup(client())"]
+    }
+    assert git_grep.call_count == 2
+
+
+def test_extract_function_records_reuses_records_until_file_changes(tmp_path, mocker):
+    _FUNCTION_RECORDS_CACHE.cache_clear()
+    parse_file = mocker.patch("apps.unused_code.unused_code._parse_file", wraps=_parse_file)
+    py_file = tmp_path / "tmp_cached.py"
+    py_file.write_text("def my_function():\n    pass\n")
+
+    records = extract_function_records(py_file=str(py_file))
+    assert extract_function_records(py_file=str(py_file)) == records
+    assert parse_file.call_count == 1
+    assert _FUNCTION_RECORDS_CACHE.hits == 1
+
+    py_file.write_text("def my_function():\n    return 1\n")
+    os.utime(py_file, ns=(0, 0))
+    assert extract_function_records(py_file=str(py_file))[0].end_lineno == 2
+    assert parse_file.call_count == 2
+    assert _FUNCTION_RECORDS_CACHE.misses == 2
+
+
+def test_function_records_are_slotted_and_immutable(tmp_path):
+    py_file = tmp_path / "tmp_slots.py"
+    py_file.write_text("def my_function():\n    pass\n")
+    record = extract_function_records(py_file=str(py_file))[0]
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        record.name = "other"  # type: ignore[misc]
+
+
+def test_parse_file_uses_ast_comments_only_with_skip_marker(tmp_path, mocker):
+    _FUNCTION_RECORDS_CACHE.cache_clear()
+    ast_comments_parse = mocker.patch("apps.unused_code.unused_code.parse", wraps=parse)
+    plain = tmp_path / "tmp_plain.py"
+    plain.write_text("def my_function():\n    # Comment\n    pass\n")
+    marked = tmp_path / "tmp_marked.py"
+    marked.write_text("def my_function():\n    # skip-unused-code\n    pass\n")
+
+    assert [record.has_skip_marker for record in extract_function_records(py_file=str(plain))] == [False]
+    ast_comments_parse.assert_not_called()
+    assert [record.has_skip_marker for record in extract_function_records(py_file=str(marked))] == [True]
+    ast_comments_parse.assert_called_once()
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_get_unused_functions_verbose_reports_records_cache(mocker, jobs):
+    debug = mocker.patch("apps.unused_code.unused_code.LOGGER.debug")
+    get_cli_runner().invoke(
+        get_unused_functions, ["--verbose", "--directory", "tests/unused_code/manifests/", "--jobs", jobs]
+    )
+    # Parse worker processes (--jobs 2) report their cache counters as well
+    messages = [call.args[0] for call in debug.call_args_list if call.args[0].startswith("Function records cache:")]
+    assert len(messages) == 1
+    assert re.fullmatch(r"Function records cache: \d+ hits, [1-9]\d* misses", messages[0])
+
+
+def test_extract_function_records(tmp_path):
+    py_file = tmp_path / "records.py"
+    py_file.write_text(
+        textwrap.dedent(
+            """
+    import pytest
+
+    @pytest.fixture(autouse=True)
+    def auto_fixture():
+        pass
+
+    @pytest.fixture
+    def plain_fixture():
+        pass
+
+    def skipped():
+        # skip-unused-code
+        pass
+
+    def test_ignored():
+        pass
+    """
+        )
+    )
+    records = extract_function_records(py_file=str(py_file))
+    assert [(record.name, record.is_fixture, record.is_autouse, record.has_skip_marker) for record in records] == [
+        ("auto_fixture", True, True, False),
+        ("plain_fixture", True, False, False),
+        ("skipped", False, False, True),
+    ]
+
+
+def test_get_unused_functions_jobs_match_serial_run():
+    serial = get_cli_runner().invoke(get_unused_functions, ["--directory", "tests/unused_code/manifests/", "-j", "1"])
+    parallel = get_cli_runner().invoke(get_unused_functions, ["--directory", "tests/unused_code/manifests/", "-j", "2"])
+    assert parallel.exit_code == serial.exit_code
+    assert parallel.output == serial.output
+
+
+def test_get_unused_functions_file_path_shares_usage_search(mocker):
+    args = ["--file-path", "tests/unused_code/manifests/unused_code_file_for_test.py", "--engine", "grep"]
+    serial = get_cli_runner().invoke(get_unused_functions, args)
+
+    mocker.patch("apps.unused_code.scheduler.available_cpus", return_value=4)
+    search = mocker.spy(GitGrepSearch, "_search")
+    shared = get_cli_runner().invoke(get_unused_functions, args)
+    assert search.call_count > 1
+    assert (shared.exit_code, shared.output) == (serial.exit_code, serial.output)
+
+
+@pytest.mark.parametrize(
+    "repo_files", [{f"module_{index}.py": f"def function_{index}():\n    pass\n" for index in range(40)}]
+)
+def test_get_unused_functions_analyzes_files_before_discovery_ends(git_repo, run_cli, mocker):
+    discover_files = apps.unused_code.unused_code.all_python_files
+    analyze_file = apps.unused_code.unused_code._analyze_file_with_cache
+    discovered: list[str] = []
+    discovered_when_analyzed: list[int] = []
+
+    def discover(directory=None):
+        for py_file in discover_files(directory=directory):
+            discovered.append(py_file)
+            yield py_file
+
+    def analyze(**kwargs):
+        discovered_when_analyzed.append(len(discovered))
+        return analyze_file(**kwargs)
+
+    mocker.patch("apps.unused_code.unused_code.all_python_files", side_effect=discover)
+    mocker.patch("apps.unused_code.unused_code._analyze_file_with_cache", side_effect=analyze)
+    result = run_cli("--jobs", "2")
+    assert len(result.output.splitlines()) == 40
+    # The window of 2 threads holds 8 files; the first file is analyzed once the lookahead is full
+    assert min(discovered_when_analyzed) <= 9
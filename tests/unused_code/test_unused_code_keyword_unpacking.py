@@ -23,11 +23,8 @@ def get_config():
 
     # Mock git grep to simulate the detection
     def _mock_grep(pattern: str, **kwargs):
-        # Regular usage pattern - no matches found
+        # The batched usage search returns every line containing the name, keyword unpacking included
         if pattern == r"\bget_config\b":
-            return []
-        # Keyword unpacking pattern - match found
-        elif pattern == r"\*\*get_config\s*\(":
             return [f"{py_file.as_posix()}:10:    result = some_function(**get_config())"]
         return []
 
@@ -51,8 +48,6 @@ def helper_function():
 
     def _mock_grep(pattern: str, **kwargs):
         if pattern == r"\bhelper_function\b":
-            return []
-        elif pattern == r"\*\*helper_function\s*\(":
             # Return a function definition that USES helper_function - this should be detected
             return [f"{py_file.as_posix()}:5:def target_function(**helper_function()):"]
         return []
@@ -77,8 +72,6 @@ def config_helper():
 
     def _mock_grep(pattern: str, **kwargs):
         if pattern == r"\bconfig_helper\b":
-            return []
-        elif pattern == r"\*\*config_helper\s*\(":
             # Return a commented usage which should be ignored
             return [f"{py_file.as_posix()}:6:    # result = setup(**config_helper())"]
         return []
@@ -107,8 +100,6 @@ def doc_function():
 
     def _mock_grep(pattern: str, **kwargs):
         if pattern == r"\bdoc_function\b":
-            return []
-        elif pattern == r"\*\*doc_function\s*\(":
             # Return documentation pattern which should be ignored
             return [f"{py_file.as_posix()}:4:    Example: setup(**doc_function())"]
         return []
@@ -0,0 +1,109 @@
+import textwrap
+
+import pytest
+
+from apps.unused_code.unused_code import process_file
+from apps.unused_code.usage_classifier import CODE, COMMENT, DOCSTRING, IMPORT, STRING, classify_file, classify_source
+
+SOURCE = textwrap.dedent(
+    '''\
+    """Module docstring mentioning helper()."""
+    from lib import (
+        helper,  # helper comment
+        other,
+    )
+    from lib import \\
+        helper
+
+    def run():
+        """Run things.
+
+        Args:
+            helper (str): Only a parameter description.
+        """
+        name = "helper"
+        names = [
+            "first",
+            "helper"
+        ]
+        "helper" "as a comment"
+        prefixed = rb"helper"
+        return helper()  # helper
+    '''
+)
+
+
+@pytest.mark.parametrize(
+    "line_number, expected",
+    [
+        (1, [DOCSTRING]),
+        (3, [IMPORT, COMMENT]),
+        (7, [IMPORT]),
+        (13, [DOCSTRING]),
+        (15, [STRING]),
+        (18, [STRING]),
+        (20, [DOCSTRING]),
+        (21, [STRING]),
+        (22, [CODE, COMMENT]),
+    ],
+)
+def test_classify_source(line_number, expected):
+    classification = classify_source(text=SOURCE)
+    line = SOURCE.splitlines()[line_number - 1]
+    assert classification.occurrence_kinds(line_number=line_number, line=line, name="helper") == expected
+
+
+@pytest.mark.parametrize(
+    "source, expected",
+    [
+        pytest.param("import os; helper()\n", [CODE], id="call-after-semicolon"),
+        pytest.param("import os; from lib import helper; helper()\n", [IMPORT, CODE], id="imports-and-call"),
+        pytest.param("from lib import (helper); helper()\n", [IMPORT, CODE], id="parenthesized-import"),
+        pytest.param("if True: import helper\n", [IMPORT], id="compound-statement"),
+        pytest.param('print("note: import helper")\n', [STRING], id="import-in-string"),
+    ],
+)
+def test_classify_source_import_statements(source, expected):
+    classification = classify_source(text=source)
+    assert classification.occurrence_kinds(line_number=1, line=source.rstrip("\n"), name="helper") == expected
+
+
+def test_occurrence_kinds_of_a_changed_line():
+    classification = classify_source(text=SOURCE)
+    assert classification.occurrence_kinds(line_number=22, line="    helper()", name="helper") is None
+    assert classification.occurrence_kinds(line_number=100, line="helper()", name="helper") is None
+
+
+def test_classify_file(tmp_path):
+    (tmp_path / "module.py").write_text(SOURCE)
+    (tmp_path / "notes.md").write_text("helper()\n")
+    classification = classify_file(file_path=str(tmp_path / "module.py"))
+    assert classification is not None
+    assert classify_file(file_path=str(tmp_path / "module.py")) is classification
+    assert classify_file(file_path=str(tmp_path / "notes.md")) is None
+    assert classify_file(file_path=str(tmp_path / "missing.py")) is None
+
+
+def test_process_file_ignores_multiline_docstrings(mocker, tmp_path):
+    py_file = tmp_path / "tmp_docstring_usage.py"
+    py_file.write_text(
+        textwrap.dedent(
+            '''
+            def helper():
+                pass
+
+
+            def documented():
+                """
+                Example:
+                    result = helper()
+                """
+            '''
+        )
+    )
+    mocker.patch(
+        "apps.unused_code.unused_code._git_grep",
+        return_value=[f"{py_file.as_posix()}:9:        result = helper()"],
+    )
+    result = process_file(py_file=str(py_file), func_ignore_prefix=[], file_ignore_list=[])
+    assert "tmp_docstring_usage.py:helper:2:0 Is not used anywhere in the code." in result
@@ -0,0 +1,99 @@
+import pytest
+
+from apps.unused_code import watch
+from apps.unused_code.search_scope import SearchScope
+from apps.unused_code.unused_code import _get_usage_search, analyze_file
+from apps.unused_code.watch import TreeWatcher, WatchSession
+
+LIB_SOURCE = "def used():\n    pass\n\n\ndef unused():\n    pass\n"
+MAIN_SOURCE = "from lib import used\n\nused()\n"
+
+
+@pytest.fixture
+def repo_files():
+    return {"lib.py": LIB_SOURCE, "main.py": MAIN_SOURCE}
+
+
+def _names(results):
+    return sorted(result.name for result in results)
+
+
+@pytest.mark.parametrize("engine", ["grep", "index", "python"])
+def test_watch_session_update(git_repo, engine):
+    usage_search = _get_usage_search(engine=engine)
+    watcher = TreeWatcher(root=str(git_repo))
+    session = WatchSession(
+        python_files=lambda: sorted(str(path) for path in git_repo.glob("*.py")),
+        analyze=lambda py_file, function_names: analyze_file(
+            py_file=py_file,
+            func_ignore_prefix=[],
+            file_ignore_list=[],
+            usage_search=usage_search,
+            function_names=function_names,
+        ),
+        refresh=usage_search.refresh,
+    )
+    session.start()
+    assert _names(session.unused()) == ["unused"]
+
+    # A new reference in an unchanged file
+    (git_repo / "main.py").write_text(MAIN_SOURCE + "unused()\n")
+    added, removed = session.update(changed_files=watcher.poll())
+    assert (_names(added), _names(removed)) == ([], ["unused"])
+
+    # The only reference of a function is removed, and a new unused function is defined
+    (git_repo / "main.py").write_text("def helper():\n    pass\n\n\nunused()\n")
+    added, removed = session.update(changed_files=watcher.poll())
+    assert (_names(added), _names(removed)) == (["helper", "used"], [])
+
+    # A file that does not parse keeps its previous results
+    (git_repo / "main.py").write_text("def helper(:\n\n\nunused()\n")
+    assert session.update(changed_files=watcher.poll()) == ([], [])
+
+    (git_repo / "main.py").unlink()
+    added, removed = session.update(changed_files=watcher.poll())
+    assert (_names(added), _names(removed)) == (["unused"], ["helper"])
+
+
+def test_tree_watcher_poll(git_repo):
+    watcher = TreeWatcher(root=str(git_repo))
+    assert watcher.poll() == set()
+
+    (git_repo / "lib.py").write_text(LIB_SOURCE + "\n")
+    (git_repo / "README.md").write_text("used\n")
+    (git_repo / "main.py").unlink()
+    assert watcher.poll() == {str(git_repo.resolve() / name) for name in ("lib.py", "README.md", "main.py")}
+    assert watcher.poll() == set()
+
+
+def test_tree_watcher_poll_within_search_scope(git_repo):
+    watcher = TreeWatcher(root=str(git_repo), search_scope=SearchScope(include=("*.py",)))
+    (git_repo / "lib.py").write_text(LIB_SOURCE + "\n")
+    (git_repo / "README.md").write_text("used\n")
+    assert watcher.poll() == {str(git_repo.resolve() / "lib.py")}
+
+
+def test_get_unused_functions_watch(git_repo, monkeypatch, run_cli):
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) == 1:
+            (git_repo / "main.py").write_text(MAIN_SOURCE + "unused()\n")
+        else:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(watch.time, "sleep", fake_sleep)
+    result = run_cli("--watch", "--watch-interval", "0.5")
+    assert result.exit_code == 0
+    assert sleeps == [0.5, 0.5]
+    assert result.stdout.splitlines() == [
+        "lib.py:unused:5:0 Is not used anywhere in the code.",
+        "- lib.py:unused:5:0 Is not used anywhere in the code.",
+    ]
+
+
+def test_get_unused_functions_watch_rejects_fail_fast(git_repo, run_cli):
+    result = run_cli("--watch", "--fail-fast")
+    assert result.exit_code == 1
+    assert result.stdout == ""